@@ -2,47 +2,446 @@
 
 # This script handles loading CSV data, populating MySQL database tables,
 # and generating various data visualizations for agricultural trends.
+# Each stage is a function; importing the script runs nothing, and the command
+# line of Stage 11 runs the whole pipeline or one of its steps.
 
 # 📌 Stage 1: Import Required Libraries
 # Imports pandas for data manipulation, mysql.connector for database interaction,
-# and matplotlib, seaborn, plotly for data visualization.
+# and the chart module, which wraps matplotlib, seaborn and plotly for data visualization.
+# The chart module only imports those three when a chart is drawn, so the load and
+# ingest steps start without paying for them.
+import argparse
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
 import pandas as pd
 import mysql.connector
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
+import mysql.connector.pooling
+import Project2_Agri_India_analytics as agri_analytics
+import Project2_Agri_India_charts as agri_charts
+import Project2_Agri_India_checkpoint as agri_checkpoint
+import Project2_Agri_India_embedded as agri_embedded
+import Project2_Agri_India_ingest as agri_ingest
+import Project2_Agri_India_metrics as agri_metrics
+import Project2_Agri_India_queries as agri_queries
 
 # 📌 Stage 2: Define MySQL Database Connection Function
 # This function encapsulates the MySQL connection details.
 # It connects to the 'Project2_Agri_India' database, which is expected
 # to be created by the 'agri_india_sql_script'.
-def connect_mysql():
-    """Establishes and returns a connection to the MySQL database."""
+# Connection settings are read from environment variables so the same script can
+# point at bigger DB hosts; the defaults are the original local development values.
+mysql_config = {
+    'host': os.environ.get('AGRI_DB_HOST', 'localhost'),
+    'port': int(os.environ.get('AGRI_DB_PORT', '3306')),
+    'user': os.environ.get('AGRI_DB_USER', 'root'),
+    'password': os.environ.get('AGRI_DB_PASSWORD', '123456'),
+    'database': os.environ.get('AGRI_DB_NAME', 'Project2_Agri_India') # Matches the database name in SQL script
+}
+MYSQL_POOL_SIZE = int(os.environ.get('AGRI_DB_POOL_SIZE', '4'))
+
+# AGRI_DB_BACKEND selects the database behind connect_mysql(): "mysql" (default), or
+# "duckdb"/"sqlite" for an embedded database file at EMBEDDED_DB_PATH that needs no
+# server. The embedded file gets the table definitions of the SQL script (Stage 2)
+# on first use; see Project2_Agri_India_embedded.py for the MySQL dialect shim.
+DB_BACKEND = os.environ.get('AGRI_DB_BACKEND', 'mysql').lower()
+EMBEDDED_DB_PATH = os.environ.get(
+    'AGRI_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), f"Project2_Agri_India.{DB_BACKEND}"))
+SQL_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Project2_Agri_India.sql")
+
+def connect_mysql(allow_local_infile=False):
+    """Establishes and returns a connection to the MySQL database (or the embedded DB_BACKEND)."""
+    if DB_BACKEND != "mysql":
+        return agri_embedded.connect_embedded(DB_BACKEND, EMBEDDED_DB_PATH, SQL_SCRIPT_PATH)
     return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="123456",
-        database="Project2_Agri_India" # Matches the database name in SQL script
+        **mysql_config,
+        allow_local_infile=allow_local_infile # Needed only by the "load_data" ingest engine
+    )
+
+def create_mysql_pool(pool_size=None):
+    """Creates a pool of MySQL connections for the parallel Stage 8 loader."""
+    pool_size = MYSQL_POOL_SIZE if pool_size is None else pool_size
+    return mysql.connector.pooling.MySQLConnectionPool(
+        pool_name="agri_pool",
+        pool_size=pool_size, # mysql.connector caps a pool at 32 connections
+        **mysql_config
     )
 
+# 📌 Stage 2.5: Ingest Settings
+# Selects how Stage 8 loads 'agri_production' and how large each batch is.
+# "row"     -> original behaviour: one INSERT IGNORE per district-year row.
+# "batched" -> NaNs are filled once for the whole frame and rows are sent in
+#              batches through cursor.executemany(), one commit per batch.
+# "load_data" -> the frame is written to a temporary TSV and bulk-loaded with
+#              LOAD DATA LOCAL INFILE into a staging copy of 'agri_production',
+#              which is then swapped or merged into place (needs the server's
+#              local_infile setting to be ON). With an embedded DB_BACKEND the
+#              frame is inserted straight from the DataFrame instead.
+# "incremental" -> every (dist_code, year) row is fingerprinted with a vectorized
+#              hash of every column it writes to 'agri_production' (the keys and
+#              state_code included); only rows that are new or whose hash
+#              differs from the 'agri_production_manifest' table are sent, as
+#              INSERT ... ON DUPLICATE KEY UPDATE, so corrected values land and
+#              unchanged rows cost nothing.
+# Tune INSERT_BATCH_SIZE against your MySQL server (watch max_allowed_packet).
+# LOAD_DATA_MODE: "swap" replaces the table with exactly the CSV contents via an
+# atomic RENAME TABLE; "merge" keeps existing rows and INSERT IGNOREs the new ones.
+# CSV_CHUNK_SIZE: None reads the whole CSV into one DataFrame (original behaviour).
+# A number streams the CSV in chunks of that many rows; each chunk is renamed,
+# reordered and written to MySQL before the next one is read, so peak memory is
+# bounded by the chunk size instead of the file size. Streaming always merges
+# into 'agri_production' (a per-chunk "swap" would drop the earlier chunks).
+# PARALLEL_WORKERS: 1 loads on the single Stage 6 connection. More than 1 splits
+# the production frame by PARALLEL_PARTITION_BY ("state_code", or "year" for
+# contiguous year ranges) and loads the partitions concurrently, each worker on
+# its own connection from a pool of AGRI_DB_POOL_SIZE connections (or more, to
+# give every worker or writer one; a run needing over 32, mysql.connector's limit,
+# is rejected before connecting). Applies to the "row", "batched" and "incremental"
+# engines; "load_data" always runs on one connection since its staging table is shared.
+# PIPELINED_INGEST: in streaming mode, overlap reading and cleaning the chunks,
+# converting them to insert tuples and writing them (Project2_Agri_India_ingest.py):
+# each part runs in its own thread(s), joined by bounded queues of about
+# INGEST_QUEUE_SIZE chunks, so pandas parses the next chunk while the database
+# writes the last one, and a fast parser waits for the writers instead of reading
+# ahead. INGEST_WRITERS threads write, each on its own pooled MySQL connection
+# (PARALLEL_WORKERS does not apply); embedded databases and "load_data" have one
+# writer. The "batched" engine gets its insert tuples from the transform thread;
+# the other engines are handed whole chunks.
+INGEST_ENGINE = "batched"
+INSERT_BATCH_SIZE = 1000
+LOAD_DATA_MODE = "swap"
+CSV_CHUNK_SIZE = None
+PARALLEL_WORKERS = 1
+PARALLEL_PARTITION_BY = "state_code"
+PIPELINED_INGEST = False
+INGEST_QUEUE_SIZE = 4
+INGEST_WRITERS = 1
+
+# 📌 Stage 2.6: Long-Format Fact Table Settings
+# LOAD_LONG_FORMAT: also write every row to 'crop_production', the narrow
+# (dist_code, year, crop_id) -> area, production, yield fact table defined in the
+# SQL script, so per-crop queries read a small indexed slice instead of the
+# 71-column 'agri_production' row. The "incremental" engine writes only the
+# crop rows of the district-years it syncs, in the same transactions.
+# RUN_LAYOUT_BENCHMARK: after loading, time the 11 Stage 4 analytical queries of
+# the SQL script against the wide table and the long-format table.
+LOAD_LONG_FORMAT = False
+RUN_LAYOUT_BENCHMARK = False
+
+# 📌 Stage 2.7: Rollup Cube Settings
+# BUILD_ROLLUP_CUBES: aggregate the data once at load time into district x crop
+# (all years) and state x year x crop cubes (sum/min/max of area, production and
+# yield, plus the number of district-years). They are saved to the MySQL rollup tables
+# defined in the SQL script and as Parquet files in ROLLUP_CACHE_DIR, and the
+# Stage 10 charts read them instead of regrouping every district-year row.
+# COMPARE_CHART_AGGREGATION: when the charts aggregate the frame itself (no
+# cubes), also time the old one-groupby-per-chart approach next to the planned
+# one-groupby-per-key approach of Stage 10.
+BUILD_ROLLUP_CUBES = True
+ROLLUP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rollup_cache")
+COMPARE_CHART_AGGREGATION = False
+
+# 📌 Stage 2.8: Chart Output Settings
+# HEADLESS_CHARTS: False shows each Stage 10 chart and waits for it to be closed
+# (original behaviour). True renders every chart without a display (matplotlib's
+# Agg backend, Plotly HTML or static export) into CHART_OUTPUT_DIR, spreading the
+# charts over CHART_RENDER_WORKERS processes (None = one per CPU core). A chart
+# whose data is unchanged since the last run is not rendered again.
+# CHART_PLOTLY_FORMAT: "html", or "png"/"svg"/"pdf" (needs the 'kaleido' package).
+HEADLESS_CHARTS = False
+CHART_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "charts")
+CHART_RENDER_WORKERS = None
+CHART_PLOTLY_FORMAT = "html"
+
+# 📌 Stage 2.9: Cleaned Data Cache Settings
+# USE_CLEANED_CACHE: keep the renamed, typed and reordered frame of Stages 3-5 as an
+# uncompressed Arrow IPC (Feather) file in CLEANED_CACHE_DIR. Later runs memory-map
+# it instead of parsing the CSV again, as long as the CSV has the size and
+# modification time it had when the cache was built (or, if only the time changed,
+# the same SHA-256 hash). Needs the 'pyarrow' package; without it the CSV is parsed.
+# ANALYSIS_ONLY: skip the MySQL stages (6-9) and only build the Stage 10 charts.
+# With a fresh cache, only the chart columns are read from it.
+USE_CLEANED_CACHE = True
+CLEANED_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleaned_cache")
+ANALYSIS_ONLY = False
+
+# 📌 Stage 2.10: Data Quality Settings
+# VALIDATE_DATA: run the Stage 5.5 rules over the frame (or each streamed chunk)
+# before it is loaded or cached. '-1' sentinels (ICRISAT's marker for missing
+# values) become NaN, which Stage 8 stores as NULL, and rows that break a rule are left out of the load and
+# written to QUARANTINE_PATH with the reasons. The rules are:
+#   - no negative area/production/yield values,
+#   - yields of at most MAX_YIELD_KG_PER_HA and years within VALID_YEAR_RANGE,
+#   - production (1000 t) = area (1000 ha) x yield (kg/ha) / 1000 for every crop,
+#     within YIELD_CONSISTENCY_TOLERANCE (relative) plus
+#     YIELD_CONSISTENCY_ABS_TOLERANCE (absolute, for the rounding in the CSV),
+#   - one row per (dist_code, year),
+#   - every district stays in one state and every state keeps one name (the most
+#     common one in the frame or chunk that introduced it).
+VALIDATE_DATA = True
+QUARANTINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quarantine", "agri_production_quarantine.csv")
+MAX_YIELD_KG_PER_HA = 150000
+VALID_YEAR_RANGE = [1950, 2030]
+YIELD_CONSISTENCY_TOLERANCE = 0.05
+YIELD_CONSISTENCY_ABS_TOLERANCE = 0.01
+
+# 📌 Stage 2.11: Query Cache Settings
+# The 11 analytical queries are served by Project2_Agri_India_queries.py through an
+# LRU result cache of QUERY_CACHE_MAX_ENTRIES results, each kept for at most
+# QUERY_CACHE_TTL_SECONDS. Stage 8 bumps the 'data_version' row after each load
+# commit, which invalidates everything cached for older data. The cache reads the
+# version again at most every QUERY_VERSION_CHECK_SECONDS (at once after a load
+# by this process), so a load by another process is seen within that time.
+# RUN_ANALYTICAL_QUERIES: after loading, run every query twice (the second time
+# from the cache) and print the timings and cache metrics (Stage 8.8).
+RUN_ANALYTICAL_QUERIES = False
+QUERY_CACHE_MAX_ENTRIES = 128
+QUERY_CACHE_TTL_SECONDS = 300
+QUERY_VERSION_CHECK_SECONDS = 5
+
+# 📌 Stage 2.12: Index Plan Settings
+# agri_production carries a copy of each district's state_code and year-leading
+# covering indexes for the hot crop columns (see the SQL script).
+# AGRI_PRODUCTION_PARTITIONED: set to True once agri_production is RANGE
+# partitioned by year (optional step of Project2_Agri_India_upgrade.sql).
+# Partitioned InnoDB tables cannot have foreign keys, so the "load_data" swap
+# then leaves out the district foreign key.
+# RUN_INDEX_BENCHMARK: after loading, capture the EXPLAIN plan and latency of the
+# 11 analytical queries without the indexes and state_code (before) and with them
+# (after), and write both to INDEX_BENCHMARK_PATH as JSON (Stage 8.9).
+AGRI_PRODUCTION_PARTITIONED = False
+RUN_INDEX_BENCHMARK = False
+INDEX_BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_benchmark.json")
+
+# 📌 Stage 2.13: Instrumentation Settings
+# INSTRUMENT_STAGES: time each step of Stages 3-10 with Project2_Agri_India_metrics.py
+# (wall and CPU time, the peak RSS while the stage ran and its RSS change, rows
+# in/out and statements sent to the database), print a table at the end and append one JSON line per
+# stage, per error category and per run to METRICS_LOG_PATH. In streaming mode the
+# chunked Stages 3-5.5 run inside the Stage 8 load and are timed with it.
+# TRACE_MEMORY: also record the tracemalloc peak of each stage. It is off by default:
+# tracemalloc traces every allocation, which made the object-heavy rollup save
+# several times slower in the benchmark suite. The RSS figures are recorded either way.
+# METRICS_PROMETHEUS_PATH: also write the run's figures in the Prometheus text format
+# (e.g. into node_exporter's textfile collector directory); None = off.
+# ERROR_SAMPLE_SIZE: the row and batch errors of Stage 8 are counted per category,
+# and only the first ERROR_SAMPLE_SIZE of each are printed and logged.
+INSTRUMENT_STAGES = True
+TRACE_MEMORY = False
+METRICS_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics", "agri_pipeline_metrics.jsonl")
+METRICS_PROMETHEUS_PATH = None
+ERROR_SAMPLE_SIZE = 5
+
+# 📌 Stage 2.14: Pipeline Step Settings
+# The command line of Stage 11 runs the pipeline as steps: 'load' (Stages 3-5.5),
+# 'sync-masters' (Stage 7), 'ingest' (Stages 8-8.9), 'report' (Stages 9.5-10) or 'all'.
+# Each step runs the steps it depends on first, reading their checkpointed output
+# where there is one: the cleaned cache (Stage 2.9) holds the cleaned frame, and
+# PIPELINE_CHECKPOINT_PATH records how far each step got for the current CSV.
+# The "batched" engine records its row offset after every committed batch, a
+# streamed load its chunk count after every committed chunk and the parallel loader
+# every finished partition, so a crashed ingest resumes from there (unless the
+# step is run with --restart). "row" and "load_data" commit once at the end, and
+# "incremental" skips the rows that are already loaded by itself, so those resume
+# from the start.
+PIPELINE_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints", "agri_pipeline_checkpoint.json")
+
 # 📌 Stage 3: Load CSV Data into DataFrame
 # This stage loads your raw agricultural data from the specified CSV file
 # into a Pandas DataFrame.
-# IMPORTANT: Update the 'file_path' to the actual location of your CSV file.
-file_path = r"E:\Guvi_Class\.venv\Mini_Projects_Data\ICRISAT-District Level Data - ICRISAT-District Level Data.csv"
-try:
-    df = pd.read_csv(file_path)
-    print("✅ CSV Data Loaded Successfully.")
-except FileNotFoundError:
-    print(f"❌ Error: CSV file not found at {file_path}. Please check the path.")
-    exit() # Exit if the file isn't found, as subsequent steps depend on it.
+# IMPORTANT: Update the 'file_path' to the actual location of your CSV file
+# (or set the AGRI_CSV_PATH environment variable, as the benchmark suite does).
+file_path = os.environ.get(
+    'AGRI_CSV_PATH', r"E:\Guvi_Class\.venv\Mini_Projects_Data\ICRISAT-District Level Data - ICRISAT-District Level Data.csv")
+
+# Column types are declared up front so pandas skips type inference: codes and
+# years are int32, names are strings and every area/production/yield measure is
+# float32 (the same single precision as the FLOAT columns in MySQL).
+csv_column_dtypes = defaultdict(lambda: 'float32', {
+    'Dist Code': 'int32',
+    'Year': 'int32',
+    'State Code': 'int32',
+    'State Name': 'str',
+    'Dist Name': 'str'
+})
+
+# Columns read by the Stage 9.5 growth analytics and the Stage 10 visualizations.
+# In streaming mode only these are kept from each chunk, and in ANALYSIS_ONLY mode
+# only these are read from the cleaned cache, so the charts work without holding
+# the full wide frame.
+visualization_columns = [
+    'state_name', 'dist_name', 'year',
+    'rice_area', 'rice_production', 'rice_yield',
+    'wheat_area', 'wheat_production', 'wheat_yield',
+    'maize_area', 'maize_production',
+    'sorghum_production', 'fingermillet_production', 'groundnut_production',
+    'sunflower_production', 'soybean_production', 'soybean_yield',
+    'oilseeds_production', 'sugarcane_production'
+]
+
+# The cleaned cache is one Arrow IPC file plus a JSON manifest recording the size,
+# modification time and SHA-256 hash of the CSV it was built from, and the Stage 5.5
+# settings it was validated with.
+cleaned_cache_path = os.path.join(CLEANED_CACHE_DIR, "agri_production_cleaned.arrow")
+cleaned_cache_manifest_path = os.path.join(CLEANED_CACHE_DIR, "agri_production_cleaned.json")
+cleaned_cache_settings = {
+    'validate': VALIDATE_DATA,
+    'max_yield_kg_per_ha': MAX_YIELD_KG_PER_HA,
+    'valid_year_range': VALID_YEAR_RANGE,
+    'yield_consistency_tolerance': YIELD_CONSISTENCY_TOLERANCE,
+    'yield_consistency_abs_tolerance': YIELD_CONSISTENCY_ABS_TOLERANCE
+}
+
+def cleaned_cache_available():
+    """True when the cleaned cache is switched on and pyarrow is installed."""
+    return USE_CLEANED_CACHE and importlib.util.find_spec('pyarrow') is not None
+
+def hash_source_file(path, block_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_cleaned_cache_manifest(manifest):
+    """Writes the cleaned cache manifest next to the cache file."""
+    with open(cleaned_cache_manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+def cleaned_cache_is_fresh(source_path):
+    """Checks the cleaned cache manifest against the source file's size, mtime and (if needed) hash."""
+    source_stat = os.stat(source_path)
+    if not os.path.exists(cleaned_cache_path):
+        return False
+    try:
+        with open(cleaned_cache_manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return False
+    if manifest.get('size') != source_stat.st_size or manifest.get('settings') != cleaned_cache_settings:
+        return False
+    if manifest.get('mtime_ns') == source_stat.st_mtime_ns:
+        return True
+    # Same size but a new mtime (e.g. the file was copied or touched): the cache is
+    # still valid if the content is unchanged, and the new mtime is recorded.
+    if manifest.get('sha256') != hash_source_file(source_path):
+        return False
+    manifest['mtime_ns'] = source_stat.st_mtime_ns
+    write_cleaned_cache_manifest(manifest)
+    return True
+
+def read_cleaned_cache(columns=None):
+    """Memory-maps the cleaned cache and returns the requested columns (all by default)."""
+    from pyarrow import feather
+    return feather.read_table(cleaned_cache_path, columns=columns, memory_map=True).to_pandas()
+
+def iter_cleaned_cache_chunks(chunk_size):
+    """Yields the cleaned cache in chunks of chunk_size rows, sliced from one memory map."""
+    from pyarrow import feather
+    table = feather.read_table(cleaned_cache_path, memory_map=True)
+    for chunk_start in range(0, table.num_rows, chunk_size):
+        yield table.slice(chunk_start, chunk_size).to_pandas()
+
+def cache_cleaned_chunks(chunks, source_path):
+    """Passes cleaned chunks through while writing them to the cleaned cache, which is published after the last chunk."""
+    import pyarrow as pa
+    os.makedirs(CLEANED_CACHE_DIR, exist_ok=True)
+    temp_path = cleaned_cache_path + ".tmp"
+    schema = None
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(temp_path, schema)
+            writer.write_table(table)
+            yield chunk
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return
+    # The old manifest is removed first, so a crash between the two writes leaves
+    # a cache that is rebuilt rather than one that is trusted for the wrong CSV.
+    if os.path.exists(cleaned_cache_manifest_path):
+        os.remove(cleaned_cache_manifest_path)
+    os.replace(temp_path, cleaned_cache_path)
+    source_stat = os.stat(source_path)
+    write_cleaned_cache_manifest({
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'sha256': hash_source_file(source_path),
+        'columns': schema.names,
+        'settings': cleaned_cache_settings
+    })
+    print(f"✅ Cleaned Data Cached to {cleaned_cache_path}.")
+
+def write_cleaned_cache(frame, source_path):
+    """Writes a whole cleaned frame to the cleaned cache."""
+    for _ in cache_cleaned_chunks([frame], source_path):
+        pass
+
+# The steps record into pipeline_metrics; run_pipeline() replaces this disabled
+# placeholder with one configured by the Stage 2.13 settings for each run.
+pipeline_metrics = agri_metrics.PipelineMetrics(enabled=False)
+
+class PipelineStepError(Exception):
+    """Raised when a step cannot go on; the step has printed the reason, and the CLI exits with status 1."""
+
+# A CSV that is read in full (rather than streamed) is either the normal load or
+# analysis-only mode, where there is no Stage 8 to consume the chunks.
+def read_csv_step(state):
+    """Reads the cleaned cache when it is fresh, else the CSV (whole, or opened for streaming)."""
+    state['cleaned_cache_enabled'] = cleaned_cache_available()
+    if USE_CLEANED_CACHE and not state['cleaned_cache_enabled']:
+        print("⚠️ Cleaned cache disabled: the 'pyarrow' package is not installed.")
+    csv_chunks = None
+    with pipeline_metrics.stage("load_csv") as stage:
+        try:
+            cleaned_cache_hit = state['cleaned_cache_enabled'] and cleaned_cache_is_fresh(file_path)
+            if cleaned_cache_hit and state['analysis_only']:
+                df = read_cleaned_cache(columns=visualization_columns)
+                print(f"✅ Chart Columns Memory-Mapped from the Cleaned Cache ({len(df)} rows).")
+            elif cleaned_cache_hit and not state['streaming']:
+                df = read_cleaned_cache()
+                print(f"✅ Cleaned Data Memory-Mapped from Cache ({len(df)} rows, CSV parse skipped).")
+            elif cleaned_cache_hit:
+                csv_chunks = iter_cleaned_cache_chunks(CSV_CHUNK_SIZE)
+                df = None # Built from the chunks in Stage 8.
+                print(f"✅ Cleaned Cache Opened for Streaming ({CSV_CHUNK_SIZE} rows per chunk).")
+            elif not state['streaming']:
+                df = pd.read_csv(file_path, dtype=csv_column_dtypes)
+                print("✅ CSV Data Loaded Successfully.")
+            else:
+                # Only the header is read here; the rows are pulled chunk by chunk in Stage 8.
+                csv_chunks = pd.read_csv(file_path, dtype=csv_column_dtypes, chunksize=CSV_CHUNK_SIZE)
+                df = pd.read_csv(file_path, nrows=0)
+                print(f"✅ CSV Opened for Streaming ({CSV_CHUNK_SIZE} rows per chunk).")
+        except FileNotFoundError as err:
+            print(f"❌ Error: CSV file not found at {file_path}. Please check the path.")
+            # Subsequent steps depend on the file.
+            raise PipelineStepError(f"CSV file not found at {file_path}") from err
+        if df is not None and not state['streaming']:
+            stage.rows_out = len(df)
+    state.update(df=df, csv_chunks=csv_chunks, cleaned_cache_hit=cleaned_cache_hit)
 
 # 📌 Stage 4: Rename CSV Columns to Match Database/Project Standard
 # This crucial stage renames the columns in the DataFrame to match the
 # standardized naming conventions used in your MySQL database tables.
 # The mapping directly corresponds to the column names in the 'agri_production'
 # table defined in your SQL script.
-df.rename(columns={
+csv_column_rename_map = {
     'Dist Code': 'dist_code',
     'Year': 'year',
     'State Code': 'state_code',
@@ -117,14 +516,22 @@ df.rename(columns={
     'POTATOES AREA (1000 ha)': 'potatoes_area',
     'ONION AREA (1000 ha)': 'onion_area',
     'FODDER AREA (1000 ha)': 'fodder_area'
-}, inplace=True)
-print("✅ CSV Columns Renamed to Match Project Standard.")
+}
+def rename_columns_step(state):
+    """Renames the CSV columns; a cleaned cache hit is already renamed, validated and reordered (Stages 4-5)."""
+    if state['cleaned_cache_hit']:
+        return
+    with pipeline_metrics.stage("rename_columns", rows_in=len(state['df'])) as stage:
+        state['df'].rename(columns=csv_column_rename_map, inplace=True)
+        stage.rows_out = len(state['df'])
+    print("✅ CSV Columns Renamed to Match Project Standard.")
 
 # 📌 Stage 5: Validate Renamed Columns
 # This stage compares the DataFrame's columns after renaming with the
 # expected column list, ensuring consistency before database insertion.
 # The 'expected_columns_for_agri_production' list directly mirrors the
-# columns defined in your 'agri_production' table in the SQL script.
+# columns defined in your 'agri_production' table in the SQL script
+# (apart from the copied 'state_code', which Stage 8 adds).
 expected_columns_for_agri_production = [
     'dist_code', 'year',
     'rice_area', 'rice_production', 'rice_yield',
@@ -151,356 +558,1653 @@ expected_columns_for_agri_production = [
     'fruits_area', 'vegetables_area', 'fruits_vegetables_area',
     'potatoes_area', 'onion_area', 'fodder_area'
 ]
+agri_measure_columns = expected_columns_for_agri_production[2:] # Everything after (dist_code, year)
 
-csv_columns_after_rename = df.columns.tolist()
-missing_columns = [col for col in expected_columns_for_agri_production if col not in csv_columns_after_rename]
-extra_columns = [col for col in csv_columns_after_rename if col not in expected_columns_for_agri_production]
+# Reorder DataFrame columns to match the exact order of the agri_production table for insertion.
+# This is crucial for the cursor.execute() method when passing a tuple of row values.
+# The state/district identifiers are kept at the end: the master-data stages and
+# the visualizations need them, and the Stage 8 loaders select only the table columns.
+agri_identifier_columns = ['state_code', 'state_name', 'dist_name']
 
-print("\n--- Column Validation Results ---")
-print("✅ Columns Missing in DataFrame (after rename, if any):\n", missing_columns)
-print("✅ Extra/Unexpected Columns in DataFrame (after rename, if any):\n", extra_columns)
+def prepare_agri_chunk(frame):
+    """Applies the Stage 4 rename map and Stage 5 column order to one raw CSV frame or chunk."""
+    frame = frame.rename(columns=csv_column_rename_map)
+    return frame[expected_columns_for_agri_production + agri_identifier_columns]
 
-if not missing_columns and not extra_columns:
-    print("🎉 All DataFrame columns perfectly match the expected project doc structure for agri_production.")
-else:
-    print("⚠️ Mismatch still exists. Please review Stage 4 renaming and your expected columns list.")
+def check_columns_step(state):
+    """Compares the renamed columns with the expected ones, then reorders the frame (and each streamed chunk)."""
+    if state['cleaned_cache_hit']:
+        return
+    csv_columns_after_rename = state['df'].columns.tolist()
+    missing_columns = [col for col in expected_columns_for_agri_production if col not in csv_columns_after_rename]
+    extra_columns = [col for col in csv_columns_after_rename if col not in expected_columns_for_agri_production]
 
-# Reorder DataFrame columns to match the exact order of the agri_production table for insertion.
-# This is crucial for the cursor.execute() method when passing a tuple of row values.
-df = df[expected_columns_for_agri_production]
-print("✅ DataFrame columns reordered to match 'agri_production' table schema.")
+    print("\n--- Column Validation Results ---")
+    print("✅ Columns Missing in DataFrame (after rename, if any):\n", missing_columns)
+    print("✅ Extra/Unexpected Columns in DataFrame (after rename, if any):\n", extra_columns)
+
+    if not missing_columns and not extra_columns:
+        print("🎉 All DataFrame columns perfectly match the expected project doc structure for agri_production.")
+    else:
+        print("⚠️ Mismatch still exists. Please review Stage 4 renaming and your expected columns list.")
+
+    # In streaming mode df only holds the CSV header here.
+    state['df'] = state['df'][expected_columns_for_agri_production + agri_identifier_columns]
+    print("✅ DataFrame columns reordered to match 'agri_production' table schema.")
+    if state['streaming']:
+        state['csv_chunks'] = map(prepare_agri_chunk, state['csv_chunks'])
+
+# 📌 Stage 5.5: Validate Data Quality
+# Applies the Stage 2.10 rules to the whole frame, or to each chunk as Stage 8
+# pulls it. Every rule is one NumPy/pandas operation over all rows (the per-crop
+# rules over all crops at once), so no row is checked in a Python loop. Each rule
+# returns the positions of the rows it fails and a reason label, and the labels
+# are joined into one 'quarantine_reason' per quarantined row.
+# The running state carries the (dist_code, year) keys seen so far and the state
+# of each district and name of each state, so streamed chunks are checked against
+# the earlier ones.
+consistency_crops = [col[:-len('_yield')] for col in agri_measure_columns if col.endswith('_yield')]
+consistency_area_positions = [agri_measure_columns.index(f"{crop}_area") for crop in consistency_crops]
+consistency_production_positions = [agri_measure_columns.index(f"{crop}_production") for crop in consistency_crops]
+consistency_yield_positions = [agri_measure_columns.index(f"{crop}_yield") for crop in consistency_crops]
+negative_value_reasons = np.array([f"negative {col}" for col in agri_measure_columns], dtype=object)
+high_yield_reasons = np.array([f"{crop}_yield above {MAX_YIELD_KG_PER_HA} kg/ha" for crop in consistency_crops], dtype=object)
+inconsistent_yield_reasons = np.array([f"{crop}_production != area x yield / 1000" for crop in consistency_crops], dtype=object)
+
+def new_validation_state():
+    """Returns the running state the Stage 5.5 rules share across streamed chunks."""
+    return {
+        'seen_keys': np.empty(0, dtype=np.int64),
+        'district_states': pd.Series(dtype='int64'),
+        'state_names': pd.Series(dtype=object),
+        'rows_checked': 0,
+        'rows_quarantined': 0,
+        'sentinels_replaced': 0,
+        'seconds': 0.0,
+        'reason_counts': defaultdict(int)
+    }
+
+def rule_failures(mask, reasons):
+    """Returns the row positions failing a rule and their reason labels (one label, or one per mask column)."""
+    if mask.ndim == 1:
+        rows = np.flatnonzero(mask)
+        return rows, np.full(len(rows), reasons, dtype=object)
+    rows, columns = np.nonzero(mask)
+    return rows, reasons[columns]
+
+def reference_mismatch(frame, key_column, value_column, known):
+    """Flags rows whose value differs from the one known for their key; returns the mask and the extended key map."""
+    # A key seen for the first time takes its most common value in this frame.
+    new_keys = frame.loc[~frame[key_column].isin(known.index), [key_column, value_column]].value_counts()
+    new_keys = new_keys.reset_index().drop_duplicates(key_column).set_index(key_column)[value_column]
+    known = pd.concat([known, new_keys]) if len(known) else new_keys
+    mismatch = frame[key_column].map(known).to_numpy() != frame[value_column].to_numpy()
+    return mismatch, known
+
+def validate_agri_chunk(frame, state):
+    """Runs the Stage 5.5 rules over a cleaned frame or chunk; returns the passing rows and appends the rest to the quarantine file."""
+    started = time.perf_counter()
+    measures = frame[agri_measure_columns].to_numpy(dtype='float32', copy=True)
+    sentinels = measures == -1
+    sentinel_count = int(sentinels.sum())
+    if sentinel_count:
+        measures[sentinels] = np.nan
+        frame = frame.copy()
+        frame[agri_measure_columns] = measures
+
+    areas = measures[:, consistency_area_positions]
+    productions = measures[:, consistency_production_positions]
+    yields = measures[:, consistency_yield_positions]
+    expected_productions = areas * yields / 1000
+    # NaN comparisons are False, so a missing area, production or yield never fails.
+    inconsistent = (np.abs(productions - expected_productions)
+                    > YIELD_CONSISTENCY_TOLERANCE * np.maximum(np.abs(productions), np.abs(expected_productions))
+                    + YIELD_CONSISTENCY_ABS_TOLERANCE)
+
+    years = frame['year'].to_numpy(dtype=np.int64)
+    keys = frame['dist_code'].to_numpy(dtype=np.int64) * 10000 + years
+    duplicate_keys = pd.Series(keys).duplicated().to_numpy() | np.isin(keys, state['seen_keys'])
+    state['seen_keys'] = np.union1d(state['seen_keys'], keys)
+
+    wrong_state, state['district_states'] = reference_mismatch(frame, 'dist_code', 'state_code', state['district_states'])
+    wrong_name, state['state_names'] = reference_mismatch(frame, 'state_code', 'state_name', state['state_names'])
+
+    failures = [
+        rule_failures(measures < 0, negative_value_reasons),
+        rule_failures(yields > MAX_YIELD_KG_PER_HA, high_yield_reasons),
+        rule_failures(inconsistent, inconsistent_yield_reasons),
+        rule_failures((years < VALID_YEAR_RANGE[0]) | (years > VALID_YEAR_RANGE[1]), "year out of range"),
+        rule_failures(duplicate_keys, "duplicate (dist_code, year)"),
+        rule_failures(wrong_state, "district listed under another state"),
+        rule_failures(wrong_name, "state_code listed under another state_name")
+    ]
+    failed_rows = np.concatenate([rows for rows, _ in failures])
+    failed_reasons = np.concatenate([reasons for _, reasons in failures])
+
+    state['rows_checked'] += len(frame)
+    state['sentinels_replaced'] += sentinel_count
+    if len(failed_rows):
+        for reason, count in pd.Series(failed_reasons).value_counts().items():
+            state['reason_counts'][reason] += int(count)
+        row_reasons = pd.Series(failed_reasons).groupby(failed_rows).agg('; '.join)
+        quarantined = frame.iloc[row_reasons.index.to_numpy()].copy()
+        quarantined.insert(0, 'quarantine_reason', row_reasons.to_numpy())
+        os.makedirs(os.path.dirname(QUARANTINE_PATH), exist_ok=True)
+        quarantined.to_csv(QUARANTINE_PATH, mode='a', header=not os.path.exists(QUARANTINE_PATH), index=False)
+        state['rows_quarantined'] += len(quarantined)
+        passing = np.ones(len(frame), dtype=bool)
+        passing[row_reasons.index.to_numpy()] = False
+        frame = frame[passing]
+    state['seconds'] += time.perf_counter() - started
+    return frame
+
+def validated_agri_chunks(chunks, state):
+    """Yields each cleaned chunk with its failing rows quarantined, skipping chunks with no rows left."""
+    for chunk in chunks:
+        chunk = validate_agri_chunk(chunk, state)
+        if len(chunk):
+            yield chunk
+
+def report_validation(state):
+    """Prints the Stage 5.5 row counts, throughput and most common quarantine reasons."""
+    rows_per_second = state['rows_checked'] / state['seconds'] if state['seconds'] > 0 else float('inf')
+    print(f"ℹ️ Validated {state['rows_checked']} rows in {state['seconds']:.3f} s ({rows_per_second:,.0f} rows/sec); "
+          f"{state['sentinels_replaced']} '-1' sentinels replaced with NaN.")
+    if state['rows_quarantined'] == 0:
+        print("✅ All rows passed the data quality rules.")
+        return
+    print(f"⚠️ {state['rows_quarantined']} rows quarantined to {QUARANTINE_PATH}. Most common reasons:")
+    for reason, count in sorted(state['reason_counts'].items(), key=lambda item: -item[1])[:5]:
+        print(f"   {count:>8}  {reason}")
+
+# A cleaned cache hit was validated when the cache was built.
+# The cleaned frame is cached for the next run; streamed chunks are cached as
+# Stage 8 pulls them, and the cache is only published once the last one is written.
+def validate_data_step(state):
+    """Validates the frame (or wraps the streamed chunks) and writes the cleaned cache."""
+    if state['cleaned_cache_hit']:
+        return
+    if VALIDATE_DATA:
+        print("\n--- Validating Data Quality ---")
+        state['validation_state'] = new_validation_state()
+        if os.path.exists(QUARANTINE_PATH):
+            os.remove(QUARANTINE_PATH)
+        if not state['streaming']:
+            with pipeline_metrics.stage("validate_data", rows_in=len(state['df'])) as stage:
+                state['df'] = validate_agri_chunk(state['df'], state['validation_state'])
+                stage.rows_out = len(state['df'])
+            report_validation(state['validation_state'])
+        else:
+            state['csv_chunks'] = validated_agri_chunks(state['csv_chunks'], state['validation_state'])
+            print("ℹ️ Each chunk is validated as Stage 8 loads it.")
+
+    if state['cleaned_cache_enabled']:
+        if not state['streaming']:
+            with pipeline_metrics.stage("write_cleaned_cache", rows_in=len(state['df'])):
+                write_cleaned_cache(state['df'], file_path)
+        else:
+            state['csv_chunks'] = cache_cleaned_chunks(state['csv_chunks'], file_path)
 
 # 📌 Stage 6: Connect to MySQL Database
 # Establishes the connection to your MySQL database. It assumes the database
 # 'Project2_Agri_India' already exists, as created by the SQL script.
-try:
-    conn = connect_mysql()
-    cursor = conn.cursor()
-    print("\n✅ Connected to MySQL Database.")
-except mysql.connector.Error as err:
-    print(f"❌ Error connecting to MySQL: {err}")
-    exit() # Exit if database connection fails
-
-# 📌 Stage 7: Insert Master Data (States and Districts)
-# This stage inserts unique state and district information into their respective
-# master tables ('state_master' and 'district_master').
-# 'INSERT IGNORE' is used to prevent errors on duplicate primary keys,
-# aligning with the 'ON DUPLICATE KEY UPDATE' added in the SQL script's sample inserts.
-print("\n--- Inserting Master Data ---")
-
-# Insert Unique State Master Data into 'state_master' table
-states_to_insert = df[['state_code', 'state_name']].drop_duplicates().sort_values('state_code')
-for _, row in states_to_insert.iterrows():
+# In ANALYSIS_ONLY mode (and for the 'load' and 'report' steps) Stages 6-9 are
+# skipped and no connection is opened.
+# The parallel loader's pool is shared by the whole process, like the metrics.
+agri_pool = None
+
+def mysql_pool_size(pipelined_writers):
+    """Returns the pool size of a parallel or pipelined load, rejecting more connections than mysql.connector allows."""
+    pool_size = max(MYSQL_POOL_SIZE, PARALLEL_WORKERS, pipelined_writers)
+    # A smaller pool would not do: an exhausted pool raises instead of waiting.
+    if pool_size > mysql.connector.pooling.CNX_POOL_MAXSIZE:
+        message = (f"a pool of {pool_size} connections (AGRI_DB_POOL_SIZE {MYSQL_POOL_SIZE}, PARALLEL_WORKERS "
+                   f"{PARALLEL_WORKERS}, INGEST_WRITERS {pipelined_writers}) exceeds mysql.connector's limit "
+                   f"of {mysql.connector.pooling.CNX_POOL_MAXSIZE}")
+        print(f"❌ Invalid settings: {message}.")
+        raise PipelineStepError(message)
+    return pool_size
+
+def connect_step(state):
+    """Opens the (instrumented) connection and cursor, plus the connection pool for a parallel load."""
+    global agri_pool
+    with pipeline_metrics.stage("connect"):
+        pipelined_writers = pipelined_writer_count() if PIPELINED_INGEST and state['streaming'] else 1
+        pool_needed = DB_BACKEND == "mysql" and (pipelined_writers > 1 or (PARALLEL_WORKERS > 1 and INGEST_ENGINE != "load_data"))
+        # Checked before connecting, so a bad setting fails without touching the database.
+        pool_size = mysql_pool_size(pipelined_writers) if pool_needed else None
+        try:
+            conn = pipeline_metrics.instrument_connection(
+                connect_mysql(allow_local_infile=(INGEST_ENGINE == "load_data")))
+            state.update(conn=conn, cursor=conn.cursor())
+            if DB_BACKEND == "mysql":
+                print("\n✅ Connected to MySQL Database.")
+            else:
+                print(f"\n✅ Connected to Embedded {DB_BACKEND} Database at {EMBEDDED_DB_PATH}.")
+            if pool_needed:
+                if agri_pool is None:
+                    agri_pool = create_mysql_pool(pool_size)
+                print(f"✅ MySQL Connection Pool Created ({agri_pool.pool_size} connections).")
+            elif PARALLEL_WORKERS > 1 and DB_BACKEND != "mysql":
+                print("ℹ️ Embedded databases have a single writer; Stage 8 loads serially.")
+        except mysql.connector.Error as err:
+            print(f"❌ Error connecting to MySQL: {err}")
+            raise PipelineStepError(f"cannot connect to the database: {err}") from err
+
+# 📌 Stage 7: Sync Master Data (States, Districts, Crops and Years)
+# This stage brings the master tables ('state_master', 'district_master', 'crops'
+# and 'years') in line with the DataFrame using set operations: the existing keys
+# of each table are fetched with one SELECT, the DataFrame's unique keys not among
+# them are inserted with one multi-row INSERT, and the resulting key->value maps
+# are kept in memory so later stages can look up ids without re-querying:
+#   master_ids['state_master']    -> {state_code: state_name}
+#   master_ids['district_master'] -> {dist_code: dist_name}
+#   master_ids['crops']           -> {crop_name: crop_id}
+#   master_ids['years']           -> {year: year_id}
+# The tables themselves are expected to be created by the SQL script.
+
+# Crop names are the column prefixes of the agri_production measure columns
+# (e.g. 'rice_area' -> 'rice'). 'fruits_vegetables_area' is a combined total of
+# the fruits and vegetables columns, not a crop of its own.
+agri_crop_names = sorted({col.rsplit('_', 1)[0] for col in agri_measure_columns
+                          if col != 'fruits_vegetables_area'})
+
+def sync_master_table(conn, cursor, table, key_column, value_column, candidates, known=None):
+    """Inserts the candidate rows whose key is missing from a master table; returns its key->value map."""
+    if known is None:
+        cursor.execute(f"SELECT {key_column}, {value_column} FROM {table}")
+        known = dict(cursor.fetchall())
+    else:
+        known = dict(known)
+
+    missing = candidates[~candidates[key_column].isin(list(known))]
+    if missing.empty:
+        return known
+
+    columns = list(missing.columns)
     try:
-        cursor.execute("""
-            INSERT IGNORE INTO state_master (state_code, state_name)
-            VALUES (%s, %s)
-        """, (int(row['state_code']), row['state_name']))
+        # executemany() of an INSERT ... VALUES is sent as one multi-row statement.
+        cursor.executemany(f"""
+            INSERT IGNORE INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+        """, list(missing.itertuples(index=False, name=None)))
+        conn.commit()
     except mysql.connector.Error as err:
-        print(f"❌ Error inserting state {row['state_name']}: {err}")
-conn.commit()
-print("✅ Unique State Master Data Inserted.")
+        conn.rollback()
+        print(f"❌ Error inserting {len(missing)} rows into {table}: {err}")
+        return known
+
+    if value_column in columns:
+        known.update(zip(missing[key_column], missing[value_column]))
+    else:
+        # AUTO_INCREMENT ids are only known to the server, so read back just the new keys.
+        new_keys = missing[key_column].tolist()
+        cursor.execute(f"""
+            SELECT {key_column}, {value_column} FROM {table}
+            WHERE {key_column} IN ({', '.join(['%s'] * len(new_keys))})
+        """, new_keys)
+        known.update(cursor.fetchall())
+    print(f"   {table}: {len(missing)} new rows inserted.")
+    return known
+
+def sync_master_data(conn, cursor, frame, master_ids=None):
+    """Syncs all four master tables with a frame and returns the updated master_ids maps."""
+    master_ids = master_ids or {}
+    states = frame[['state_code', 'state_name']].drop_duplicates('state_code').sort_values('state_code')
+    districts = frame[['dist_code', 'dist_name', 'state_code']].drop_duplicates('dist_code').sort_values('dist_code')
+    years = frame[['year']].drop_duplicates().sort_values('year')
+    crops = pd.DataFrame({'crop_name': agri_crop_names})
+    # States go first: district_master references them through a foreign key.
+    return {
+        'state_master': sync_master_table(conn, cursor, 'state_master', 'state_code', 'state_name',
+                                          states, master_ids.get('state_master')),
+        'district_master': sync_master_table(conn, cursor, 'district_master', 'dist_code', 'dist_name',
+                                             districts, master_ids.get('district_master')),
+        'crops': sync_master_table(conn, cursor, 'crops', 'crop_name', 'crop_id',
+                                   crops, master_ids.get('crops')),
+        'years': sync_master_table(conn, cursor, 'years', 'year', 'year_id',
+                                   years, master_ids.get('years'))
+    }
+
+# In streaming mode the ingest step syncs the master data chunk by chunk in Stage 8;
+# the 'sync-masters' step on its own reads the chunks just to sync them.
+# Syncing again is cheap once the tables are complete (one SELECT per table), so
+# this step is simply re-run rather than skipped after a checkpoint.
+def sync_masters_step(state):
+    """Syncs the master tables with the frame (or every streamed chunk) and records it in the checkpoint."""
+    print("\n--- Syncing Master Data ---")
+    conn, cursor = state['conn'], state['cursor']
+    with pipeline_metrics.stage("sync_master_data", rows_in=None if state['streaming'] else len(state['df'])) as stage:
+        if state['streaming']:
+            master_ids = None
+            for chunk in state['csv_chunks']:
+                master_ids = sync_master_data(conn, cursor, chunk, master_ids)
+        else:
+            master_ids = sync_master_data(conn, cursor, state['df'])
+        state['master_ids'] = master_ids
+        stage.rows_out = sum(len(ids) for ids in master_ids.values()) if master_ids else 0
+    print("✅ State, District, Crop and Year Master Data Synced.")
+    state['checkpoint'].update('sync-masters', completed=True,
+                               keys={table: len(ids) for table, ids in (master_ids or {}).items()})
+
 
-# Insert Unique District Master Data into 'district_master' table
-districts_to_insert = df[['dist_code', 'dist_name', 'state_code']].drop_duplicates().sort_values('dist_code')
-for _, row in districts_to_insert.iterrows():
+# 📌 Stage 8: Insert Agricultural Production Data
+# This stage inserts the main agricultural production data into the 'agri_production' table.
+# The column order and data types are critical here and must match the
+# 'agri_production' table definition in the SQL script.
+# 'INSERT IGNORE' is used to skip rows that would cause duplicate primary key errors.
+# Missing values (NaN, including the '-1' sentinels replaced in Stage 5.5) are
+# stored as NULL in the nullable FLOAT columns, not as 0, so a missing figure
+# never passes for a reported zero: None for executemany(), \N for LOAD DATA.
+# 'state_code' is stored with every row as well, so the state-level queries join
+# state_master directly instead of going through district_master.
+agri_production_columns = expected_columns_for_agri_production + ['state_code']
+agri_production_insert_sql = f"""
+    INSERT IGNORE INTO agri_production ({', '.join(agri_production_columns)})
+    VALUES ({', '.join(['%s'] * len(agri_production_columns))})
+"""
+
+def sql_rows(frame):
+    """Returns a frame's rows as tuples of Python values, with NaN as None (NULL)."""
+    values = frame.to_numpy(dtype=object)
+    values[frame.isna().to_numpy()] = None
+    return [tuple(row) for row in values]
+
+def insert_agri_production_rows(conn, cursor, frame, commit_every=None):
+    """Inserts the production frame one row at a time (original Stage 8 behaviour), committing every commit_every rows; returns the rows inserted and failed."""
+    commit_every = INSERT_BATCH_SIZE if commit_every is None else commit_every
+    # Periodic commits keep one transaction from holding the whole load (and an
+    # embedded database's undo and replay journal from growing with it).
+    inserted_rows = 0
+    for index, row in frame[agri_production_columns].iterrows():
+        try:
+            # Convert row to tuple, handling NaN values by sending None (NULL).
+            # The order of values in the tuple must exactly match the column order
+            # in the INSERT statement and the 'agri_production_columns' list.
+            values_to_insert = tuple(None if pd.isna(value) else value for value in row.values)
+            cursor.execute(agri_production_insert_sql, values_to_insert)
+            inserted_rows += 1
+            if inserted_rows % commit_every == 0:
+                conn.commit()
+        except mysql.connector.Error as err:
+            # Counted per category; only the first ERROR_SAMPLE_SIZE are printed.
+            # For now, it will continue to try inserting other rows.
+            pipeline_metrics.record_error(
+                "agri_production row insert",
+                f"Error inserting row {index} (dist_code: {row['dist_code']}, year: {row['year']}): {err}")
+    conn.commit()
+    failed_rows = len(frame) - inserted_rows
+    if failed_rows:
+        print(f"⚠️ {failed_rows} of {len(frame)} rows could not be inserted.")
+    return inserted_rows, failed_rows
+
+def insert_agri_production_batched(conn, cursor, frame, batch_size=None, on_commit=None):
+    """Inserts the production frame in executemany() batches and reports throughput; returns the rows inserted and failed."""
+    batch_size = INSERT_BATCH_SIZE if batch_size is None else batch_size
+    # Convert the whole frame to native Python tuples (NaN as None) in one pass.
+    rows = sql_rows(frame[agri_production_columns])
+    total_rows = len(rows)
+    inserted_rows = 0
+    load_started = time.perf_counter()
+
+    for batch_number, batch_start in enumerate(range(0, total_rows, batch_size), start=1):
+        batch = rows[batch_start:batch_start + batch_size]
+        batch_started = time.perf_counter()
+        try:
+            # mysql.connector rewrites an INSERT ... VALUES executemany() into a
+            # single multi-row VALUES statement, so each batch is one round-trip.
+            cursor.executemany(agri_production_insert_sql, batch)
+            conn.commit()
+        except mysql.connector.Error as err:
+            conn.rollback()
+            pipeline_metrics.record_error(
+                "agri_production batch insert",
+                f"Error inserting batch {batch_number} (rows {batch_start}-{batch_start + len(batch) - 1}): {err}")
+            continue
+        batch_latency = time.perf_counter() - batch_started
+        inserted_rows += len(batch)
+        if on_commit is not None and inserted_rows == batch_start + len(batch):
+            # Rows of the frame up to the end of this batch, as long as no earlier
+            # batch failed: a resume must start at the first failed row.
+            on_commit(inserted_rows)
+        print(f"   Batch {batch_number}: {len(batch)} rows in {batch_latency * 1000:.1f} ms "
+              f"({len(batch) / batch_latency:,.0f} rows/sec)")
+
+    elapsed = time.perf_counter() - load_started
+    rows_per_sec = inserted_rows / elapsed if elapsed > 0 else 0.0
+    print(f"ℹ️ Sent {inserted_rows} of {total_rows} rows in {elapsed:.2f} s ({rows_per_sec:,.0f} rows/sec, batch size {batch_size}).")
+    return inserted_rows, total_rows - inserted_rows
+
+def get_secondary_indexes(cursor, table_name):
+    """Returns {index_name: (is_unique, [columns])} for every non-primary index on a table."""
+    cursor.execute(f"SHOW INDEX FROM {table_name}")
+    index_columns = {}
+    for row in cursor.fetchall():
+        # SHOW INDEX columns: Table, Non_unique, Key_name, Seq_in_index, Column_name, ...
+        _, non_unique, key_name, seq_in_index, column_name = row[:5]
+        if key_name == 'PRIMARY':
+            continue
+        is_unique, columns = index_columns.setdefault(key_name, (not non_unique, {}))
+        columns[seq_in_index] = column_name
+    return {name: (is_unique, [columns[seq] for seq in sorted(columns)])
+            for name, (is_unique, columns) in index_columns.items()}
+
+def load_data_infile(cursor, table_name, frame):
+    """Writes a frame to a temporary tab-separated file and LOAD DATA LOCAL INFILEs it into a table; returns the rows loaded."""
+    tsv_file = tempfile.NamedTemporaryFile(mode='w', suffix='.tsv', delete=False, newline='')
+    try:
+        with tsv_file:
+            # NaN is written as \N, which LOAD DATA reads as NULL.
+            frame.to_csv(tsv_file, sep='\t', header=False, index=False, lineterminator='\n', na_rep='\\N')
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table_name}
+            FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+            ({', '.join(frame.columns)})
+        """, (tsv_file.name,))
+        return cursor.rowcount
+    finally:
+        os.remove(tsv_file.name)
+
+def load_agri_production_infile(conn, cursor, frame, mode=None):
+    """Bulk-loads the production frame with LOAD DATA LOCAL INFILE through a staging table; returns the rows loaded and failed."""
+    mode = LOAD_DATA_MODE if mode is None else mode
+    staging_table = 'agri_production_staging'
+    load_started = time.perf_counter()
     try:
-        cursor.execute("""
-            INSERT IGNORE INTO district_master (dist_code, dist_name, state_code)
-            VALUES (%s, %s, %s)
-        """, (int(row['dist_code']), row['dist_name'], int(row['state_code'])))
+        # Build an empty staging copy and drop its secondary indexes so they are
+        # built once after the load instead of being maintained row by row.
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        cursor.execute("DROP TABLE IF EXISTS agri_production_old") # Left over from an interrupted swap
+        cursor.execute(f"CREATE TABLE {staging_table} LIKE agri_production")
+        deferred_indexes = get_secondary_indexes(cursor, staging_table)
+        alterations = [f"DROP INDEX {name}" for name in deferred_indexes]
+        # CREATE TABLE ... LIKE does not copy foreign keys. A swapped-in table needs
+        # the district link (unless it is year-partitioned, which cannot have one),
+        # so it is added while the staging table is still empty. With
+        # foreign_key_checks off for this session, adding it is a metadata change and
+        # the loaded rows are not looked up one by one: Stage 7 has already written
+        # their district_master rows.
+        with_foreign_key = mode == "swap" and not AGRI_PRODUCTION_PARTITIONED
+        if with_foreign_key:
+            cursor.execute("SET foreign_key_checks = 0")
+            alterations.append("ADD FOREIGN KEY (dist_code) REFERENCES district_master(dist_code)")
+        try:
+            if alterations:
+                cursor.execute(f"ALTER TABLE {staging_table} " + ", ".join(alterations))
+
+            step_started = time.perf_counter()
+            loaded_rows = load_data_infile(cursor, staging_table, frame[agri_production_columns])
+            conn.commit()
+            load_seconds = time.perf_counter() - step_started
+        finally:
+            if with_foreign_key:
+                cursor.execute("SET foreign_key_checks = 1")
+
+        step_started = time.perf_counter()
+        if deferred_indexes:
+            cursor.execute(f"ALTER TABLE {staging_table} " + ", ".join(
+                f"ADD {'UNIQUE ' if is_unique else ''}INDEX {name} ({', '.join(columns)})"
+                for name, (is_unique, columns) in deferred_indexes.items()))
+
+        if mode == "swap":
+            # RENAME TABLE swaps both names in one atomic step, so readers see
+            # either the old table or the fully loaded one, never a partial load.
+            cursor.execute(f"""
+                RENAME TABLE agri_production TO agri_production_old,
+                             {staging_table} TO agri_production
+            """)
+            cursor.execute("DROP TABLE agri_production_old")
+        else:
+            # A single INSERT ... SELECT commits as one transaction, so the merged
+            # rows become visible all at once.
+            cursor.execute(f"INSERT IGNORE INTO agri_production SELECT * FROM {staging_table}")
+            conn.commit()
+            cursor.execute(f"DROP TABLE {staging_table}")
+        publish_seconds = time.perf_counter() - step_started
     except mysql.connector.Error as err:
-        print(f"❌ Error inserting district {row['dist_name']}: {err}")
-conn.commit()
-print("✅ Unique District Master Data Inserted.")
-
-# 📌 Stage 7.5: Insert Crop Master Data
-# This stage dynamically extracts unique crop names from the DataFrame's column headers
-# (which correspond to the 'agri_production' table's crop columns) and inserts them
-# into the 'crops' table. The 'crops' table schema is defined in the SQL script.
-print("\n--- Inserting Crop Master Data ---")
-
-# Define suffixes to remove to get base crop names
-suffixes = ['_area', '_production', '_yield']
-crop_names = set()
-
-# Iterate through expected agri_production columns to find unique crop names
-for col in expected_columns_for_agri_production:
-    # Skip non-crop specific columns that are not actual crops (e.g., identifiers, derived metrics)
-    if col in ['dist_code', 'year', 'fruits_vegetables_area']:
-        continue
-
-    found_suffix = False
-    for suffix in suffixes:
-        if col.endswith(suffix):
-            crop_name = col.replace(suffix, '')
-            if crop_name: # Ensure the crop name is not empty after stripping suffix
-                crop_names.add(crop_name)
-            found_suffix = True
-            break
-    # Handle cases for specific crops that might not follow the _area/_production/_yield pattern consistently
-    # or are explicitly named without a suffix in the CSV but represent a crop.
-    if not found_suffix:
-        if col == 'fruits_area':
-            crop_names.add('fruits')
-        elif col == 'vegetables_area':
-            crop_names.add('vegetables')
-        elif col == 'potatoes_area':
-            crop_names.add('potatoes')
-        elif col == 'onion_area':
-            crop_names.add('onion')
-        elif col == 'fodder_area':
-            crop_names.add('fodder')
-        elif col == 'oilseeds_area':
-            crop_names.add('oilseeds')
-        elif col == 'sugarcane_area':
-            crop_names.add('sugarcane')
-
-
-# Sort crop names for consistent insertion order
-sorted_crop_names = sorted(list(crop_names))
-
-# Insert unique crop names into the 'crops' table.
-# The 'crops' table is expected to be created by the SQL script.
-for crop in sorted_crop_names:
+        conn.rollback()
+        pipeline_metrics.record_error("agri_production bulk load", f"Error bulk-loading agri_production via LOAD DATA: {err}")
+        return 0, len(frame)
+
+    elapsed = time.perf_counter() - load_started
+    rows_per_sec = loaded_rows / elapsed if elapsed > 0 else 0.0
+    print(f"ℹ️ TSV write + LOAD DATA {load_seconds:.2f} s, index rebuild + {mode} {publish_seconds:.2f} s.")
+    print(f"ℹ️ Loaded {loaded_rows} rows in {elapsed:.2f} s ({rows_per_sec:,.0f} rows/sec).")
+    return loaded_rows, 0
+
+def load_agri_production_embedded(conn, frame, mode=None):
+    """Bulk-loads the production frame into the embedded database straight from the DataFrame; returns the rows loaded and failed."""
+    mode = LOAD_DATA_MODE if mode is None else mode
+    load_started = time.perf_counter()
     try:
-        cursor.execute("""
-            INSERT IGNORE INTO crops (crop_name) VALUES (%s)
-        """, (crop,))
+        # "swap" replaces the table's rows and "merge" keeps the existing ones; either
+        # way the change is one transaction, so readers never see a partial load.
+        loaded_rows = conn.load_frame('agri_production', frame[agri_production_columns],
+                                      replace=(mode == "swap"))
+        conn.commit()
     except mysql.connector.Error as err:
-        print(f"❌ Error inserting crop '{crop}': {err}")
-conn.commit()
-print("✅ Unique Crop Master Data Inserted.")
-
-# 📌 Stage 7.6: Insert Year Master Data
-# This stage extracts unique years from the DataFrame's 'year' column and
-# inserts them into the 'years' table. The 'years' table schema is defined
-# in the SQL script.
-print("\n--- Inserting Year Master Data ---")
-
-# Extract unique years from the DataFrame
-unique_years = df['year'].drop_duplicates().sort_values().tolist()
-
-# Insert unique years into the 'years' table.
-# The 'years' table is expected to be created by the SQL script.
-for year_val in unique_years:
+        conn.rollback()
+        pipeline_metrics.record_error("agri_production bulk load", f"Error bulk-loading agri_production into {DB_BACKEND}: {err}")
+        return 0, len(frame)
+    elapsed = time.perf_counter() - load_started
+    rows_per_sec = loaded_rows / elapsed if elapsed > 0 else 0.0
+    print(f"ℹ️ Loaded {loaded_rows} rows into {DB_BACKEND} ({mode}) in {elapsed:.2f} s ({rows_per_sec:,.0f} rows/sec).")
+    return loaded_rows, 0
+
+agri_production_upsert_sql = f"""
+    INSERT INTO agri_production ({', '.join(agri_production_columns)})
+    VALUES ({', '.join(['%s'] * len(agri_production_columns))})
+    ON DUPLICATE KEY UPDATE {', '.join(f'{col}=VALUES({col})' for col in agri_production_columns[2:])}
+"""
+
+def fingerprint_agri_rows(frame):
+    """Returns one uint64 hash per row over every column written to agri_production."""
+    # The values are hashed as they are written: NaN (NULL) hashes unlike 0, a
+    # district moved to another state changes only state_code, and a key column
+    # read as float (a chunk with a gap) must hash like the same key read as int.
+    written = frame[agri_production_columns].astype(
+        {'dist_code': 'int64', 'year': 'int64', 'state_code': 'int64'})
+    return pd.util.hash_pandas_object(written, index=False).to_numpy()
+
+def sync_agri_production_incremental(conn, cursor, frame, batch_size=None):
+    """Upserts only the rows whose fingerprint is new or changed since the last sync; returns the rows synced and failed."""
+    batch_size = INSERT_BATCH_SIZE if batch_size is None else batch_size
+    sync_started = time.perf_counter()
+    # The manifest table is defined in the SQL script (and added by the upgrade script).
+    # Only fetch the manifest slice this frame (or streamed chunk) can match.
+    cursor.execute("""
+        SELECT dist_code, year, row_hash FROM agri_production_manifest
+        WHERE dist_code BETWEEN %s AND %s
+    """, (int(frame['dist_code'].min()), int(frame['dist_code'].max())))
+    manifest = pd.DataFrame(cursor.fetchall(), columns=['dist_code', 'year', 'stored_hash'])
+
+    current = frame[['dist_code', 'year']].astype('int64')
+    current['row_hash'] = fingerprint_agri_rows(frame)
+    # The nullable UInt64 dtype keeps the 64-bit hashes exact through the left
+    # join (a plain uint64 column would be cast to float for the missing rows).
+    compared = current.merge(manifest.astype({'dist_code': 'int64', 'year': 'int64', 'stored_hash': 'UInt64'}),
+                             on=['dist_code', 'year'], how='left')
+    changed_mask = (compared['stored_hash'] != compared['row_hash']).fillna(True).to_numpy(dtype=bool)
+
+    changed = frame.loc[changed_mask]
+    delta_rows = sql_rows(changed[agri_production_columns])
+    manifest_rows = list(compared.loc[changed_mask, ['dist_code', 'year', 'row_hash']]
+                         .itertuples(index=False, name=None))
+    print(f"ℹ️ Incremental sync: {len(delta_rows)} new or changed rows, "
+          f"{len(frame) - len(delta_rows)} unchanged rows skipped.")
+    crop_ids = None
+    if LOAD_LONG_FORMAT and delta_rows:
+        cursor.execute("SELECT crop_name, crop_id FROM crops")
+        crop_ids = dict(cursor.fetchall())
+
+    synced_rows = 0
+    for batch_start in range(0, len(delta_rows), batch_size):
+        batch_end = batch_start + batch_size
+        try:
+            # The production rows (wide and long) and their fingerprints are committed
+            # together, so a failed batch is simply retried on the next run.
+            cursor.executemany(agri_production_upsert_sql, delta_rows[batch_start:batch_end])
+            if crop_ids is not None:
+                cursor.executemany(crop_production_upsert_sql,
+                                   sql_rows(melt_agri_production(changed.iloc[batch_start:batch_end], crop_ids)))
+            cursor.executemany("""
+                INSERT INTO agri_production_manifest (dist_code, year, row_hash)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE row_hash=VALUES(row_hash)
+            """, manifest_rows[batch_start:batch_end])
+            conn.commit()
+        except mysql.connector.Error as err:
+            conn.rollback()
+            pipeline_metrics.record_error(
+                "agri_production incremental sync",
+                f"Error syncing rows {batch_start}-{min(batch_end, len(delta_rows)) - 1}: {err}")
+            continue
+        synced_rows += len(delta_rows[batch_start:batch_end])
+
+    elapsed = time.perf_counter() - sync_started
+    print(f"ℹ️ Synced {synced_rows} rows in {elapsed:.2f} s.")
+    return synced_rows, len(delta_rows) - synced_rows
+
+def partition_agri_frame(frame, partition_by=None, partitions=None):
+    """Splits a production frame into (label, partition) pairs by state or by year range."""
+    partition_by = PARALLEL_PARTITION_BY if partition_by is None else partition_by
+    partitions = PARALLEL_WORKERS if partitions is None else partitions
+    if partition_by == "year":
+        year_ranges = np.array_split(np.sort(frame['year'].unique()), partitions)
+        return [(f"years {years[0]}-{years[-1]}", frame[frame['year'].between(years[0], years[-1])])
+                for years in year_ranges if len(years)]
+    return [(f"state_code {code}", partition) for code, partition in frame.groupby('state_code', sort=True)]
+
+def load_agri_partition(label, partition):
+    """Loads one partition on its own pooled connection and returns its throughput."""
+    partition_conn = pipeline_metrics.instrument_connection(agri_pool.get_connection())
     try:
-        cursor.execute("""
-            INSERT IGNORE INTO years (year) VALUES (%s)
-        """, (int(year_val),))
+        partition_cursor = partition_conn.cursor()
+        started = time.perf_counter()
+        sent_rows, failed_rows = insert_agri_production_serial(partition_conn, partition_cursor, partition)
+        elapsed = time.perf_counter() - started
+        partition_cursor.close()
+    finally:
+        partition_conn.close() # Returns the connection to the pool
+    return label, len(partition), sent_rows, failed_rows, elapsed
+
+def insert_agri_production_parallel(frame, checkpoint=None):
+    """Loads the partitions of a production frame concurrently through the connection pool."""
+    load_started = time.perf_counter()
+    partitions = partition_agri_frame(frame)
+    committed = []
+    if checkpoint is not None:
+        # Partitions finished by an earlier, interrupted run are not loaded again.
+        committed = list(checkpoint.step('ingest').get('partitions_committed', []))
+        partitions = [(label, partition) for label, partition in partitions if label not in committed]
+        if committed:
+            print(f"ℹ️ Resuming: {len(committed)} partitions were loaded before the interruption.")
+    committed_lock = threading.Lock()
+
+    def load_and_record(item):
+        result = load_agri_partition(*item)
+        if checkpoint is not None and result[3] == 0: # A partition with failed rows is loaded again on resume
+            with committed_lock:
+                committed.append(item[0])
+                checkpoint.update('ingest', partitions_committed=list(committed))
+        return result
+
+    # Threads are enough here: workers spend their time waiting on MySQL, and the
+    # connector releases the GIL during network I/O.
+    with ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as executor:
+        results = list(executor.map(load_and_record, partitions))
+    for label, rows, sent_rows, failed_rows, elapsed in results:
+        rows_per_sec = rows / elapsed if elapsed > 0 else 0.0
+        print(f"   Partition {label}: {rows} rows in {elapsed:.2f} s ({rows_per_sec:,.0f} rows/sec)"
+              + (f", {failed_rows} failed" if failed_rows else ""))
+    elapsed = time.perf_counter() - load_started
+    loaded_rows = sum(rows for _, rows, _, _, _ in results)
+    rows_per_sec = loaded_rows / elapsed if elapsed > 0 else 0.0
+    print(f"ℹ️ Parallel load: {len(partitions)} partitions on {PARALLEL_WORKERS} workers, "
+          f"{loaded_rows} rows in {elapsed:.2f} s ({rows_per_sec:,.0f} rows/sec).")
+    return sum(result[2] for result in results), sum(result[3] for result in results)
+
+def insert_agri_production(conn, cursor, frame, load_data_mode=None, checkpoint=None):
+    """Sends a production frame to MySQL, in parallel when a connection pool is available; returns the rows sent and failed."""
+    if agri_pool is not None:
+        return insert_agri_production_parallel(frame, checkpoint)
+    return insert_agri_production_serial(conn, cursor, frame, load_data_mode, checkpoint)
+
+def insert_agri_production_serial(conn, cursor, frame, load_data_mode=None, checkpoint=None):
+    """Sends a production frame to MySQL through the engine chosen by INGEST_ENGINE; returns the rows sent and failed."""
+    load_data_mode = LOAD_DATA_MODE if load_data_mode is None else load_data_mode
+    if INGEST_ENGINE == "incremental":
+        return sync_agri_production_incremental(conn, cursor, frame)
+    elif INGEST_ENGINE == "load_data" and DB_BACKEND != "mysql":
+        return load_agri_production_embedded(conn, frame, mode=load_data_mode)
+    elif INGEST_ENGINE == "load_data":
+        return load_agri_production_infile(conn, cursor, frame, mode=load_data_mode)
+    elif INGEST_ENGINE == "batched" and checkpoint is not None:
+        # Rows up to the last batch committed by an earlier, interrupted run are skipped
+        # (a batch committed just before the checkpoint was written is INSERT IGNOREd again).
+        rows_committed = checkpoint.step('ingest').get('rows_committed', 0)
+        if rows_committed:
+            print(f"ℹ️ Resuming after row {rows_committed}, the last batch committed before the interruption.")
+        return insert_agri_production_batched(
+            conn, cursor, frame.iloc[rows_committed:],
+            on_commit=lambda rows: checkpoint.update('ingest', rows_committed=rows_committed + rows))
+    elif INGEST_ENGINE == "batched":
+        return insert_agri_production_batched(conn, cursor, frame)
+    return insert_agri_production_rows(conn, cursor, frame)
+
+# Long-format fact table: the wide frame is melted into one row per
+# (dist_code, year, crop) with area/production/yield columns. Crops that only
+# have an area column (fruits, vegetables, potatoes, onion, fodder) get NULL
+# production and yield. 'fruits_vegetables_area' is not a crop and is left out.
+long_format_source_columns = [col for col in agri_measure_columns if col != 'fruits_vegetables_area']
+crop_production_upsert_sql = """
+    INSERT INTO crop_production (dist_code, year, crop_id, area, production, yield)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE area=VALUES(area), production=VALUES(production), yield=VALUES(yield)
+"""
+
+def long_format_after_load():
+    """Returns whether crop_production is written after agri_production (the incremental engine writes its own crop rows)."""
+    return LOAD_LONG_FORMAT and INGEST_ENGINE != "incremental"
+
+def melt_agri_production(frame, crop_ids):
+    """Converts a wide production frame into (dist_code, year, crop_id, area, production, yield) rows."""
+    measures = frame[long_format_source_columns].copy() # Missing stays NaN, stored as NULL
+    measures.columns = pd.MultiIndex.from_tuples(
+        [tuple(col.rsplit('_', 1)) for col in long_format_source_columns], names=['crop_name', 'measure'])
+    measures.index = pd.MultiIndex.from_frame(frame[['dist_code', 'year']])
+    long_frame = measures.stack('crop_name').reset_index()
+    long_frame['crop_id'] = long_frame['crop_name'].map(crop_ids)
+    return long_frame[['dist_code', 'year', 'crop_id', 'area', 'production', 'yield']]
+
+def insert_crop_production(conn, cursor, frame, crop_ids, batch_size=None):
+    """Upserts the long-format rows of a wide production frame into 'crop_production'."""
+    batch_size = INSERT_BATCH_SIZE if batch_size is None else batch_size
+    load_started = time.perf_counter()
+    long_frame = melt_agri_production(frame, crop_ids)
+    # NaN -> None so missing figures and area-only crops are stored as NULL.
+    rows = sql_rows(long_frame)
+    inserted_rows = 0
+    for batch_start in range(0, len(rows), batch_size):
+        batch = rows[batch_start:batch_start + batch_size]
+        try:
+            cursor.executemany(crop_production_upsert_sql, batch)
+            conn.commit()
+        except mysql.connector.Error as err:
+            conn.rollback()
+            pipeline_metrics.record_error(
+                "crop_production batch insert",
+                f"Error inserting long-format rows {batch_start}-{batch_start + len(batch) - 1}: {err}")
+            continue
+        inserted_rows += len(batch)
+    elapsed = time.perf_counter() - load_started
+    print(f"ℹ️ Long format: {inserted_rows} crop rows from {len(frame)} district-years in {elapsed:.2f} s.")
+    return inserted_rows
+
+# Rollup cubes: the district x crop cube totals each district over all years and
+# the state x year x crop cube each state-year. A district x year x crop cube
+# would hold one row per district-year and crop, i.e. the fact table again, so
+# the per-year district queries read agri_production (or the growth indexes).
+# Cubes built from separate chunks combine by sums of sums, mins of mins and
+# maxes of maxes, so streaming folds each chunk into one running pair of cubes.
+rollup_reducers = ['sum', 'min', 'max']
+district_cube_keys = ['state_code', 'state_name', 'dist_code', 'dist_name']
+state_cube_keys = ['state_code', 'state_name', 'year']
+rollup_cube_keys = {'district_crop': district_cube_keys, 'state_year_crop': state_cube_keys}
+
+def rollup_cube_columns():
+    """Returns the measure column names of a cube, e.g. 'production_sum', 'yield_max'."""
+    return [f"{measure}_{reducer}" for measure in ['area', 'production', 'yield'] for reducer in rollup_reducers]
+
+def reaggregate_cube(cube, keys):
+    """Rolls a cube up to coarser keys, combining each measure with its own reducer."""
+    grouped = cube.groupby(keys + ['crop_name'], sort=True)
+    reduced = {'district_years': grouped['district_years'].sum()} # Same column order as aggregate_cube()
+    for col in [col for col in rollup_cube_columns() if col in cube.columns]:
+        reducer = col.rsplit('_', 1)[1]
+        # min_count=1: a sum over missing values only stays missing, as in aggregate_cube().
+        reduced[col] = grouped[col].sum(min_count=1) if reducer == 'sum' else grouped[col].agg(reducer)
+    return pd.DataFrame(reduced).reset_index()
+
+def aggregate_cube(frame, keys):
+    """Aggregates a wide production frame or chunk into a keys x crop cube."""
+    grouped = frame.groupby(keys, sort=False)
+    aggregated = grouped[long_format_source_columns].agg(rollup_reducers)
+    # (rice_production, sum) -> crop 'rice', column 'production_sum'
+    aggregated.columns = pd.MultiIndex.from_tuples(
+        [(col.rsplit('_', 1)[0], f"{col.rsplit('_', 1)[1]}_{reducer}") for col, reducer in aggregated.columns],
+        names=['crop_name', None])
+    cube = aggregated.stack('crop_name').reset_index()
+    cube = cube.merge(grouped.size().rename('district_years').reset_index(), on=keys)
+    return cube[keys + ['crop_name', 'district_years'] + [col for col in rollup_cube_columns() if col in cube.columns]]
+
+def build_rollup_cubes(frame):
+    """Builds the district x crop and state x year x crop cubes from a wide production frame or chunk."""
+    return {cube_name: aggregate_cube(frame, keys) for cube_name, keys in rollup_cube_keys.items()}
+
+def combine_rollup_cubes(partial_cubes):
+    """Merges the cubes built from separate chunks into one pair of cubes."""
+    return {cube_name: reaggregate_cube(pd.concat([cubes[cube_name] for cubes in partial_cubes], ignore_index=True), keys)
+            for cube_name, keys in rollup_cube_keys.items()}
+
+def fold_rollup_cubes(rollup_cubes, chunk):
+    """Adds a chunk to the running cubes of a streamed load (None before the first chunk)."""
+    chunk_cubes = build_rollup_cubes(chunk)
+    return chunk_cubes if rollup_cubes is None else combine_rollup_cubes([rollup_cubes, chunk_cubes])
+
+def publish_data_version(conn, cursor):
+    """Bumps the data version after a committed load, so cached query results of older data are not served."""
+    try:
+        return agri_queries.bump_data_version(conn, cursor)
+    except (mysql.connector.Error, LookupError) as err:
+        conn.rollback()
+        print(f"❌ Error bumping the data version: {err}")
+        return None
+
+def stream_agri_production(conn, cursor, chunks, master_ids=None, checkpoint=None):
+    """Loads each cleaned chunk (Stages 4-5.5 applied); returns the visualization columns, master ids, rollup cubes and failed rows."""
+    visualization_chunks = []
+    rollup_cubes = None
+    total_rows = 0
+    failed_rows = 0
+    chunks_committed = checkpoint.step('ingest').get('chunks_committed', 0) if checkpoint is not None else 0
+    if chunks_committed:
+        print(f"ℹ️ Resuming after chunk {chunks_committed}, the last chunk committed before the interruption.")
+    for chunk_number, chunk in enumerate(chunks, start=1):
+        # Only the first chunk queries the master tables; later chunks reuse the maps.
+        master_ids = sync_master_data(conn, cursor, chunk, master_ids)
+        # Chunks loaded by an earlier, interrupted run still feed the charts and cubes.
+        visualization_chunks.append(chunk[visualization_columns])
+        if BUILD_ROLLUP_CUBES:
+            rollup_cubes = fold_rollup_cubes(rollup_cubes, chunk)
+        total_rows += len(chunk)
+        if chunk_number <= chunks_committed:
+            print(f"   Chunk {chunk_number}: {len(chunk)} rows already loaded ({total_rows} so far).")
+            continue
+        failed_rows += insert_agri_production(conn, cursor, chunk, load_data_mode="merge")[1]
+        if long_format_after_load():
+            insert_crop_production(conn, cursor, chunk, master_ids['crops'])
+        publish_data_version(conn, cursor)
+        # The checkpoint stops before the first chunk with failed rows, so a resume loads it again.
+        if checkpoint is not None and not failed_rows:
+            checkpoint.update('ingest', chunks_committed=chunk_number)
+        print(f"   Chunk {chunk_number}: {len(chunk)} rows loaded ({total_rows} so far).")
+    if not visualization_chunks:
+        return pd.DataFrame(columns=visualization_columns), master_ids, None, failed_rows
+    return pd.concat(visualization_chunks, ignore_index=True), master_ids, rollup_cubes, failed_rows
+
+# Pipelined streaming load (PIPELINED_INGEST): the work of stream_agri_production()
+# spread over the parse, transform and write stages of Project2_Agri_India_ingest.py.
+# The transform thread turns each chunk into a master-data item followed by its
+# row items. Every row item waits until its chunk's master rows are committed
+# (agri_production references district_master), which matters once several
+# writers take items concurrently. A chunk counts as committed (checkpoint and
+# data version) once it and every chunk before it have been written without
+# failed rows; the checkpoint never moves past a chunk with failed rows.
+def pipelined_writer_count():
+    """Returns the writer threads of a pipelined load: one for embedded databases and for "load_data"."""
+    if DB_BACKEND != "mysql" or INGEST_ENGINE == "load_data":
+        return 1
+    return max(INGEST_WRITERS, 1)
+
+def stream_agri_production_pipelined(conn, cursor, chunks, master_ids=None, checkpoint=None):
+    """Loads the cleaned chunks through the pipelined ingest; returns the visualization columns, master ids, rollup cubes and failed rows."""
+    visualization_chunks = []
+    synced = {'master_ids': master_ids, 'rollup_cubes': None}
+    masters_lock = threading.Lock()
+    progress_lock = threading.Lock()
+    pending_items = {} # chunk number -> write items not done yet
+    failed_chunks = set()
+    progress = {'chunks_committed': checkpoint.step('ingest').get('chunks_committed', 0) if checkpoint is not None else 0,
+                'failed_rows': 0}
+    if progress['chunks_committed']:
+        print(f"ℹ️ Resuming after chunk {progress['chunks_committed']}, the last chunk committed before the interruption.")
+    chunk_numbers = itertools.count(1)
+
+    def transform(chunk):
+        chunk_number = next(chunk_numbers)
+        # Chunks loaded by an earlier, interrupted run still feed the charts and cubes.
+        visualization_chunks.append(chunk[visualization_columns])
+        if BUILD_ROLLUP_CUBES:
+            synced['rollup_cubes'] = fold_rollup_cubes(synced['rollup_cubes'], chunk)
+        masters_synced = threading.Event()
+        items = [('masters', chunk_number, chunk, masters_synced)]
+        if chunk_number <= progress['chunks_committed']:
+            return items
+        if INGEST_ENGINE == "batched":
+            rows = sql_rows(chunk[agri_production_columns])
+            items += [('rows', chunk_number, rows[batch_start:batch_start + INSERT_BATCH_SIZE], masters_synced)
+                      for batch_start in range(0, len(rows), INSERT_BATCH_SIZE)]
+        else:
+            items.append(('chunk', chunk_number, chunk, masters_synced))
+        if long_format_after_load():
+            items.append(('long_format', chunk_number, chunk, masters_synced))
+        with progress_lock:
+            pending_items[chunk_number] = len(items)
+        return items
+
+    def write(item, writer):
+        kind, chunk_number, payload, masters_synced = item
+        writer_conn, writer_cursor = writer
+        written_rows, failed_rows = 0, 0
+        if kind == 'masters':
+            try:
+                with masters_lock:
+                    synced['master_ids'] = sync_master_data(writer_conn, writer_cursor, payload, synced['master_ids'])
+            finally:
+                masters_synced.set() # Even after an error, so the chunk's row items do not wait forever
+        else:
+            masters_synced.wait()
+            if kind == 'rows':
+                try:
+                    writer_cursor.executemany(agri_production_insert_sql, payload)
+                    writer_conn.commit()
+                    written_rows = len(payload)
+                except mysql.connector.Error as err:
+                    writer_conn.rollback()
+                    failed_rows = len(payload)
+                    pipeline_metrics.record_error(
+                        "agri_production batch insert",
+                        f"Error inserting a batch of chunk {chunk_number} ({len(payload)} rows): {err}")
+            elif kind == 'chunk':
+                written_rows, failed_rows = insert_agri_production_serial(
+                    writer_conn, writer_cursor, payload, load_data_mode="merge")
+            else:
+                insert_crop_production(writer_conn, writer_cursor, payload, synced['master_ids']['crops'])
+        finish_item(chunk_number, failed_rows, writer_conn, writer_cursor)
+        return written_rows
+
+    def finish_item(chunk_number, failed_rows, writer_conn, writer_cursor):
+        with progress_lock:
+            if chunk_number not in pending_items:
+                return # A chunk loaded before the interruption
+            pending_items[chunk_number] -= 1
+            if failed_rows:
+                progress['failed_rows'] += failed_rows
+                failed_chunks.add(chunk_number)
+            first_new_chunk = progress['chunks_committed'] + 1
+            while (pending_items.get(progress['chunks_committed'] + 1) == 0
+                   and progress['chunks_committed'] + 1 not in failed_chunks):
+                progress['chunks_committed'] += 1
+                del pending_items[progress['chunks_committed']]
+            chunks_committed = progress['chunks_committed']
+            if chunks_committed >= first_new_chunk and checkpoint is not None:
+                checkpoint.update('ingest', chunks_committed=chunks_committed)
+        if chunks_committed >= first_new_chunk:
+            publish_data_version(writer_conn, writer_cursor)
+            committed_label = f"Chunk {chunks_committed}" if chunks_committed == first_new_chunk else f"Chunks {first_new_chunk}-{chunks_committed}"
+            print(f"   {committed_label} committed.")
+
+    def open_writer(index):
+        # A single writer takes over the Stage 6 connection, which this thread
+        # leaves alone until the pipeline is done; more writers use the pool.
+        writer_conn = conn if agri_pool is None else pipeline_metrics.instrument_connection(agri_pool.get_connection())
+        return writer_conn, writer_conn.cursor()
+
+    def close_writer(writer):
+        writer_conn, writer_cursor = writer
+        writer_cursor.close()
+        if writer_conn is not conn:
+            writer_conn.close() # Returns the connection to the pool
+
+    figures = agri_ingest.run_ingest_pipeline(chunks, transform, write, writers=pipelined_writer_count(),
+                                              queue_size=INGEST_QUEUE_SIZE,
+                                              open_writer=open_writer, close_writer=close_writer)
+    agri_ingest.report_ingest_pipeline(figures)
+    pipeline_metrics.write_log_line({'event': 'ingest_pipeline', **figures})
+    if not visualization_chunks:
+        return pd.DataFrame(columns=visualization_columns), synced['master_ids'], None, progress['failed_rows']
+    return (pd.concat(visualization_chunks, ignore_index=True), synced['master_ids'], synced['rollup_cubes'],
+            progress['failed_rows'])
+
+def ingest_plan():
+    """Returns the settings an ingest checkpoint's offsets depend on; one made under other settings is not resumed."""
+    return {
+        'engine': INGEST_ENGINE,
+        'chunk_size': CSV_CHUNK_SIZE,
+        'partition_by': PARALLEL_PARTITION_BY if agri_pool is not None else None
+    }
+
+def ingest_step(state):
+    """Loads agri_production (plus crop_production and the rollup cubes), resuming an interrupted ingest."""
+    conn, cursor, checkpoint = state['conn'], state['cursor'], state['checkpoint']
+    print("\n--- Inserting Agricultural Production Data ---")
+    progress = checkpoint.step('ingest')
+    if state['resume'] and progress.get('plan') == ingest_plan() and not progress.get('completed', True):
+        print(f"ℹ️ An ingest of this CSV was interrupted (last checkpoint {progress['updated_at']}); resuming it.")
+    else:
+        checkpoint.reset('ingest', plan=ingest_plan(), completed=False)
+
+    if not state['streaming']:
+        if PIPELINED_INGEST:
+            print("ℹ️ PIPELINED_INGEST needs CSV_CHUNK_SIZE (the pipeline overlaps chunks); loading in one pass.")
+        df = state['df']
+        with pipeline_metrics.stage("load_production", rows_in=len(df)) as stage:
+            stage.rows_out, failed_rows = insert_agri_production(conn, cursor, df, checkpoint=checkpoint)
+            if long_format_after_load():
+                insert_crop_production(conn, cursor, df, state['master_ids']['crops'])
+            if BUILD_ROLLUP_CUBES:
+                state['rollup_cubes'] = build_rollup_cubes(df)
+            data_version = publish_data_version(conn, cursor)
+        print(f"✅ Agricultural Production Data Inserted (data version {data_version}).")
+    else:
+        # Reading, cleaning and validating the chunks happens inside this stage.
+        stream = stream_agri_production_pipelined if PIPELINED_INGEST else stream_agri_production
+        with pipeline_metrics.stage("stream_production") as stage:
+            state['df'], state['master_ids'], state['rollup_cubes'], failed_rows = stream(
+                conn, cursor, state['csv_chunks'], state['master_ids'], checkpoint)
+            stage.rows_out = len(state['df'])
+        print("✅ Agricultural Production Data Inserted.")
+        if state['validation_state'] is not None:
+            report_validation(state['validation_state'])
+    state['ingest_failed_rows'] = failed_rows
+    if failed_rows:
+        # The checkpoint stays incomplete and stops before the first failed row,
+        # so rerunning the step sends the failed rows again (and INSERT IGNOREs the rest).
+        print(f"❌ {failed_rows} rows could not be loaded into agri_production. "
+              f"Rerun the 'ingest' step to retry them.")
+        raise PipelineStepError(f"{failed_rows} agri_production rows failed to load.")
+    checkpoint.update('ingest', completed=True, rows=len(state['df']))
+
+# 📌 Stage 8.6: Benchmark Wide vs Long-Format Layouts (Optional)
+# Runs each of the 11 Stage 4 analytical queries from the SQL script against the
+# wide 'agri_production' table and its long-format 'crop_production' equivalent,
+# printing the best of RUN_LAYOUT_BENCHMARK_REPEATS timings for each.
+# The queries are rendered from the named templates of Project2_Agri_India_queries.py
+# with their default parameters, which are the SQL script's queries.
+analytical_queries = {name: agri_queries.render_named_query(name, agri_measure_columns)[0]
+                      for name in agri_queries.named_queries}
+
+# The same 11 queries against 'crop_production': each reads only the rows of the
+# crops it needs, found through the crop_id-leading primary key.
+long_format_queries = {
+    "1. Year-wise rice production": """
+        SELECT cp.year, SUM(cp.production) AS total_rice_production
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        WHERE c.crop_name = 'rice'
+        GROUP BY cp.year
+        ORDER BY cp.year""",
+    "2. Top wheat yield increase districts": """
+        SELECT dm.dist_name,
+               (MAX(CASE WHEN cp.year = 2020 THEN cp.yield END) - MAX(CASE WHEN cp.year = 2015 THEN cp.yield END)) AS yield_increase
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        WHERE c.crop_name = 'wheat' AND cp.year IN (2015, 2020)
+        GROUP BY dm.dist_name
+        HAVING yield_increase IS NOT NULL
+        ORDER BY yield_increase DESC
+        LIMIT 5""",
+    "3. Oilseed growth by state": """
+        SELECT sm.state_name,
+               (SUM(CASE WHEN cp.year = 2020 THEN cp.production END) - SUM(CASE WHEN cp.year = 2015 THEN cp.production END)) AS growth
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        JOIN state_master sm ON dm.state_code = sm.state_code
+        WHERE c.crop_name = 'oilseeds' AND cp.year IN (2015, 2020)
+        GROUP BY sm.state_name
+        HAVING growth IS NOT NULL
+        ORDER BY growth DESC
+        LIMIT 5""",
+    "4. Year and state-wise rice production": """
+        SELECT cp.year, sm.state_name, SUM(cp.production) AS total_rice_production
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        JOIN state_master sm ON dm.state_code = sm.state_code
+        WHERE c.crop_name = 'rice'
+        GROUP BY cp.year, sm.state_name
+        ORDER BY cp.year, total_rice_production DESC""",
+    "5. District rice/wheat/maize area vs production": """
+        SELECT dm.dist_name,
+               SUM(CASE WHEN c.crop_name = 'rice' THEN cp.area END) AS rice_area,
+               SUM(CASE WHEN c.crop_name = 'rice' THEN cp.production END) AS rice_prod,
+               SUM(CASE WHEN c.crop_name = 'wheat' THEN cp.area END) AS wheat_area,
+               SUM(CASE WHEN c.crop_name = 'wheat' THEN cp.production END) AS wheat_prod,
+               SUM(CASE WHEN c.crop_name = 'maize' THEN cp.area END) AS maize_area,
+               SUM(CASE WHEN c.crop_name = 'maize' THEN cp.production END) AS maize_prod
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        WHERE c.crop_name IN ('rice', 'wheat', 'maize')
+        GROUP BY dm.dist_name
+        ORDER BY rice_prod DESC""",
+    "6. Yearly cotton production by state": """
+        SELECT cp.year, sm.state_name, SUM(cp.production) AS cotton_prod
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        JOIN state_master sm ON dm.state_code = sm.state_code
+        WHERE c.crop_name = 'cotton'
+        GROUP BY cp.year, sm.state_name
+        ORDER BY cp.year, cotton_prod DESC
+        LIMIT 5""",
+    "7. Top groundnut districts (2020)": """
+        SELECT dm.dist_name, cp.production AS groundnut_production
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        WHERE c.crop_name = 'groundnut' AND cp.year = 2020
+        ORDER BY cp.production DESC
+        LIMIT 5""",
+    "8. Average maize yield by year": """
+        SELECT cp.year, AVG(cp.yield) AS avg_maize_yield
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        WHERE c.crop_name = 'maize'
+        GROUP BY cp.year
+        ORDER BY cp.year""",
+    "9. Oilseed area by state": """
+        SELECT sm.state_name, SUM(cp.area) AS total_oilseed_area
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        JOIN state_master sm ON dm.state_code = sm.state_code
+        WHERE c.crop_name = 'oilseeds'
+        GROUP BY sm.state_name
+        ORDER BY total_oilseed_area DESC""",
+    "10. Top rice yield districts": """
+        SELECT dm.dist_name, MAX(cp.yield) AS max_rice_yield
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        WHERE c.crop_name = 'rice'
+        GROUP BY dm.dist_name
+        ORDER BY max_rice_yield DESC
+        LIMIT 10""",
+    "11. Maize yield growth by state (2010-2020)": """
+        SELECT sm.state_name,
+               SUM(CASE WHEN cp.year=2010 THEN cp.yield ELSE 0 END) AS maize_yield_2010,
+               SUM(CASE WHEN cp.year=2020 THEN cp.yield ELSE 0 END) AS maize_yield_2020,
+               (SUM(CASE WHEN cp.year=2020 THEN cp.yield ELSE 0 END) - SUM(CASE WHEN cp.year=2010 THEN cp.yield ELSE 0 END)) AS yield_growth
+        FROM crop_production cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN district_master dm ON cp.dist_code = dm.dist_code
+        JOIN state_master sm ON dm.state_code = sm.state_code
+        WHERE c.crop_name = 'maize' AND cp.year BETWEEN 2010 AND 2020
+        GROUP BY sm.state_name
+        ORDER BY yield_growth DESC"""
+}
+RUN_LAYOUT_BENCHMARK_REPEATS = 3
+
+def time_query(cursor, sql, repeats=None):
+    """Runs a query several times and returns the best wall time in milliseconds."""
+    repeats = RUN_LAYOUT_BENCHMARK_REPEATS if repeats is None else repeats
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+def benchmark_layouts(cursor):
+    """Prints wide vs long-format timings for the 11 Stage 4 analytical queries."""
+    print(f"{'Query':<50} {'Wide (ms)':>10} {'Long (ms)':>10} {'Speed-up':>9}")
+    for name, wide_sql in analytical_queries.items():
+        try:
+            wide_ms = time_query(cursor, wide_sql)
+            long_ms = time_query(cursor, long_format_queries[name])
+        except mysql.connector.Error as err:
+            print(f"❌ Error benchmarking '{name}': {err}")
+            continue
+        speed_up = wide_ms / long_ms if long_ms > 0 else float('inf')
+        print(f"{name:<50} {wide_ms:>10.2f} {long_ms:>10.2f} {speed_up:>8.1f}x")
+
+def layout_benchmark_step(state):
+    """Runs the layout benchmark when RUN_LAYOUT_BENCHMARK is set."""
+    if not RUN_LAYOUT_BENCHMARK:
+        return
+    print("\n--- Benchmarking Wide vs Long-Format Layouts ---")
+    with pipeline_metrics.stage("layout_benchmark"):
+        benchmark_layouts(state['cursor'])
+
+# 📌 Stage 8.7: Persist Rollup Cubes
+# Replaces the contents of the MySQL rollup tables (defined in the SQL script) in
+# one transaction, so readers see either the previous cube or the new one, and
+# writes each cube to ROLLUP_CACHE_DIR as Parquet for the charts and notebooks.
+# The cubes are bulk-loaded like the fact table's "load_data" engine: LOAD DATA
+# LOCAL INFILE on MySQL, the DataFrame itself on the embedded backends.
+def save_rollup_cube(conn, cursor, table_name, cube):
+    """Replaces a MySQL rollup table with the rows of a cube."""
+    try:
+        if DB_BACKEND != "mysql":
+            loaded_rows = conn.load_frame(table_name, cube, replace=True)
+        else:
+            cursor.execute(f"DELETE FROM {table_name}")
+            loaded_rows = load_data_infile(cursor, table_name, cube)
+        conn.commit()
     except mysql.connector.Error as err:
-        print(f"❌ Error inserting year '{year_val}': {err}")
-conn.commit()
-print("✅ Unique Year Master Data Inserted.")
+        conn.rollback()
+        print(f"❌ Error saving rollup table {table_name}: {err}")
+        return
+    print(f"   {table_name}: {loaded_rows} rows.")
 
+def save_rollup_cubes_step(state):
+    """Saves the rollup cubes built by the ingest step, if any, to MySQL and Parquet."""
+    rollup_cubes = state['rollup_cubes']
+    if rollup_cubes is None:
+        return
+    print("\n--- Saving Rollup Cubes ---")
+    with pipeline_metrics.stage("save_rollup_cubes", rows_in=sum(len(cube) for cube in rollup_cubes.values())):
+        for cube_name, cube in rollup_cubes.items():
+            save_rollup_cube(state['conn'], state['cursor'], f"{cube_name}_rollup", cube)
+        try:
+            os.makedirs(ROLLUP_CACHE_DIR, exist_ok=True)
+            for cube_name, cube in rollup_cubes.items():
+                cube.to_parquet(os.path.join(ROLLUP_CACHE_DIR, f"{cube_name}.parquet"), index=False)
+            print(f"✅ Rollup Cubes Saved to MySQL and {ROLLUP_CACHE_DIR}.")
+        except ImportError as err:
+            # pandas needs pyarrow (or fastparquet) for Parquet; the MySQL copy is still saved.
+            print(f"⚠️ Parquet cache skipped: {err}")
+
+# 📌 Stage 8.8: Run the Analytical Queries Through the Result Cache (Optional)
+# Runs each named query twice: the first run reads the database and the second is
+# answered from the cache, as a dashboard's repeat request would be.
+def run_analytical_queries(conn):
+    """Runs every named query cold and cached, then prints the cache metrics."""
+    query_layer = agri_queries.AnalyticalQueryLayer(
+        conn, agri_measure_columns,
+        agri_queries.QueryResultCache(QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS),
+        version_check_seconds=QUERY_VERSION_CHECK_SECONDS)
+    print(f"{'Query':<50} {'Rows':>6} {'Cold (ms)':>10} {'Cached (ms)':>12}")
+    for name in agri_queries.named_queries:
+        try:
+            started = time.perf_counter()
+            result = query_layer.run(name)
+            cold_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            query_layer.run(name)
+            cached_ms = (time.perf_counter() - started) * 1000
+        except mysql.connector.Error as err:
+            print(f"❌ Error running '{name}': {err}")
+            continue
+        print(f"{name:<50} {len(result):>6} {cold_ms:>10.2f} {cached_ms:>12.2f}")
+    stats = query_layer.cache.stats()
+    print(f"ℹ️ Query cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_ratio']:.0%} hit ratio), "
+          f"{stats['entries']} entries, {stats['evictions']} evictions, {stats['expired']} expired, "
+          f"data version {query_layer.data_version}.")
+
+def analytical_queries_step(state):
+    """Runs the named queries through the result cache when RUN_ANALYTICAL_QUERIES is set."""
+    if not RUN_ANALYTICAL_QUERIES:
+        return
+    print("\n--- Running Analytical Queries ---")
+    with pipeline_metrics.stage("analytical_queries"):
+        run_analytical_queries(state['conn'])
+
+# 📌 Stage 8.9: Benchmark the Index Plan (Optional)
+# "Before" drops the secondary indexes of agri_production (as listed in the SQL
+# script) and runs the 11 queries as written before state_code was copied into
+# agri_production, joining state_master through district_master. "After" creates
+# the indexes again and runs the current queries. Each phase records the EXPLAIN
+# plan and the best of RUN_LAYOUT_BENCHMARK_REPEATS timings per query.
+def legacy_state_join(sql):
+    """Rewrites a query's state_master join to go through district_master again."""
+    return sql.replace("JOIN state_master sm ON ap.state_code = sm.state_code",
+                       "JOIN district_master dm ON ap.dist_code = dm.dist_code\n"
+                       "        JOIN state_master sm ON dm.state_code = sm.state_code")
+
+def explain_query(cursor, sql):
+    """Returns a query's EXPLAIN output as rows of strings."""
+    cursor.execute(f"EXPLAIN {sql}")
+    return [[str(value) for value in row] for row in cursor.fetchall()]
+
+def profile_queries(cursor, queries):
+    """Returns {name: {'latency_ms': ..., 'plan': [...]}} for a dict of queries."""
+    profile = {}
+    for name, sql in queries.items():
+        try:
+            profile[name] = {'latency_ms': time_query(cursor, sql), 'plan': explain_query(cursor, sql)}
+        except mysql.connector.Error as err:
+            print(f"❌ Error benchmarking '{name}': {err}")
+    return profile
+
+def benchmark_index_plan(conn, cursor):
+    """Profiles the 11 analytical queries without and with the index plan and writes the results to INDEX_BENCHMARK_PATH."""
+    index_plan = agri_embedded.read_secondary_indexes(
+        agri_embedded.read_schema_statements(SQL_SCRIPT_PATH), 'agri_production')
+    for index_name in index_plan:
+        try:
+            cursor.execute(f"DROP INDEX {index_name} ON agri_production")
+        except mysql.connector.Error:
+            pass # Not there yet, e.g. on a database that predates the index plan
+    conn.commit()
+    before = profile_queries(cursor, {name: legacy_state_join(sql) for name, sql in analytical_queries.items()})
 
-# 📌 Stage 8: Insert Agricultural Production Data
-# This stage inserts the main agricultural production data into the 'agri_production' table.
-# The column order and data types are critical here and must match the
-# 'agri_production' table definition in the SQL script.
-# 'INSERT IGNORE' is used to skip rows that would cause duplicate primary key errors.
-# 'fillna(0)' is applied to replace any NaN (Not a Number) values with 0,
-# ensuring compatibility with numerical FLOAT columns in the database.
-print("\n--- Inserting Agricultural Production Data ---")
-for index, row in df.iterrows():
     try:
-        # Convert row to tuple, handling NaN values by filling with 0.
-        # The order of values in the tuple must exactly match the column order
-        # in the INSERT statement and the 'expected_columns_for_agri_production' list.
-        values_to_insert = tuple(row.fillna(0).values)
-        cursor.execute("""
-            INSERT IGNORE INTO agri_production (
-                dist_code, year, rice_area, rice_production, rice_yield, wheat_area, wheat_production, wheat_yield,
-                sorghum_area, sorghum_production, sorghum_yield, pearlmillet_area, pearlmillet_production, pearlmillet_yield,
-                maize_area, maize_production, maize_yield, fingermillet_area, fingermillet_production, fingermillet_yield,
-                barley_area, barley_production, barley_yield, chickpea_area, chickpea_production, chickpea_yield,
-                pigeonpea_area, pigeonpea_production, pigeonpea_yield, groundnut_area, groundnut_production, groundnut_yield,
-                sesamum_area, sesamum_production, sesamum_yield, rapeseed_area, rapeseed_production, rapeseed_yield,
-                mustard_area, mustard_production, mustard_yield, safflower_area, safflower_production, safflower_yield,
-                castor_area, castor_production, castor_yield, linseed_area, linseed_production, linseed_yield,
-                sunflower_area, sunflower_production, sunflower_yield, soybean_area, soybean_production, soybean_yield,
-                cotton_area, cotton_production, cotton_yield, oilseeds_area, oilseeds_production, oilseeds_yield,
-                sugarcane_area, sugarcane_production, sugarcane_yield, fruits_area, vegetables_area, fruits_vegetables_area,
-                potatoes_area, onion_area, fodder_area
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, values_to_insert)
+        for index_name, columns in index_plan.items():
+            cursor.execute(f"CREATE INDEX {index_name} ON agri_production ({columns})")
+        conn.commit()
     except mysql.connector.Error as err:
-        print(f"❌ Error inserting row {index} (dist_code: {row['dist_code']}, year: {row['year']}): {err}")
-        # Optionally, you can break here or log the error more comprehensively
-        # For now, it will continue to try inserting other rows.
-conn.commit()
-print("✅ Agricultural Production Data Inserted.")
+        conn.rollback()
+        print(f"❌ Error creating the agri_production indexes: {err}")
+        return
+    after = profile_queries(cursor, analytical_queries)
+
+    print(f"{'Query':<50} {'Before (ms)':>12} {'After (ms)':>11} {'Speed-up':>9}")
+    for name in analytical_queries:
+        if name in before and name in after:
+            before_ms, after_ms = before[name]['latency_ms'], after[name]['latency_ms']
+            speed_up = before_ms / after_ms if after_ms > 0 else float('inf')
+            print(f"{name:<50} {before_ms:>12.2f} {after_ms:>11.2f} {speed_up:>8.1f}x")
+
+    cursor.execute("SELECT COUNT(*) FROM agri_production")
+    row_count = cursor.fetchall()[0][0]
+    results = {
+        'backend': DB_BACKEND,
+        'agri_production_rows': int(row_count),
+        'indexes': index_plan,
+        'queries': {name: {'before': before.get(name), 'after': after.get(name)} for name in analytical_queries},
+    }
+    os.makedirs(os.path.dirname(INDEX_BENCHMARK_PATH), exist_ok=True)
+    with open(INDEX_BENCHMARK_PATH, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"✅ Index benchmark written to {INDEX_BENCHMARK_PATH}.")
+
+def index_benchmark_step(state):
+    """Benchmarks the index plan when RUN_INDEX_BENCHMARK is set."""
+    if not RUN_INDEX_BENCHMARK:
+        return
+    print("\n--- Benchmarking the Index Plan ---")
+    with pipeline_metrics.stage("index_benchmark"):
+        benchmark_index_plan(state['conn'], state['cursor'])
 
 # 📌 Stage 9: Close Database Connection
 # It's important to close the database connection after all operations are complete.
-if 'conn' in locals() and conn.is_connected():
-    cursor.close()
-    conn.close()
-    print("✅ MySQL Database Connection Closed.")
-else:
-    print("ℹ️ Database connection was not open or already closed.")
+def close_step(state):
+    """Closes the cursor and connection of the run, if one was opened."""
+    conn = state['conn']
+    if conn is not None and conn.is_connected():
+        state['cursor'].close()
+        conn.close()
+        print("✅ MySQL Database Connection Closed.")
+    else:
+        print("ℹ️ Database connection was not open or already closed.")
+
+# 📌 Stage 9.5: Precompute Growth and Ranking Analytics
+# Builds the growth indexes of Project2_Agri_India_analytics.py once per run from
+# the loaded frame: the year series per district, and per state (summed over its
+# districts), of the columns the top-K charts of Stage 10 and the growth queries
+# rank - not every crop, since each indexed column costs a few entities x years
+# arrays. The charts read them instead of grouping and sorting the frame. Queries 2 and 3
+# of the SQL script (the 2015 to 2020 growth of district wheat yield and state
+# oilseed production) are answered from them here, with their lookup times.
+# Missing values stay missing in the indexes, as they stay NULL in the database,
+# so both leave out a district without a 2015 figure.
+growth_index_queries = {
+    "2. Top wheat yield increase districts": 'district',
+    "3. Oilseed growth by state": 'state'
+}
+
+# Columns the Stage 10 charts read from each index (charts 7 and 8).
+growth_chart_columns = {
+    'district': ['rice_production'],
+    'state': ['wheat_production']
+}
+
+def growth_query_column(name):
+    """Returns the column a growth query (see growth_index_queries) ranks."""
+    measure = 'yield' if growth_index_queries[name] == 'district' else 'production'
+    return f"{agri_queries.named_queries[name][1]['crop']}_{measure}"
+
+def growth_index_columns(level):
+    """Returns the columns to index at one level ('district' or 'state'): those of its charts and queries."""
+    columns = list(growth_chart_columns[level])
+    for name, query_level in growth_index_queries.items():
+        if query_level == level and growth_query_column(name) not in columns:
+            columns.append(growth_query_column(name))
+    return columns
+
+def build_growth_indexes(frame):
+    """Returns the district and state growth indexes of the columns the charts and growth queries rank."""
+    state_columns = growth_index_columns('state')
+    # min_count=1: a state-year without any reported district stays missing instead of 0.
+    state_frame = frame.groupby(['state_name', 'year'], as_index=False, sort=False)[state_columns].sum(min_count=1)
+    return {
+        'district': agri_analytics.GrowthIndex(frame, 'dist_name', growth_index_columns('district'), parent='state_name'),
+        'state': agri_analytics.GrowthIndex(state_frame, 'state_name', state_columns)
+    }
+
+def growth_index_lookup(growth_indexes, name):
+    """Answers a growth query (see growth_index_queries) from the growth indexes, with its default parameters."""
+    params = agri_queries.named_queries[name][1]
+    return growth_indexes[growth_index_queries[name]].top(
+        growth_query_column(name), params['limit'], by='growth',
+        start_year=params['start_year'], end_year=params['end_year'])
+
+def growth_analytics_step(state, repeats=100):
+    """Builds the growth indexes for the charts and times the growth queries answered from them."""
+    print("\n--- Precomputing Growth and Ranking Analytics ---")
+    frame = state['df']
+    with pipeline_metrics.stage("growth_analytics", rows_in=len(frame)) as stage:
+        started = time.perf_counter()
+        growth_indexes = build_growth_indexes(frame)
+        build_ms = (time.perf_counter() - started) * 1000
+        district_index, state_index = growth_indexes['district'], growth_indexes['state']
+        stage.rows_out = len(district_index.labels) + len(state_index.labels)
+        print(f"ℹ️ Growth indexes: {len(district_index.labels)} districts and {len(state_index.labels)} states x "
+              f"{len(district_index.years)} years x {len(district_index.columns) + len(state_index.columns)} columns built in {build_ms:.1f} ms.")
+        for name in growth_index_queries:
+            started = time.perf_counter()
+            for _ in range(repeats):
+                result = growth_index_lookup(growth_indexes, name)
+            lookup_us = (time.perf_counter() - started) * 1e6 / repeats
+            print(f"   {name}: {len(result)} rows in {lookup_us:.0f} µs per lookup.")
+    state['growth_indexes'] = growth_indexes
 
 # 📌 Stage 10: Data Visualization and Analysis
 # This stage uses the loaded and processed DataFrame to create various
 # data visualizations, offering insights into agricultural trends.
-print("\n--- Generating Data Visualizations ---")
-
-# Set a style for the plots for better aesthetics
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (10, 6) # Default figure size
-
-# 1. Top 7 Rice Producing States (Seaborn Bar Plot)
-rice_state = df.groupby('state_name')['rice_production'].sum().nlargest(7)
-plt.figure()
-sns.barplot(x=rice_state.values, y=rice_state.index, palette="YlGn_r") # _r reverses the colormap
-plt.title("Top 7 Rice Producing States")
-plt.xlabel("Rice Production (1000 tons)")
-plt.ylabel("State Name")
-plt.tight_layout()
-plt.show()
-
-# 2. Top 5 Wheat Producing States (Seaborn Bar & Plotly Pie)
-wheat_state = df.groupby('state_name')['wheat_production'].sum().nlargest(5)
-plt.figure()
-sns.barplot(x=wheat_state.values, y=wheat_state.index, palette="Oranges_r")
-plt.title("Top 5 Wheat Producing States")
-plt.xlabel("Wheat Production (1000 tons)")
-plt.ylabel("State Name")
-plt.tight_layout()
-plt.show()
-
-# Plotly Pie Chart for Wheat Production Share
-fig_wheat_pie = px.pie(values=wheat_state.values, names=wheat_state.index,
-                       title="Wheat Production Share (%)",
-                       color_discrete_sequence=px.colors.sequential.Oranges_r)
-fig_wheat_pie.show()
-
-# 3. Oilseed Production — Top 5 States (Seaborn Bar Plot)
-oil_state = df.groupby('state_name')['oilseeds_production'].sum().nlargest(5)
-plt.figure()
-sns.barplot(x=oil_state.values, y=oil_state.index, palette='Blues_r')
-plt.title("Top 5 Oilseed Producing States")
-plt.xlabel("Production (1000 tons)")
-plt.ylabel("State Name")
-plt.tight_layout()
-plt.show()
-
-# 4. Sunflower Production — Top 7 States (Plotly Horizontal Bar)
-sunflower_top_states = df.groupby('state_name')['sunflower_production'].sum().nlargest(7).reset_index()
-fig_sunflower = px.bar(sunflower_top_states, x='sunflower_production', y='state_name', orientation='h',
-                       title="Top 7 Sunflower Producing States",
-                       color='state_name', # Color by state for distinction
-                       color_discrete_sequence=px.colors.sequential.Viridis)
-fig_sunflower.update_layout(yaxis_title="State Name", xaxis_title="Sunflower Production (1000 tons)")
-fig_sunflower.show()
-
-# 5. Sugarcane Production Over Time (Seaborn Line Plot)
-sugarcane_trend = df.groupby('year')['sugarcane_production'].sum().reset_index()
-plt.figure()
-sns.lineplot(data=sugarcane_trend, x='year', y='sugarcane_production', marker='o', color='green')
-plt.title("Sugarcane Production Trend Over Time")
-plt.xlabel("Year")
-plt.ylabel("Sugarcane Production (1000 tons)")
-plt.tight_layout()
-plt.show()
-
-# 6. Rice vs Wheat Production Trend (Seaborn Line Plot)
-rice_wheat_trend = df.groupby('year')[['rice_production','wheat_production']].sum().reset_index()
-plt.figure()
-sns.lineplot(data=rice_wheat_trend, x='year', y='rice_production', label='Rice', marker='o', color='teal')
-sns.lineplot(data=rice_wheat_trend, x='year', y='wheat_production', label='Wheat', marker='o', color='darkgoldenrod')
-plt.title("Rice vs Wheat Production Trend")
-plt.xlabel("Year")
-plt.ylabel("Production (1000 tons)")
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-# 7. District-wise Rice Production — West Bengal (Seaborn Bar Plot)
-wb_df = df[df['state_name'] == 'West Bengal']
-wb_rice_production = wb_df.groupby('dist_name')['rice_production'].sum().nlargest(10)
-plt.figure()
-sns.barplot(x=wb_rice_production.values, y=wb_rice_production.index, palette="Greens_r")
-plt.title("Rice Production — Top Districts (West Bengal)")
-plt.xlabel("Rice Production (1000 tons)")
-plt.ylabel("District Name")
-plt.tight_layout()
-plt.show()
-
-# 8. Top 10 Wheat Production Years — Uttar Pradesh (Seaborn Bar Plot)
-up_df = df[df['state_name'] == 'Uttar Pradesh']
-up_wheat_by_year = up_df.groupby('year')['wheat_production'].sum().nlargest(10)
-plt.figure()
-sns.barplot(x=up_wheat_by_year.values, y=up_wheat_by_year.index, palette='Oranges_r')
-plt.title("Top 10 Wheat Production Years — Uttar Pradesh")
-plt.xlabel("Wheat Production (1000 tons)")
-plt.ylabel("Year")
-plt.tight_layout()
-plt.show()
-
-# 9. Finger Millet Production Trend (Seaborn Line Plot)
-fingermillet_trend = df.groupby('year')['fingermillet_production'].sum().reset_index()
-plt.figure()
-sns.lineplot(data=fingermillet_trend, x='year', y='fingermillet_production', marker='o', color='purple')
-plt.title("Finger Millet Production Trend Over Time")
-plt.xlabel("Year")
-plt.ylabel("Finger Millet Production (1000 tons)")
-plt.tight_layout()
-plt.show()
-
-# 10. Sorghum Production — Top 7 States (Plotly Bar Plot)
-sorghum_top_states = df.groupby('state_name')['sorghum_production'].sum().nlargest(7).reset_index()
-fig_sorghum = px.bar(sorghum_top_states, x='state_name', y='sorghum_production',
-                     title="Top 7 Sorghum Producing States",
-                     color='state_name', # Color by state for distinction
-                     color_discrete_sequence=px.colors.qualitative.Pastel)
-fig_sorghum.update_layout(xaxis_title="State Name", yaxis_title="Sorghum Production (1000 tons)")
-fig_sorghum.show()
-
-# 11. Groundnut Production — Top 7 States (Seaborn Bar Plot)
-groundnut_top_states = df.groupby('state_name')['groundnut_production'].sum().nlargest(7)
-plt.figure()
-sns.barplot(x=groundnut_top_states.values, y=groundnut_top_states.index, palette='Purples_r')
-plt.title("Top 7 Groundnut Producing States")
-plt.xlabel("Groundnut Production (1000 tons)")
-plt.ylabel("State Name")
-plt.tight_layout()
-plt.show()
-
-# 12. Soybean Production vs Yield Efficiency (Plotly Scatter Plot)
-soybean_data = df.groupby('state_name')[['soybean_production', 'soybean_yield']].sum().reset_index()
-top_5_soybean_states = soybean_data.nlargest(5, 'soybean_production')
-fig_soybean = px.scatter(top_5_soybean_states, x='soybean_yield', y='soybean_production',
-                         size='soybean_production', # Size of marker based on production
-                         hover_name='state_name', # Show state name on hover
-                         title="Top 5 Soybean States — Yield vs Production",
-                         labels={'soybean_yield': 'Soybean Yield (Kg per ha)',
-                                 'soybean_production': 'Soybean Production (1000 tons)'},
-                         color='state_name', # Color points by state
-                         color_discrete_sequence=px.colors.qualitative.Set2)
-fig_soybean.show()
-
-# 13. Area Cultivated vs Production (Rice, Wheat, Maize) — Seaborn Scatter Plot
-plt.figure()
-sns.scatterplot(x='rice_area', y='rice_production', data=df, label='Rice', alpha=0.6, color='blue')
-sns.scatterplot(x='wheat_area', y='wheat_production', data=df, label='Wheat', alpha=0.6, color='red')
-sns.scatterplot(x='maize_area', y='maize_production', data=df, label='Maize', alpha=0.6, color='green')
-plt.title("Area vs Production — Rice, Wheat, Maize")
-plt.xlabel("Area (1000 ha)")
-plt.ylabel("Production (1000 tons)")
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-# 14. Top 10 Districts by Rice Yield (Seaborn Bar Plot)
-# Identifies and visualizes the top 10 districts with the highest recorded rice yield.
-top_rice_yield_districts = df.groupby('dist_name')['rice_yield'].max().nlargest(10)
-plt.figure()
-sns.barplot(x=top_rice_yield_districts.values, y=top_rice_yield_districts.index, palette="YlGnBu_r")
-plt.title("Top 10 Districts by Rice Yield")
-plt.xlabel("Rice Yield (Kg per ha)")
-plt.ylabel("District Name")
-plt.tight_layout()
-plt.show()
-
-print("\n--- All Data Visualizations Generated ---")
+
+# Every (group key, column, reducer) the charts below aggregate.
+# Without rollup cubes they are planned together: requests sharing a group key
+# are answered by one groupby().agg() over the frame, and each chart takes its
+# slice, instead of every chart running its own groupby over all the rows.
+# Charts 7 and 8 (top districts and years within a state) read the Stage 9.5
+# growth indexes.
+chart_aggregate_requests = [
+    ('state_name', 'rice_production', 'sum'),
+    ('state_name', 'wheat_production', 'sum'),
+    ('state_name', 'oilseeds_production', 'sum'),
+    ('state_name', 'sunflower_production', 'sum'),
+    ('year', 'sugarcane_production', 'sum'),
+    ('year', 'rice_production', 'sum'),
+    ('year', 'wheat_production', 'sum'),
+    ('year', 'fingermillet_production', 'sum'),
+    ('state_name', 'sorghum_production', 'sum'),
+    ('state_name', 'groundnut_production', 'sum'),
+    ('state_name', 'soybean_production', 'sum'),
+    ('state_name', 'soybean_yield', 'sum'),
+    ('dist_name', 'rice_yield', 'max')
+]
+
+def plan_chart_aggregates(frame, requests):
+    """Answers all chart aggregate requests with one groupby().agg() per distinct group key."""
+    plan = defaultdict(lambda: defaultdict(list)) # group key -> {column: [reducers]}
+    for by, column, reducer in requests:
+        if reducer not in plan[by][column]:
+            plan[by][column].append(reducer)
+
+    results = {}
+    for by, aggregations in plan.items():
+        # Categorical names make the group keys cheap integer codes; only the key
+        # column is converted, and observed=True keeps only the names that occur.
+        keys = frame[by].astype('category') if by != 'year' else frame[by]
+        grouped = frame[list(aggregations)].groupby(keys, observed=True).agg(dict(aggregations))
+        for column, reducers in aggregations.items():
+            for reducer in reducers:
+                series = grouped[(column, reducer)].rename(column)
+                # Plain labels again, so seaborn does not draw a bar for every category.
+                series.index = series.index.astype(object) if by != 'year' else series.index
+                results[(by, column, reducer)] = series
+    return results, len(plan)
+
+def aggregate_per_chart(frame, requests):
+    """Answers each request with its own groupby (the pre-planner approach, for comparison)."""
+    return {(by, column, reducer): frame.groupby(by)[column].agg(reducer) for by, column, reducer in requests}
+
+def chart_aggregate(frame, rollup_cubes, planned_chart_aggregates, by, column, reducer='sum'):
+    """Aggregates one column by 'state_name', 'year' or 'dist_name', reading the rollup cube when one was built."""
+    if rollup_cubes is None:
+        planned = planned_chart_aggregates.get((by, column, reducer))
+        if planned is not None:
+            return planned
+        return frame.groupby(by)[column].agg(reducer)
+    crop, measure = column.rsplit('_', 1)
+    cube = rollup_cubes['district_crop' if by == 'dist_name' else 'state_year_crop']
+    cube = cube[cube['crop_name'] == crop]
+    return cube.groupby(by)[f"{measure}_{reducer}"].agg(reducer).rename(column)
+
+def build_chart_data(frame, rollup_cubes, growth_indexes):
+    """Returns the data behind each chart, from the rollup cubes or planned groupbys and the growth indexes."""
+    with pipeline_metrics.stage("chart_aggregation", rows_in=len(frame)) as stage:
+        planned_chart_aggregates = {}
+        if rollup_cubes is None:
+            started = time.perf_counter()
+            planned_chart_aggregates, scan_count = plan_chart_aggregates(frame, chart_aggregate_requests)
+            planned_ms = (time.perf_counter() - started) * 1000
+            if COMPARE_CHART_AGGREGATION:
+                started = time.perf_counter()
+                aggregate_per_chart(frame, chart_aggregate_requests)
+                per_chart_ms = (time.perf_counter() - started) * 1000
+                print(f"ℹ️ Chart aggregation before: {len(chart_aggregate_requests)} groupby scans in {per_chart_ms:.1f} ms.")
+            print(f"ℹ️ Chart aggregation: {len(chart_aggregate_requests)} requests answered by "
+                  f"{scan_count} groupby scans in {planned_ms:.1f} ms.")
+
+        # The data behind each chart, keyed by the chart names of the chart module.
+        # The figures themselves are drawn by Project2_Agri_India_charts.
+        aggregate = partial(chart_aggregate, frame, rollup_cubes, planned_chart_aggregates)
+        soybean_data = pd.concat([aggregate('state_name', 'soybean_production'),
+                                  aggregate('state_name', 'soybean_yield')], axis=1).reset_index()
+        wheat_state = aggregate('state_name', 'wheat_production').nlargest(5)
+        chart_data = {
+            # 1. Top 7 Rice Producing States (Seaborn Bar Plot)
+            '01_rice_states': aggregate('state_name', 'rice_production').nlargest(7),
+            # 2. Top 5 Wheat Producing States (Seaborn Bar & Plotly Pie)
+            '02_wheat_states': wheat_state,
+            '02_wheat_share_pie': wheat_state,
+            # 3. Oilseed Production — Top 5 States (Seaborn Bar Plot)
+            '03_oilseed_states': aggregate('state_name', 'oilseeds_production').nlargest(5),
+            # 4. Sunflower Production — Top 7 States (Plotly Horizontal Bar)
+            '04_sunflower_states': aggregate('state_name', 'sunflower_production').nlargest(7).reset_index(),
+            # 5. Sugarcane Production Over Time (Seaborn Line Plot)
+            '05_sugarcane_trend': aggregate('year', 'sugarcane_production').reset_index(),
+            # 6. Rice vs Wheat Production Trend (Seaborn Line Plot)
+            '06_rice_wheat_trend': pd.concat([aggregate('year', 'rice_production'),
+                                              aggregate('year', 'wheat_production')], axis=1).reset_index(),
+            # 7. District-wise Rice Production — West Bengal (Seaborn Bar Plot)
+            '07_wb_rice_districts': growth_indexes['district'].top('rice_production', 10, within='West Bengal'),
+            # 8. Top 10 Wheat Production Years — Uttar Pradesh (Seaborn Bar Plot)
+            '08_up_wheat_years': growth_indexes['state'].top_years('wheat_production', 'Uttar Pradesh', 10),
+            # 9. Finger Millet Production Trend (Seaborn Line Plot)
+            '09_fingermillet_trend': aggregate('year', 'fingermillet_production').reset_index(),
+            # 10. Sorghum Production — Top 7 States (Plotly Bar Plot)
+            '10_sorghum_states': aggregate('state_name', 'sorghum_production').nlargest(7).reset_index(),
+            # 11. Groundnut Production — Top 7 States (Seaborn Bar Plot)
+            '11_groundnut_states': aggregate('state_name', 'groundnut_production').nlargest(7),
+            # 12. Soybean Production vs Yield Efficiency (Plotly Scatter Plot)
+            '12_soybean_yield_vs_production': soybean_data.nlargest(5, 'soybean_production'),
+            # 13. Area Cultivated vs Production (Rice, Wheat, Maize) — Seaborn Scatter Plot
+            '13_area_vs_production': frame[['rice_area', 'rice_production', 'wheat_area', 'wheat_production',
+                                            'maize_area', 'maize_production']],
+            # 14. Top 10 Districts by Rice Yield (Seaborn Bar Plot)
+            # Identifies and visualizes the top 10 districts with the highest recorded rice yield.
+            '14_rice_yield_districts': aggregate('dist_name', 'rice_yield', reducer='max').nlargest(10)
+        }
+        stage.rows_out = len(chart_data)
+    return chart_data
+
+def report_step(state):
+    """Aggregates the chart data and shows or renders the Stage 10 charts."""
+    print("\n--- Generating Data Visualizations ---")
+    chart_data = build_chart_data(state['df'], state['rollup_cubes'], state['growth_indexes'])
+
+    # When the charts are shown, this stage includes the time until they are closed.
+    with pipeline_metrics.stage("render_charts", rows_in=len(chart_data)):
+        if HEADLESS_CHARTS:
+            started = time.perf_counter()
+            rendered, skipped = agri_charts.render_charts_to_dir(chart_data, CHART_OUTPUT_DIR,
+                                                                workers=CHART_RENDER_WORKERS,
+                                                                plotly_format=CHART_PLOTLY_FORMAT)
+            print(f"ℹ️ Rendered {len(rendered)} charts to {CHART_OUTPUT_DIR} in {time.perf_counter() - started:.2f} s "
+                  f"({skipped} unchanged charts skipped).")
+        else:
+            agri_charts.show_charts(chart_data)
+
+    print("\n--- All Data Visualizations Generated ---")
+
+# 📌 Stage 11: Pipeline Steps and Command Line
+# Importing this script runs nothing. run_pipeline() chains the stage functions
+# above into the steps of the command line, each step running the ones it needs:
+#   load          Stages 3-5.5: read, rename, validate and cache the cleaned frame
+#   sync-masters  load, then Stage 7
+#   ingest        load, Stage 7 and Stages 8-8.9, resuming an interrupted ingest
+#   report        load (only the chart columns from a fresh cache) and Stages 9.5-10,
+#                 without a database connection
+#   all           every stage, as one run (the default)
+# For example:
+#   python Project2_Agri_India.py load
+#   python Project2_Agri_India.py ingest            (after a crash: resumes)
+#   python Project2_Agri_India.py ingest --restart  (loads every row again)
+#   python Project2_Agri_India.py report
+# The steps pass one state dict along: the frame or streamed chunks, the
+# connection, master ids, rollup cubes and the checkpoint.
+pipeline_commands = ['load', 'sync-masters', 'ingest', 'report', 'all']
+
+def new_pipeline_state(analysis_only=None, resume=True):
+    """Returns an empty pipeline state for one run."""
+    analysis_only = ANALYSIS_ONLY if analysis_only is None else analysis_only
+    return {
+        'analysis_only': analysis_only,
+        'streaming': CSV_CHUNK_SIZE is not None and not analysis_only,
+        'resume': resume,
+        'checkpoint': None,
+        'df': None,
+        'csv_chunks': None,
+        'cleaned_cache_enabled': False,
+        'cleaned_cache_hit': False,
+        'validation_state': None,
+        'conn': None,
+        'cursor': None,
+        'master_ids': None,
+        'rollup_cubes': None,
+        'growth_indexes': None,
+        'ingest_failed_rows': 0
+    }
+
+def load_step(state):
+    """Runs Stages 3-5.5 and opens the checkpoint of the CSV that was read."""
+    read_csv_step(state)
+    state['checkpoint'] = agri_checkpoint.PipelineCheckpoint(
+        PIPELINE_CHECKPOINT_PATH, agri_checkpoint.describe_source(file_path, cleaned_cache_settings))
+    rename_columns_step(state)
+    check_columns_step(state)
+    validate_data_step(state)
+    if not state['streaming']:
+        state['checkpoint'].update('load', completed=True, rows=len(state['df']),
+                                   cleaned_cache=cleaned_cache_path if state['cleaned_cache_enabled'] else None)
+
+def drain_chunks_step(state):
+    """Reads the streamed chunks through validation and the cleaned cache without loading them (the 'load' step)."""
+    with pipeline_metrics.stage("stream_cleaned_data") as stage:
+        stage.rows_out = sum(len(chunk) for chunk in state['csv_chunks'])
+    if state['validation_state'] is not None:
+        report_validation(state['validation_state'])
+    state['checkpoint'].update('load', completed=True, rows=stage.rows_out,
+                               cleaned_cache=cleaned_cache_path if state['cleaned_cache_enabled'] else None)
+
+def run_pipeline(command="all", resume=True):
+    """Runs one step of the command line (with the steps it depends on) and returns the final state."""
+    global pipeline_metrics
+    if command not in pipeline_commands:
+        raise ValueError(f"Unknown pipeline step '{command}'; expected one of {pipeline_commands}.")
+    pipeline_metrics = agri_metrics.PipelineMetrics(METRICS_LOG_PATH, trace_memory=TRACE_MEMORY,
+                                                    error_sample_size=ERROR_SAMPLE_SIZE, enabled=INSTRUMENT_STAGES)
+    state = new_pipeline_state(ANALYSIS_ONLY or command == "report", resume)
+    try:
+        load_step(state)
+        if command == "load":
+            if state['streaming']:
+                drain_chunks_step(state)
+        elif not state['analysis_only']:
+            connect_step(state)
+            try:
+                if not state['streaming'] or command == "sync-masters":
+                    sync_masters_step(state)
+                if command in ("ingest", "all"):
+                    ingest_step(state)
+                    layout_benchmark_step(state)
+                    save_rollup_cubes_step(state)
+                    analytical_queries_step(state)
+                    index_benchmark_step(state)
+            finally:
+                close_step(state) # Also after a failed step, so the connection is not left open
+        elif command == "all":
+            print("\nℹ️ ANALYSIS_ONLY: MySQL load skipped.")
+            close_step(state)
+        if command in ("report", "all"):
+            growth_analytics_step(state)
+            report_step(state)
+    finally:
+        pipeline_metrics.finish(METRICS_PROMETHEUS_PATH)
+    return state
+
+def main(argv=None):
+    """Runs the step named on the command line; returns the exit status."""
+    parser = argparse.ArgumentParser(description="Loads the ICRISAT district-level data into MySQL and charts it.")
+    parser.add_argument('step', nargs='?', default='all', choices=pipeline_commands,
+                        help="pipeline step to run, after the steps it depends on (default: all)")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the checkpoint of an interrupted ingest and load every row again")
+    args = parser.parse_args(argv)
+    try:
+        run_pipeline(args.step, resume=not args.restart)
+    except PipelineStepError:
+        return 1 # The failing stage has printed why
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -12,6 +12,13 @@ USE Project2_Agri_India;
 -- 📌 Stage 1: Clean Start - Drop Existing Tables
 -- Drops tables in a specific order to avoid foreign key constraint issues,
 -- ensuring a clean slate for each run of the script.
+DROP TABLE IF EXISTS data_version;
+DROP TABLE IF EXISTS district_year_crop_rollup; -- Replaced by district_crop_rollup
+DROP TABLE IF EXISTS district_crop_rollup;
+DROP TABLE IF EXISTS state_year_crop_rollup;
+DROP VIEW IF EXISTS agri_production_wide;
+DROP TABLE IF EXISTS crop_production;
+DROP TABLE IF EXISTS agri_production_manifest;
 DROP TABLE IF EXISTS agri_production;
 DROP TABLE IF EXISTS district_master;
 DROP TABLE IF EXISTS state_master;
@@ -20,6 +27,8 @@ DROP TABLE IF EXISTS years;
 
 -- 📌 Stage 2: Table Schema Definitions
 -- Defines the structure for all master and production tables.
+-- The Python script's embedded DuckDB/SQLite backend (AGRI_DB_BACKEND) builds its
+-- schema from the CREATE statements of this stage, so keep new tables here.
 
 -- Create state_master Table: Stores information about states.
 CREATE TABLE state_master (
@@ -49,9 +58,19 @@ CREATE TABLE years (
 
 -- Create agri_production Table: Stores agricultural production data by district and year.
 -- Includes area, production, and yield for various crops and categories.
+-- 'state_code' is copied from district_master into every row, so the state-level
+-- queries join state_master directly instead of going through district_master.
+-- The secondary indexes lead with year (the analytics filter on 'year BETWEEN' and
+-- 'year =') and cover the hot crop columns of the Stage 4 queries, so those are
+-- answered from a narrow index instead of the 72-column rows. InnoDB appends the
+-- primary key (dist_code, year) to every secondary index, so the district queries
+-- are covered too. The Python loader's "load_data" engine builds them after the load.
+-- For year RANGE partitioning and upgrading an existing database, see
+-- Project2_Agri_India_upgrade.sql.
 CREATE TABLE agri_production (
     dist_code INT,
     year INT,
+    state_code INT,
     rice_area FLOAT, rice_production FLOAT, rice_yield FLOAT,
     wheat_area FLOAT, wheat_production FLOAT, wheat_yield FLOAT,
     sorghum_area FLOAT, sorghum_production FLOAT, sorghum_yield FLOAT,
@@ -76,9 +95,163 @@ CREATE TABLE agri_production (
     fruits_area FLOAT, vegetables_area FLOAT, fruits_vegetables_area FLOAT,
     potatoes_area FLOAT, onion_area FLOAT, fodder_area FLOAT,
     PRIMARY KEY (dist_code, year),
+    KEY idx_agri_year_state_rice (year, state_code, rice_production, rice_yield),
+    KEY idx_agri_year_wheat (year, wheat_yield),
+    KEY idx_agri_year_state_oilseeds (year, state_code, oilseeds_production, oilseeds_area),
+    KEY idx_agri_year_state_cotton (year, state_code, cotton_production),
+    KEY idx_agri_year_groundnut (year, groundnut_production),
+    KEY idx_agri_year_state_maize (year, state_code, maize_yield),
     FOREIGN KEY (dist_code) REFERENCES district_master(dist_code)
 );
 
+-- Create agri_production_manifest Table: Stores a fingerprint of each agri_production row.
+-- Used by the Python loader's "incremental" ingest engine to send only new or changed rows.
+CREATE TABLE agri_production_manifest (
+    dist_code INT,
+    year INT,
+    row_hash BIGINT UNSIGNED NOT NULL,
+    PRIMARY KEY (dist_code, year)
+);
+
+-- Create crop_production Table: Long-format (district, year, crop) fact table.
+-- Optional narrow layout of agri_production loaded by the Python script when
+-- LOAD_LONG_FORMAT is enabled. InnoDB clusters rows by primary key, so leading
+-- with crop_id keeps each crop's rows together: a per-crop query such as
+-- "top rice districts" or "cotton by year" reads one contiguous slice.
+CREATE TABLE crop_production (
+    dist_code INT,
+    year INT,
+    crop_id INT,
+    area FLOAT,
+    production FLOAT,
+    yield FLOAT,
+    PRIMARY KEY (crop_id, year, dist_code),
+    KEY idx_crop_production_dist_year (dist_code, year),
+    FOREIGN KEY (dist_code) REFERENCES district_master(dist_code),
+    FOREIGN KEY (crop_id) REFERENCES crops(crop_id)
+);
+
+-- Create agri_production_wide View: Compatibility view that pivots crop_production
+-- back into the 71-column agri_production layout, for consumers of the wide shape
+-- when only the long-format table is loaded. 'fruits_vegetables_area' is rebuilt
+-- as the sum of the fruits and vegetables areas.
+CREATE VIEW agri_production_wide AS
+SELECT
+    cp.dist_code,
+    cp.year,
+    MAX(CASE WHEN c.crop_name = 'rice' THEN cp.area END) AS rice_area,
+    MAX(CASE WHEN c.crop_name = 'rice' THEN cp.production END) AS rice_production,
+    MAX(CASE WHEN c.crop_name = 'rice' THEN cp.yield END) AS rice_yield,
+    MAX(CASE WHEN c.crop_name = 'wheat' THEN cp.area END) AS wheat_area,
+    MAX(CASE WHEN c.crop_name = 'wheat' THEN cp.production END) AS wheat_production,
+    MAX(CASE WHEN c.crop_name = 'wheat' THEN cp.yield END) AS wheat_yield,
+    MAX(CASE WHEN c.crop_name = 'sorghum' THEN cp.area END) AS sorghum_area,
+    MAX(CASE WHEN c.crop_name = 'sorghum' THEN cp.production END) AS sorghum_production,
+    MAX(CASE WHEN c.crop_name = 'sorghum' THEN cp.yield END) AS sorghum_yield,
+    MAX(CASE WHEN c.crop_name = 'pearlmillet' THEN cp.area END) AS pearlmillet_area,
+    MAX(CASE WHEN c.crop_name = 'pearlmillet' THEN cp.production END) AS pearlmillet_production,
+    MAX(CASE WHEN c.crop_name = 'pearlmillet' THEN cp.yield END) AS pearlmillet_yield,
+    MAX(CASE WHEN c.crop_name = 'maize' THEN cp.area END) AS maize_area,
+    MAX(CASE WHEN c.crop_name = 'maize' THEN cp.production END) AS maize_production,
+    MAX(CASE WHEN c.crop_name = 'maize' THEN cp.yield END) AS maize_yield,
+    MAX(CASE WHEN c.crop_name = 'fingermillet' THEN cp.area END) AS fingermillet_area,
+    MAX(CASE WHEN c.crop_name = 'fingermillet' THEN cp.production END) AS fingermillet_production,
+    MAX(CASE WHEN c.crop_name = 'fingermillet' THEN cp.yield END) AS fingermillet_yield,
+    MAX(CASE WHEN c.crop_name = 'barley' THEN cp.area END) AS barley_area,
+    MAX(CASE WHEN c.crop_name = 'barley' THEN cp.production END) AS barley_production,
+    MAX(CASE WHEN c.crop_name = 'barley' THEN cp.yield END) AS barley_yield,
+    MAX(CASE WHEN c.crop_name = 'chickpea' THEN cp.area END) AS chickpea_area,
+    MAX(CASE WHEN c.crop_name = 'chickpea' THEN cp.production END) AS chickpea_production,
+    MAX(CASE WHEN c.crop_name = 'chickpea' THEN cp.yield END) AS chickpea_yield,
+    MAX(CASE WHEN c.crop_name = 'pigeonpea' THEN cp.area END) AS pigeonpea_area,
+    MAX(CASE WHEN c.crop_name = 'pigeonpea' THEN cp.production END) AS pigeonpea_production,
+    MAX(CASE WHEN c.crop_name = 'pigeonpea' THEN cp.yield END) AS pigeonpea_yield,
+    MAX(CASE WHEN c.crop_name = 'groundnut' THEN cp.area END) AS groundnut_area,
+    MAX(CASE WHEN c.crop_name = 'groundnut' THEN cp.production END) AS groundnut_production,
+    MAX(CASE WHEN c.crop_name = 'groundnut' THEN cp.yield END) AS groundnut_yield,
+    MAX(CASE WHEN c.crop_name = 'sesamum' THEN cp.area END) AS sesamum_area,
+    MAX(CASE WHEN c.crop_name = 'sesamum' THEN cp.production END) AS sesamum_production,
+    MAX(CASE WHEN c.crop_name = 'sesamum' THEN cp.yield END) AS sesamum_yield,
+    MAX(CASE WHEN c.crop_name = 'rapeseed' THEN cp.area END) AS rapeseed_area,
+    MAX(CASE WHEN c.crop_name = 'rapeseed' THEN cp.production END) AS rapeseed_production,
+    MAX(CASE WHEN c.crop_name = 'rapeseed' THEN cp.yield END) AS rapeseed_yield,
+    MAX(CASE WHEN c.crop_name = 'mustard' THEN cp.area END) AS mustard_area,
+    MAX(CASE WHEN c.crop_name = 'mustard' THEN cp.production END) AS mustard_production,
+    MAX(CASE WHEN c.crop_name = 'mustard' THEN cp.yield END) AS mustard_yield,
+    MAX(CASE WHEN c.crop_name = 'safflower' THEN cp.area END) AS safflower_area,
+    MAX(CASE WHEN c.crop_name = 'safflower' THEN cp.production END) AS safflower_production,
+    MAX(CASE WHEN c.crop_name = 'safflower' THEN cp.yield END) AS safflower_yield,
+    MAX(CASE WHEN c.crop_name = 'castor' THEN cp.area END) AS castor_area,
+    MAX(CASE WHEN c.crop_name = 'castor' THEN cp.production END) AS castor_production,
+    MAX(CASE WHEN c.crop_name = 'castor' THEN cp.yield END) AS castor_yield,
+    MAX(CASE WHEN c.crop_name = 'linseed' THEN cp.area END) AS linseed_area,
+    MAX(CASE WHEN c.crop_name = 'linseed' THEN cp.production END) AS linseed_production,
+    MAX(CASE WHEN c.crop_name = 'linseed' THEN cp.yield END) AS linseed_yield,
+    MAX(CASE WHEN c.crop_name = 'sunflower' THEN cp.area END) AS sunflower_area,
+    MAX(CASE WHEN c.crop_name = 'sunflower' THEN cp.production END) AS sunflower_production,
+    MAX(CASE WHEN c.crop_name = 'sunflower' THEN cp.yield END) AS sunflower_yield,
+    MAX(CASE WHEN c.crop_name = 'soybean' THEN cp.area END) AS soybean_area,
+    MAX(CASE WHEN c.crop_name = 'soybean' THEN cp.production END) AS soybean_production,
+    MAX(CASE WHEN c.crop_name = 'soybean' THEN cp.yield END) AS soybean_yield,
+    MAX(CASE WHEN c.crop_name = 'cotton' THEN cp.area END) AS cotton_area,
+    MAX(CASE WHEN c.crop_name = 'cotton' THEN cp.production END) AS cotton_production,
+    MAX(CASE WHEN c.crop_name = 'cotton' THEN cp.yield END) AS cotton_yield,
+    MAX(CASE WHEN c.crop_name = 'oilseeds' THEN cp.area END) AS oilseeds_area,
+    MAX(CASE WHEN c.crop_name = 'oilseeds' THEN cp.production END) AS oilseeds_production,
+    MAX(CASE WHEN c.crop_name = 'oilseeds' THEN cp.yield END) AS oilseeds_yield,
+    MAX(CASE WHEN c.crop_name = 'sugarcane' THEN cp.area END) AS sugarcane_area,
+    MAX(CASE WHEN c.crop_name = 'sugarcane' THEN cp.production END) AS sugarcane_production,
+    MAX(CASE WHEN c.crop_name = 'sugarcane' THEN cp.yield END) AS sugarcane_yield,
+    MAX(CASE WHEN c.crop_name = 'fruits' THEN cp.area END) AS fruits_area,
+    MAX(CASE WHEN c.crop_name = 'vegetables' THEN cp.area END) AS vegetables_area,
+    SUM(CASE WHEN c.crop_name IN ('fruits', 'vegetables') THEN cp.area END) AS fruits_vegetables_area,
+    MAX(CASE WHEN c.crop_name = 'potatoes' THEN cp.area END) AS potatoes_area,
+    MAX(CASE WHEN c.crop_name = 'onion' THEN cp.area END) AS onion_area,
+    MAX(CASE WHEN c.crop_name = 'fodder' THEN cp.area END) AS fodder_area
+FROM crop_production cp
+JOIN crops c ON cp.crop_id = c.crop_id
+GROUP BY cp.dist_code, cp.year;
+
+-- Create district_crop_rollup Table: Precomputed district x crop aggregates over all years.
+-- Rebuilt by the Python loader at the end of every load (BUILD_ROLLUP_CUBES); holds the
+-- sum/min/max of area, production and yield and the number of district-year rows.
+-- There is no district x year rollup: with one agri_production row per district-year
+-- it would be as large as the fact table.
+CREATE TABLE district_crop_rollup (
+    state_code INT,
+    state_name VARCHAR(100),
+    dist_code INT,
+    dist_name VARCHAR(100),
+    crop_name VARCHAR(100),
+    district_years INT,
+    area_sum FLOAT, area_min FLOAT, area_max FLOAT,
+    production_sum FLOAT, production_min FLOAT, production_max FLOAT,
+    yield_sum FLOAT, yield_min FLOAT, yield_max FLOAT,
+    PRIMARY KEY (crop_name, dist_code)
+);
+
+-- Create state_year_crop_rollup Table: Precomputed state x year x crop aggregates,
+-- rebuilt by the Python loader with district_crop_rollup.
+CREATE TABLE state_year_crop_rollup (
+    state_code INT,
+    state_name VARCHAR(100),
+    year INT,
+    crop_name VARCHAR(100),
+    district_years INT,
+    area_sum FLOAT, area_min FLOAT, area_max FLOAT,
+    production_sum FLOAT, production_min FLOAT, production_max FLOAT,
+    yield_sum FLOAT, yield_min FLOAT, yield_max FLOAT,
+    PRIMARY KEY (crop_name, year, state_code)
+);
+
+-- Create data_version Table: One row whose version the Python loader increments after
+-- every Stage 8 load, so the cached results of the analytical queries can tell
+-- that the data has changed.
+CREATE TABLE data_version (
+    id INT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
 -- 📌 Stage 3: Insert Sample Data into Tables
 -- Populates all tables with sample data. 'ON DUPLICATE KEY UPDATE' ensures
 -- idempotency, allowing the script to be run multiple times without errors
@@ -176,6 +349,14 @@ VALUES
 (139, 2008, 350, 1050, 3000, 130, 520, 4000, 35, 105, 3000, 14, 42, 3000, 100, 300, 3000, 7, 21, 3000, 3, 12, 4000, 24, 72, 3000, 20, 60, 3000, 32, 96, 3000, 13, 39, 3000, 28, 84, 3000, 22, 66, 3000, 9, 27, 3000, 6, 18, 3000, 5, 15, 3000, 17, 51, 3000, 43, 129, 3000, 70, 3500, 50000, 130, 6500, 50000, 35, 29, 64, 64, 18, 15, 9, 0, 0),
 (140, 2007, 330, 990, 3000, 125, 500, 4000, 33, 99, 3000, 13, 39, 3000, 95, 285, 3000, 6, 18, 3000, 3, 12, 4000, 23, 69, 3000, 19, 57, 3000, 30, 90, 3000, 12, 36, 3000, 27, 81, 3000, 21, 63, 3000, 9, 27, 3000, 6, 18, 3000, 4, 12, 3000, 16, 48, 3000, 40, 120, 3000, 65, 3200, 49231, 120, 6000, 50000, 33, 27, 60, 60, 17, 14, 8, 0, 0);
 
+-- Copy each district's state_code into its agri_production rows.
+UPDATE agri_production ap
+JOIN district_master dm ON ap.dist_code = dm.dist_code
+SET ap.state_code = dm.state_code;
+
+-- Insert the data_version Row: The loader only increments it, so it must exist.
+INSERT IGNORE INTO data_version (id, version) VALUES (1, 0);
+
 
 -- 📌 Stage 4: Analytical Queries
 -- This section contains various analytical queries to extract insights from the agricultural data.
@@ -188,23 +369,28 @@ GROUP BY year
 ORDER BY year;
 
 -- 2. Top 5 Districts by Wheat Yield Increase (2015–2020)
--- Identifies districts with the largest increase in wheat yield between 2015 and 2020.
-SELECT dm.dist_name, (MAX(ap.wheat_yield) - MIN(ap.wheat_yield)) AS yield_increase
+-- Identifies districts with the largest increase in wheat yield from 2015 to 2020:
+-- the 2020 yield minus the 2015 yield. Districts missing either year are left out.
+SELECT dm.dist_name,
+       (MAX(CASE WHEN ap.year = 2020 THEN ap.wheat_yield END) - MAX(CASE WHEN ap.year = 2015 THEN ap.wheat_yield END)) AS yield_increase
 FROM agri_production ap
 JOIN district_master dm ON ap.dist_code = dm.dist_code
-WHERE ap.year BETWEEN 2015 AND 2020
+WHERE ap.year IN (2015, 2020)
 GROUP BY dm.dist_name
+HAVING yield_increase IS NOT NULL
 ORDER BY yield_increase DESC
 LIMIT 5;
 
 -- 3. States with Highest Oilseed Growth (2015–2020)
--- Ranks states by the growth in oilseed production between 2015 and 2020.
-SELECT sm.state_name, (MAX(ap.oilseeds_production) - MIN(ap.oilseeds_production)) AS growth
+-- Ranks states by the growth in oilseed production from 2015 to 2020: the state's
+-- 2020 production minus its 2015 production.
+SELECT sm.state_name,
+       (SUM(CASE WHEN ap.year = 2020 THEN ap.oilseeds_production END) - SUM(CASE WHEN ap.year = 2015 THEN ap.oilseeds_production END)) AS growth
 FROM agri_production ap
-JOIN district_master dm ON ap.dist_code = dm.dist_code
-JOIN state_master sm ON dm.state_code = sm.state_code
-WHERE ap.year BETWEEN 2015 AND 2020
+JOIN state_master sm ON ap.state_code = sm.state_code
+WHERE ap.year IN (2015, 2020)
 GROUP BY sm.state_name
+HAVING growth IS NOT NULL
 ORDER BY growth DESC
 LIMIT 5;
 
@@ -212,8 +398,7 @@ LIMIT 5;
 -- Provides a detailed breakdown of rice production by year and state.
 SELECT ap.year, sm.state_name, SUM(ap.rice_production) AS total_rice_production
 FROM agri_production ap
-JOIN district_master dm ON ap.dist_code = dm.dist_code
-JOIN state_master sm ON dm.state_code = sm.state_code
+JOIN state_master sm ON ap.state_code = sm.state_code
 GROUP BY ap.year, sm.state_name
 ORDER BY ap.year, total_rice_production DESC;
 
@@ -232,8 +417,7 @@ ORDER BY rice_prod DESC;
 -- Shows the cotton production trend for the top 5 states by year.
 SELECT ap.year, sm.state_name, SUM(ap.cotton_production) AS cotton_prod
 FROM agri_production ap
-JOIN district_master dm ON ap.dist_code = dm.dist_code
-JOIN state_master sm ON dm.state_code = sm.state_code
+JOIN state_master sm ON ap.state_code = sm.state_code
 GROUP BY ap.year, sm.state_name
 ORDER BY ap.year, cotton_prod DESC
 LIMIT 5;
@@ -258,8 +442,7 @@ ORDER BY year;
 -- Aggregates the total area dedicated to oilseed cultivation for each state.
 SELECT sm.state_name, SUM(ap.oilseeds_area) AS total_oilseed_area
 FROM agri_production ap
-JOIN district_master dm ON ap.dist_code = dm.dist_code
-JOIN state_master sm ON dm.state_code = sm.state_code
+JOIN state_master sm ON ap.state_code = sm.state_code
 GROUP BY sm.state_name
 ORDER BY total_oilseed_area DESC;
 
@@ -279,8 +462,109 @@ SELECT sm.state_name,
        SUM(CASE WHEN ap.year=2020 THEN ap.maize_yield ELSE 0 END) AS maize_yield_2020,
        (SUM(CASE WHEN ap.year=2020 THEN ap.maize_yield ELSE 0 END) - SUM(CASE WHEN ap.year=2010 THEN ap.maize_yield ELSE 0 END)) AS yield_growth
 FROM agri_production ap
-JOIN district_master dm ON ap.dist_code = dm.dist_code
-JOIN state_master sm ON dm.state_code = sm.state_code
+JOIN state_master sm ON ap.state_code = sm.state_code
 WHERE ap.year BETWEEN 2010 AND 2020
 GROUP BY sm.state_name
 ORDER BY yield_growth DESC;
+
+
+-- 📌 Stage 5: Analytical Queries on the Rollup Tables
+-- The Stage 4 queries answered from the precomputed rollups, which hold one row per
+-- (state, year, crop) or (district, crop) instead of one wide row per district-year.
+-- Queries 2 and 7 compare districts within single years, which no rollup is smaller
+-- for, so they read agri_production as in Stage 4.
+-- Run them after the Python loader has rebuilt the rollups.
+
+-- 1. Year-wise Rice Production Trend (Overall)
+SELECT year, SUM(production_sum) AS total_rice_production
+FROM state_year_crop_rollup
+WHERE crop_name = 'rice'
+GROUP BY year
+ORDER BY year;
+
+-- 2. Top 5 Districts by Wheat Yield Increase (2015–2020)
+SELECT dm.dist_name,
+       (MAX(CASE WHEN ap.year = 2020 THEN ap.wheat_yield END) - MAX(CASE WHEN ap.year = 2015 THEN ap.wheat_yield END)) AS yield_increase
+FROM agri_production ap
+JOIN district_master dm ON ap.dist_code = dm.dist_code
+WHERE ap.year IN (2015, 2020)
+GROUP BY dm.dist_name
+HAVING yield_increase IS NOT NULL
+ORDER BY yield_increase DESC
+LIMIT 5;
+
+-- 3. States with Highest Oilseed Growth (2015–2020)
+SELECT state_name,
+       (SUM(CASE WHEN year = 2020 THEN production_sum END) - SUM(CASE WHEN year = 2015 THEN production_sum END)) AS growth
+FROM state_year_crop_rollup
+WHERE crop_name = 'oilseeds' AND year IN (2015, 2020)
+GROUP BY state_name
+HAVING growth IS NOT NULL
+ORDER BY growth DESC
+LIMIT 5;
+
+-- 4. Year-wise Rice Production Trend (State-wise)
+SELECT year, state_name, production_sum AS total_rice_production
+FROM state_year_crop_rollup
+WHERE crop_name = 'rice'
+ORDER BY year, total_rice_production DESC;
+
+-- 5. District-wise Production vs Area for Rice, Wheat, Maize
+SELECT dist_name,
+       SUM(CASE WHEN crop_name = 'rice' THEN area_sum END) AS rice_area,
+       SUM(CASE WHEN crop_name = 'rice' THEN production_sum END) AS rice_prod,
+       SUM(CASE WHEN crop_name = 'wheat' THEN area_sum END) AS wheat_area,
+       SUM(CASE WHEN crop_name = 'wheat' THEN production_sum END) AS wheat_prod,
+       SUM(CASE WHEN crop_name = 'maize' THEN area_sum END) AS maize_area,
+       SUM(CASE WHEN crop_name = 'maize' THEN production_sum END) AS maize_prod
+FROM district_crop_rollup
+WHERE crop_name IN ('rice', 'wheat', 'maize')
+GROUP BY dist_name
+ORDER BY rice_prod DESC;
+
+-- 6. Yearly Cotton Production Growth (Top 5 States)
+SELECT year, state_name, production_sum AS cotton_prod
+FROM state_year_crop_rollup
+WHERE crop_name = 'cotton'
+ORDER BY year, cotton_prod DESC
+LIMIT 5;
+
+-- 7. Top 5 Groundnut Production Districts (2020)
+SELECT dm.dist_name, ap.groundnut_production
+FROM agri_production ap
+JOIN district_master dm ON ap.dist_code = dm.dist_code
+WHERE ap.year = 2020
+ORDER BY ap.groundnut_production DESC
+LIMIT 5;
+
+-- 8. Annual Average Maize Yield Across Years
+SELECT year, SUM(yield_sum) / SUM(district_years) AS avg_maize_yield
+FROM state_year_crop_rollup
+WHERE crop_name = 'maize'
+GROUP BY year
+ORDER BY year;
+
+-- 9. Total Oilseeds Area by State
+SELECT state_name, SUM(area_sum) AS total_oilseed_area
+FROM state_year_crop_rollup
+WHERE crop_name = 'oilseeds'
+GROUP BY state_name
+ORDER BY total_oilseed_area DESC;
+
+-- 10. Top 10 Districts with Highest Rice Yield
+SELECT dist_name, MAX(yield_max) AS max_rice_yield
+FROM district_crop_rollup
+WHERE crop_name = 'rice'
+GROUP BY dist_name
+ORDER BY max_rice_yield DESC
+LIMIT 10;
+
+-- 11. Compare Maize Yield 2010 vs 2020 by State
+SELECT state_name,
+       SUM(CASE WHEN year=2010 THEN yield_sum ELSE 0 END) AS maize_yield_2010,
+       SUM(CASE WHEN year=2020 THEN yield_sum ELSE 0 END) AS maize_yield_2020,
+       (SUM(CASE WHEN year=2020 THEN yield_sum ELSE 0 END) - SUM(CASE WHEN year=2010 THEN yield_sum ELSE 0 END)) AS yield_growth
+FROM state_year_crop_rollup
+WHERE crop_name = 'maize' AND year BETWEEN 2010 AND 2020
+GROUP BY state_name
+ORDER BY yield_growth DESC;
@@ -0,0 +1,160 @@
+# Precomputed Growth and Ranking Analytics for the Agri-India Pipeline
+
+# GrowthIndex turns one row per (entity, year) - a district-year of the cleaned
+# frame, or a state-year after summing its districts - into a dense
+# column x entity x year array in one vectorized pass, and precomputes from it:
+#   cumulative   prefix sums over the years, so any year range's total is one subtraction
+#   cagr         each entity's compound annual growth from its first to its last reported year
+# Only the columns the caller ranks are indexed, and only these arrays are held
+# for all of them. The first top() of a query shape - a column, metric and year
+# range - sorts the entities once and keeps that order; later lookups of the
+# same shape, for any K or parent, are a slice of it. An entity's YoY growth,
+# per-year ranks and best years are computed from its own series when asked.
+
+# 📌 Stage 1: Import Required Libraries
+import numpy as np
+import pandas as pd
+
+# 📌 Stage 2: Growth Index
+top_metrics = ('total', 'max', 'growth', 'cagr')
+
+class GrowthIndex:
+    """Year series of value columns per entity, with prefix sums, CAGR and cached sorted orders."""
+
+    def __init__(self, frame, entity, columns, parent=None):
+        # frame holds one row per (parent, entity, year); a repeated row overwrites the earlier one.
+        self.entity = entity
+        self.parent = parent
+        self.columns = {column: position for position, column in enumerate(columns)}
+        keys = [parent, entity] if parent is not None else [entity]
+        entity_codes, entity_keys = pd.MultiIndex.from_frame(frame[keys]).factorize()
+        self.labels = entity_keys.get_level_values(-1).to_numpy(dtype=object)
+        self.parents = entity_keys.get_level_values(0).to_numpy(dtype=object) if parent is not None else None
+        self.positions = {key if parent is not None else key[0]: position for position, key in enumerate(entity_keys)}
+        self.years = np.sort(frame['year'].unique()).astype(int)
+        year_codes = np.searchsorted(self.years, frame['year'].to_numpy())
+
+        values = np.full((len(columns), len(entity_keys), len(self.years)), np.nan)
+        values[:, entity_codes, year_codes] = frame[list(columns)].to_numpy(dtype=float).T
+        self.values = values
+        present = ~np.isnan(values)
+
+        # Prefix sums with a leading zero: the total of years [lo, hi) is cumulative[..., hi] - cumulative[..., lo].
+        zeros = np.zeros(values.shape[:2] + (1,))
+        self.cumulative = np.concatenate([zeros, np.nancumsum(values, axis=2)], axis=2)
+        self.present_cumulative = np.concatenate([zeros.astype(np.int32), np.cumsum(present, axis=2, dtype=np.int32)], axis=2)
+
+        # CAGR from each entity's first to its last reported year.
+        self.cagr = np.full(values.shape[:2], np.nan)
+        if len(self.years):
+            first = np.argmax(present, axis=2)
+            last = len(self.years) - 1 - np.argmax(present[..., ::-1], axis=2)
+            first_value = np.take_along_axis(values, first[..., None], axis=2)[..., 0]
+            last_value = np.take_along_axis(values, last[..., None], axis=2)[..., 0]
+            self.cagr = compound_growth(first_value, last_value, self.years[last] - self.years[first])
+
+        # (column position, metric, start year, end year) -> (scores, entities with a score, largest first)
+        self.rankings = {}
+
+    def year_bounds(self, start_year=None, end_year=None):
+        """Returns the [lo, hi) year positions of a year range (the whole index by default)."""
+        lo = 0 if start_year is None else int(np.searchsorted(self.years, start_year, side='left'))
+        hi = len(self.years) if end_year is None else int(np.searchsorted(self.years, end_year, side='right'))
+        return lo, hi
+
+    def range_total(self, column, lo, hi):
+        """Returns each entity's total over the years [lo, hi); NaN where it has no value there."""
+        total = self.cumulative[column, ..., hi] - self.cumulative[column, ..., lo]
+        return np.where(self.present_cumulative[column, ..., hi] > self.present_cumulative[column, ..., lo], total, np.nan)
+
+    def range_max(self, column, lo, hi):
+        """Returns each entity's largest value over the years [lo, hi); NaN where it has no value there."""
+        window = self.values[column, ..., lo:hi]
+        missing = np.isnan(window)
+        if hi <= lo:
+            return np.full(window.shape[:-1], np.nan)
+        return np.where(missing.all(axis=-1), np.nan, np.where(missing, -np.inf, window).max(axis=-1))
+
+    def year_value(self, column, year):
+        """Returns every entity's value in one year (NaN when the year is not in the index)."""
+        position = int(np.searchsorted(self.years, year))
+        if position == len(self.years) or self.years[position] != year:
+            return np.full(len(self.labels), np.nan)
+        return self.values[column, :, position]
+
+    def metric(self, column, by, start_year=None, end_year=None):
+        """Returns one value per entity to rank by: 'total' or 'max' over a year range, or 'growth' or 'cagr' between its end years."""
+        if by == 'total':
+            return self.range_total(column, *self.year_bounds(start_year, end_year))
+        if by == 'max':
+            return self.range_max(column, *self.year_bounds(start_year, end_year))
+        if by == 'cagr' and start_year is None and end_year is None:
+            return self.cagr[column]
+        start_year = self.years[0] if start_year is None else start_year
+        end_year = self.years[-1] if end_year is None else end_year
+        start_value, end_value = self.year_value(column, start_year), self.year_value(column, end_year)
+        if by == 'growth':
+            return end_value - start_value
+        return compound_growth(start_value, end_value, end_year - start_year)
+
+    def ranking(self, position, by, start_year=None, end_year=None):
+        """Returns the scores of one query shape and its entities with a score, largest first, sorting them on first use."""
+        key = (position, by, start_year, end_year)
+        if key not in self.rankings:
+            scores = self.metric(position, by, start_year, end_year)
+            order = descending_order(scores)
+            self.rankings[key] = (scores, order[~np.isnan(scores[order])])
+        return self.rankings[key]
+
+    def top(self, column, k=10, by='total', start_year=None, end_year=None, within=None):
+        """Returns the k entities with the largest metric (see metric()), largest first, optionally within one parent."""
+        if by not in top_metrics:
+            raise ValueError(f"Unknown ranking metric '{by}'; expected one of {top_metrics}.")
+        scores, order = self.ranking(self.columns[column], by, start_year, end_year)
+        if within is not None:
+            order = order[self.parents[order] == within]
+        order = order[:k]
+        return pd.Series(scores[order], index=pd.Index(self.labels[order], name=self.entity), name=column)
+
+    def top_years(self, column, entity, k=10, parent=None):
+        """Returns an entity's k years with the largest values, largest first."""
+        values = self.values[self.columns[column], self.entity_position(entity, parent)]
+        order = descending_order(values)
+        order = order[~np.isnan(values[order])][:k]
+        return pd.Series(values[order], index=pd.Index(self.years[order], name='year'), name=column)
+
+    def profile(self, column, entity, parent=None):
+        """Returns an entity's value, YoY growth and rank for every year of the index."""
+        position, entity_position = self.columns[column], self.entity_position(entity, parent)
+        values = self.values[position]
+        series = values[entity_position]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            previous = np.concatenate([[np.nan], series[:-1]])
+            yoy_growth = np.where(previous > 0, series / previous - 1, np.nan)
+        # Rank 1 = largest in the year, ties to the earlier entity; 0 where the entity has no value.
+        above = (values > series).sum(axis=0) + (values[:entity_position] == series).sum(axis=0)
+        return pd.DataFrame({
+            column: series,
+            'yoy_growth': yoy_growth,
+            'rank': np.where(np.isnan(series), 0, above + 1)
+        }, index=pd.Index(self.years, name='year'))
+
+    def entity_position(self, entity, parent=None):
+        if self.parent is None:
+            return self.positions[entity]
+        if parent is not None:
+            return self.positions[(parent, entity)]
+        matches = np.flatnonzero(self.labels == entity)
+        if len(matches) != 1:
+            raise KeyError(f"{len(matches)} entities are named '{entity}'; pass the parent to pick one.")
+        return matches[0]
+
+def compound_growth(start_value, end_value, years):
+    """Returns the compound annual growth rate between two values years apart (NaN where undefined)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((start_value > 0) & (end_value >= 0) & (np.asarray(years) > 0),
+                        (end_value / start_value) ** (1 / np.maximum(years, 1)) - 1, np.nan)
+
+def descending_order(scores):
+    """Returns the positions that sort each row of scores largest first, NaNs last."""
+    return np.argsort(np.where(np.isnan(scores), np.inf, -scores), axis=-1, kind='stable')
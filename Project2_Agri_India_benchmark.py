@@ -0,0 +1,327 @@
+# Benchmark Suite for the Agri-India Pipeline
+
+# This module generates synthetic ICRISAT-shaped CSV files (the headers of the
+# Stage 4 rename map in Project2_Agri_India.py) at 1x/10x/100x the size of the
+# real district-level dataset, runs the pipeline script over them against a
+# fresh embedded database (or the MySQL server of the AGRI_DB_* settings), and
+# writes the timings of each scenario to a JSON file for regression tracking.
+# The pipeline script is imported and run through its 'all' step, and each
+# scenario is timed from the pipeline's own per-stage metrics:
+#   csv_parse           Stage 3 (load_csv)
+#   rename_validate     Stages 4-5.5 (rename_columns, validate_data)
+#   master_data_insert  Stage 7 (sync_master_data)
+#   production_insert   Stage 8 (load_production, including the rollup cubes)
+#   rollup_persist      Stage 8.7 (save_rollup_cubes)
+#   chart_aggregation   the Stage 10 planned groupbys, timed again on their own
+#   charts              Stage 10 (chart_aggregation and headless render_charts)
+# Each run also keeps those metrics (rows in/out, database round trips and, with
+# --trace-memory, the tracemalloc peak). After each run the rows in agri_production
+# are counted through a fresh connection; a run whose count differs from the rows
+# it loaded, whose ingest reported failed rows or whose pipeline step failed is
+# marked failed, and the suite then exits with status 1 (after writing the JSON).
+# On MySQL the count covers the whole table, so agri_production should start empty.
+# Usage:
+#   python Project2_Agri_India_benchmark.py --scales 1 10 --engines batched load_data
+
+# 📌 Stage 1: Import Required Libraries
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import Project2_Agri_India as agri_pipeline
+
+# 📌 Stage 2: Synthetic ICRISAT Data Generator
+# The real dataset covers 311 districts of 20 states over 1966-2017, one row per
+# district-year. A scale multiplies the number of districts (the states and years
+# stay the same). Every district grows a random subset of the crops; a crop it
+# does not grow is 0 in all its rows, as in the real file. Areas (1000 ha) and
+# yields (kg/ha) follow a per-district level with a yearly trend and noise, and
+# production (1000 t) is area x yield / 1000, so the rows pass the Stage 5.5
+# consistency rule. Missing values are spread per (row, crop): 'nan_rate' of them
+# are left empty and 'sentinel_rate' of them hold ICRISAT's -1 marker.
+ICRISAT_DISTRICTS = 311
+ICRISAT_YEARS = range(1966, 2018)
+ICRISAT_STATES = [
+    'Chhattisgarh', 'Madhya Pradesh', 'Gujarat', 'Maharashtra', 'Karnataka',
+    'Telangana', 'Andhra Pradesh', 'Tamil Nadu', 'Kerala', 'Odisha',
+    'West Bengal', 'Bihar', 'Jharkhand', 'Uttar Pradesh', 'Uttarakhand',
+    'Punjab', 'Haryana', 'Himachal Pradesh', 'Rajasthan', 'Assam'
+]
+CROP_GROWN_PROBABILITY = 0.7
+NAN_RATE = 0.02
+SENTINEL_RATE = 0.01
+
+def generate_icrisat_frame(scale=1, nan_rate=NAN_RATE, sentinel_rate=SENTINEL_RATE, seed=0):
+    """Returns a synthetic ICRISAT-shaped DataFrame with the raw CSV headers."""
+    rename_map = agri_pipeline.csv_column_rename_map
+    renamed_to_header = {renamed: header for header, renamed in rename_map.items()}
+    rng = np.random.default_rng(seed)
+    districts = ICRISAT_DISTRICTS * scale
+    years = np.array(ICRISAT_YEARS)
+    rows = districts * len(years)
+
+    dist_codes = np.repeat(np.arange(1, districts + 1), len(years))
+    state_codes = (dist_codes - 1) % len(ICRISAT_STATES) + 1
+    columns = {
+        'dist_code': dist_codes,
+        'year': np.tile(years, districts),
+        'state_code': state_codes,
+        'state_name': np.array(ICRISAT_STATES, dtype=object)[state_codes - 1],
+        'dist_name': np.char.add('District ', dist_codes.astype(str)).astype(object)
+    }
+    trend = np.tile(1 + 0.015 * (years - years[0]), districts)
+
+    def district_level(mean, sigma):
+        """Draws one lognormal level per district and repeats it over the years."""
+        return np.repeat(rng.lognormal(mean, sigma, districts), len(years))
+
+    def missing_mask(rate):
+        return rng.random(rows) < rate
+
+    measure_columns = [col for col in rename_map.values() if col.endswith(('_area', '_production', '_yield'))]
+    crops = [col[:-len('_yield')] for col in measure_columns if col.endswith('_yield')]
+    for crop in crops:
+        grown = np.repeat(rng.random(districts) < CROP_GROWN_PROBABILITY, len(years))
+        area = np.round(district_level(3.0, 1.2) * rng.uniform(0.8, 1.2, rows) * grown, 2)
+        crop_yield = np.round(district_level(7.5, 0.4) * trend * rng.uniform(0.85, 1.15, rows) * grown)
+        production = np.round(area * crop_yield / 1000, 2)
+        blank, sentinel = missing_mask(nan_rate), missing_mask(sentinel_rate)
+        for measure, values in (('area', area), ('production', production), ('yield', crop_yield)):
+            values = values.astype('float64')
+            values[blank] = np.nan
+            values[sentinel & ~blank] = -1
+            columns[f"{crop}_{measure}"] = values
+    area_only = [col for col in measure_columns if col.endswith('_area') and col[:-len('_area')] not in crops]
+    for col in area_only:
+        columns[col] = np.round(district_level(1.5, 1.0) * rng.uniform(0.8, 1.2, rows), 2)
+    if 'fruits_vegetables_area' in columns:
+        columns['fruits_vegetables_area'] = np.round(columns['fruits_area'] + columns['vegetables_area'], 2)
+    for col in area_only:
+        columns[col][missing_mask(nan_rate)] = np.nan
+
+    frame = pd.DataFrame(columns)[list(rename_map.values())]
+    return frame.rename(columns=renamed_to_header)
+
+def write_icrisat_csv(path, scale=1, nan_rate=NAN_RATE, sentinel_rate=SENTINEL_RATE, seed=0):
+    """Writes a synthetic ICRISAT CSV (reused when it already exists) and returns its row count."""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as csv_file:
+            return sum(1 for _ in csv_file) - 1
+    frame = generate_icrisat_frame(scale, nan_rate, sentinel_rate, seed)
+    frame.to_csv(f"{path}.tmp", index=False, float_format='%.2f')
+    os.replace(f"{path}.tmp", path)
+    return len(frame)
+
+# 📌 Stage 3: Pipeline Runner
+# Each run points the pipeline module at its own CSV, database file, checkpoint
+# and output directories by replacing its Stage 2.x settings, and puts the
+# originals back afterwards.
+stage_scenarios = {
+    'load_csv': 'csv_parse',
+    'rename_columns': 'rename_validate', 'validate_data': 'rename_validate',
+    'sync_master_data': 'master_data_insert',
+    'load_production': 'production_insert',
+    'save_rollup_cubes': 'rollup_persist',
+    'growth_analytics': 'charts', 'chart_aggregation': 'charts', 'render_charts': 'charts'
+}
+
+def count_loaded_rows():
+    """Returns the number of rows in agri_production, read through a new connection."""
+    conn = agri_pipeline.connect_mysql()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM agri_production")
+        (loaded_rows,) = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+    return int(loaded_rows)
+
+def run_pipeline(csv_path, work_dir, backend, engine, trace_memory=False, verbose=False):
+    """Runs the whole pipeline once and returns its per-stage timings, row counts and errors."""
+    settings = {
+        'file_path': csv_path,
+        'DB_BACKEND': backend,
+        'INGEST_ENGINE': engine,
+        'CSV_CHUNK_SIZE': None,
+        'PARALLEL_WORKERS': 1,
+        'USE_CLEANED_CACHE': False,
+        'ANALYSIS_ONLY': False,
+        'HEADLESS_CHARTS': True,
+        'CHART_OUTPUT_DIR': tempfile.mkdtemp(prefix="charts_", dir=work_dir),
+        'ROLLUP_CACHE_DIR': os.path.join(work_dir, "rollup_cache"),
+        'QUARANTINE_PATH': os.path.join(work_dir, "quarantine.csv"),
+        'PIPELINE_CHECKPOINT_PATH': os.path.join(work_dir, "checkpoint.json"),
+        'RUN_LAYOUT_BENCHMARK': False,
+        'RUN_ANALYTICAL_QUERIES': False,
+        'RUN_INDEX_BENCHMARK': False,
+        'INSTRUMENT_STAGES': True,
+        # tracemalloc slows the stages down, so it is only on when asked for.
+        'TRACE_MEMORY': trace_memory,
+        'METRICS_LOG_PATH': os.path.join(work_dir, "metrics.jsonl"),
+        'METRICS_PROMETHEUS_PATH': None
+    }
+    if backend != "mysql":
+        settings['EMBEDDED_DB_PATH'] = os.path.join(work_dir, f"benchmark.{backend}")
+        for path in (settings['EMBEDDED_DB_PATH'], f"{settings['EMBEDDED_DB_PATH']}.wal"):
+            if os.path.exists(path):
+                os.remove(path)
+    if os.path.exists(settings['QUARANTINE_PATH']):
+        os.remove(settings['QUARANTINE_PATH'])
+
+    saved_settings = {name: getattr(agri_pipeline, name) for name in settings}
+    output = io.StringIO()
+    state, step_error, loaded_rows = None, None, None
+    try:
+        for name, value in settings.items():
+            setattr(agri_pipeline, name, value)
+        with contextlib.redirect_stdout(output) if not verbose else contextlib.nullcontext():
+            try:
+                # Every run loads a fresh database, so there is no ingest to resume.
+                state = agri_pipeline.run_pipeline("all", resume=False)
+            except agri_pipeline.PipelineStepError as err:
+                step_error = str(err)
+        try:
+            loaded_rows = count_loaded_rows()
+        except agri_pipeline.mysql.connector.Error as err:
+            step_error = step_error or f"cannot count the loaded rows: {err}"
+    finally:
+        for name, value in saved_settings.items():
+            setattr(agri_pipeline, name, value)
+
+    metrics = agri_pipeline.pipeline_metrics
+    records = metrics.records
+    scenarios = {}
+    for record in records:
+        scenario = stage_scenarios.get(record.name)
+        if scenario is not None:
+            scenarios[scenario] = scenarios.get(scenario, 0.0) + record.wall_seconds
+    if state is not None:
+        started = time.perf_counter()
+        agri_pipeline.plan_chart_aggregates(state['df'], agri_pipeline.chart_aggregate_requests)
+        scenarios['chart_aggregation'] = time.perf_counter() - started
+
+    # The rows Stage 8 was given, i.e. the cleaned CSV rows that passed validation.
+    rows_expected = next((record.rows_in for record in records if record.name == "load_production"), None)
+    failed_rows = state['ingest_failed_rows'] if state is not None else None
+    failures = []
+    if step_error is not None:
+        failures.append(f"pipeline step failed: {step_error}")
+    if failed_rows:
+        failures.append(f"{failed_rows} rows failed to load")
+    if rows_expected is None or loaded_rows != rows_expected:
+        failures.append(f"agri_production holds {loaded_rows} rows, expected {rows_expected}")
+    validation_state = state['validation_state'] if state is not None else None
+    return {
+        'stage_seconds': {record.name: record.wall_seconds for record in records},
+        'scenario_seconds': scenarios,
+        'rows_expected': rows_expected,
+        'rows_loaded': loaded_rows,
+        'failed_rows': failed_rows,
+        'rows_quarantined': validation_state['rows_quarantined'] if validation_state else 0,
+        'stage_metrics': [record.as_dict() for record in records],
+        # Counted by the pipeline for every failed row, batch or load, printed or not.
+        'errors': {category: entry['count'] for category, entry in metrics.errors.items()},
+        'error_lines': [line for line in output.getvalue().splitlines() if line.startswith("❌")],
+        'failures': failures,
+        'failed': bool(failures)
+    }
+
+# 📌 Stage 4: Scenarios and JSON Results
+def git_revision():
+    """Returns the short commit hash of the checkout, or None outside a git repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(agri_pipeline.__file__),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scales, engines, backend, repeats, work_dir, nan_rate, sentinel_rate, seed,
+                   trace_memory=False, verbose=False):
+    """Runs every (scale, engine) scenario 'repeats' times and returns the results document."""
+    results = []
+    for scale in scales:
+        csv_path = os.path.join(work_dir, f"icrisat_{scale}x_seed{seed}_nan{nan_rate}_sentinel{sentinel_rate}.csv")
+        started = time.perf_counter()
+        csv_rows = write_icrisat_csv(csv_path, scale, nan_rate, sentinel_rate, seed)
+        print(f"ℹ️ {scale}x: {csv_rows} rows, {os.path.getsize(csv_path) / 1e6:.1f} MB "
+              f"(generated in {time.perf_counter() - started:.1f} s).")
+        for engine in engines:
+            runs = [run_pipeline(csv_path, work_dir, backend, engine, trace_memory, verbose) for _ in range(repeats)]
+            scenario_names = dict.fromkeys(scenario for run in runs for scenario in run['scenario_seconds'])
+            best = {scenario: min(run['scenario_seconds'][scenario] for run in runs if scenario in run['scenario_seconds'])
+                    for scenario in scenario_names}
+            results.append({
+                'scale': scale,
+                'csv_rows': csv_rows,
+                'csv_bytes': os.path.getsize(csv_path),
+                'engine': engine,
+                'best_seconds': best,
+                'rows_per_second': {scenario: csv_rows / seconds if seconds > 0 else None
+                                    for scenario, seconds in best.items()},
+                'failed': any(run['failed'] for run in runs),
+                'runs': runs
+            })
+            errors = sum(sum(run['errors'].values()) for run in runs)
+            print(f"   {engine}: " + ", ".join(f"{scenario} {seconds:.2f} s" for scenario, seconds in best.items())
+                  + (f" ⚠️ {errors} errors" if errors else ""))
+            for run in runs:
+                for failure in run['failures']:
+                    print(f"❌ {scale}x {engine}: {failure}")
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'backend': backend,
+        'repeats': repeats,
+        'nan_rate': nan_rate,
+        'sentinel_rate': sentinel_rate,
+        'seed': seed,
+        'results': results
+    }
+
+def main(argv=None):
+    """Runs the benchmark suite; returns 1 when a run failed its row count check, else 0."""
+    parser = argparse.ArgumentParser(description="Benchmarks the Agri-India pipeline on synthetic ICRISAT data.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                        help="multiples of the real dataset's 311 districts (default: 1 10; 100 is about 1.6M rows)")
+    parser.add_argument('--engines', nargs='+', default=['batched', 'load_data'],
+                        choices=['row', 'batched', 'load_data', 'incremental'], help="Stage 8 ingest engines to run")
+    parser.add_argument('--backend', default='duckdb', choices=['duckdb', 'sqlite', 'mysql'],
+                        help="database to load (mysql uses the AGRI_DB_* connection settings)")
+    parser.add_argument('--repeats', type=int, default=1, help="runs per scenario; the best time is reported")
+    parser.add_argument('--nan-rate', type=float, default=NAN_RATE, help="share of crop values left empty")
+    parser.add_argument('--sentinel-rate', type=float, default=SENTINEL_RATE, help="share of crop values set to -1")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="where the CSVs and databases go (default: a temporary directory)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--trace-memory', action='store_true', help="record each stage's tracemalloc peak (slower)")
+    parser.add_argument('--verbose', action='store_true', help="show the pipeline's own output")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix="agri_benchmark_"))
+        os.makedirs(work_dir, exist_ok=True)
+        document = run_benchmarks(args.scales, args.engines, args.backend, args.repeats, work_dir,
+                                  args.nan_rate, args.sentinel_rate, args.seed, args.trace_memory, args.verbose)
+    with open(args.output, 'w', encoding='utf-8') as results_file:
+        json.dump(document, results_file, indent=2)
+    failed = [f"{result['scale']}x {result['engine']}" for result in document['results'] if result['failed']]
+    if failed:
+        print(f"❌ Benchmark results written to {args.output}, but these runs failed: {', '.join(failed)}.")
+        return 1
+    print(f"✅ Benchmark results written to {args.output}.")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
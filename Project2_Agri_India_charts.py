@@ -0,0 +1,315 @@
+# Agri-India Chart Rendering
+
+# This module holds the Stage 10 charts of 'Project2_Agri_India.py' as plain
+# functions: each takes its already-aggregated data and returns a matplotlib or
+# plotly figure. The main script either shows the figures one by one (original
+# interactive behaviour) or, in headless mode, writes them all to an output
+# directory in parallel across a process pool.
+# Importing this module has no side effects, so pool workers can load it
+# without re-running the data pipeline.
+
+import hashlib
+import importlib.metadata
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+# 📌 Plot Style
+def apply_plot_style():
+    """Applies the seaborn style and default figure size shared by all charts."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (10, 6) # Default figure size
+
+
+# 📌 Chart Definitions
+# One function per chart, in the order of Stage 10.
+
+# 1. Top 7 Rice Producing States (Seaborn Bar Plot)
+def render_rice_states(rice_state):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=rice_state.values, y=rice_state.index, palette="YlGn_r") # _r reverses the colormap
+    plt.title("Top 7 Rice Producing States")
+    plt.xlabel("Rice Production (1000 tons)")
+    plt.ylabel("State Name")
+    plt.tight_layout()
+    return fig
+
+# 2. Top 5 Wheat Producing States (Seaborn Bar & Plotly Pie)
+def render_wheat_states(wheat_state):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=wheat_state.values, y=wheat_state.index, palette="Oranges_r")
+    plt.title("Top 5 Wheat Producing States")
+    plt.xlabel("Wheat Production (1000 tons)")
+    plt.ylabel("State Name")
+    plt.tight_layout()
+    return fig
+
+# Plotly Pie Chart for Wheat Production Share
+def render_wheat_share_pie(wheat_state):
+    import plotly.express as px
+    return px.pie(values=wheat_state.values, names=wheat_state.index,
+                  title="Wheat Production Share (%)",
+                  color_discrete_sequence=px.colors.sequential.Oranges_r)
+
+# 3. Oilseed Production — Top 5 States (Seaborn Bar Plot)
+def render_oilseed_states(oil_state):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=oil_state.values, y=oil_state.index, palette='Blues_r')
+    plt.title("Top 5 Oilseed Producing States")
+    plt.xlabel("Production (1000 tons)")
+    plt.ylabel("State Name")
+    plt.tight_layout()
+    return fig
+
+# 4. Sunflower Production — Top 7 States (Plotly Horizontal Bar)
+def render_sunflower_states(sunflower_top_states):
+    import plotly.express as px
+    fig_sunflower = px.bar(sunflower_top_states, x='sunflower_production', y='state_name', orientation='h',
+                           title="Top 7 Sunflower Producing States",
+                           color='state_name', # Color by state for distinction
+                           color_discrete_sequence=px.colors.sequential.Viridis)
+    fig_sunflower.update_layout(yaxis_title="State Name", xaxis_title="Sunflower Production (1000 tons)")
+    return fig_sunflower
+
+# 5. Sugarcane Production Over Time (Seaborn Line Plot)
+def render_sugarcane_trend(sugarcane_trend):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.lineplot(data=sugarcane_trend, x='year', y='sugarcane_production', marker='o', color='green')
+    plt.title("Sugarcane Production Trend Over Time")
+    plt.xlabel("Year")
+    plt.ylabel("Sugarcane Production (1000 tons)")
+    plt.tight_layout()
+    return fig
+
+# 6. Rice vs Wheat Production Trend (Seaborn Line Plot)
+def render_rice_wheat_trend(rice_wheat_trend):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.lineplot(data=rice_wheat_trend, x='year', y='rice_production', label='Rice', marker='o', color='teal')
+    sns.lineplot(data=rice_wheat_trend, x='year', y='wheat_production', label='Wheat', marker='o', color='darkgoldenrod')
+    plt.title("Rice vs Wheat Production Trend")
+    plt.xlabel("Year")
+    plt.ylabel("Production (1000 tons)")
+    plt.legend()
+    plt.tight_layout()
+    return fig
+
+# 7. District-wise Rice Production — West Bengal (Seaborn Bar Plot)
+def render_wb_rice_districts(wb_rice_production):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=wb_rice_production.values, y=wb_rice_production.index, palette="Greens_r")
+    plt.title("Rice Production — Top Districts (West Bengal)")
+    plt.xlabel("Rice Production (1000 tons)")
+    plt.ylabel("District Name")
+    plt.tight_layout()
+    return fig
+
+# 8. Top 10 Wheat Production Years — Uttar Pradesh (Seaborn Bar Plot)
+def render_up_wheat_years(up_wheat_by_year):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=up_wheat_by_year.values, y=up_wheat_by_year.index, palette='Oranges_r')
+    plt.title("Top 10 Wheat Production Years — Uttar Pradesh")
+    plt.xlabel("Wheat Production (1000 tons)")
+    plt.ylabel("Year")
+    plt.tight_layout()
+    return fig
+
+# 9. Finger Millet Production Trend (Seaborn Line Plot)
+def render_fingermillet_trend(fingermillet_trend):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.lineplot(data=fingermillet_trend, x='year', y='fingermillet_production', marker='o', color='purple')
+    plt.title("Finger Millet Production Trend Over Time")
+    plt.xlabel("Year")
+    plt.ylabel("Finger Millet Production (1000 tons)")
+    plt.tight_layout()
+    return fig
+
+# 10. Sorghum Production — Top 7 States (Plotly Bar Plot)
+def render_sorghum_states(sorghum_top_states):
+    import plotly.express as px
+    fig_sorghum = px.bar(sorghum_top_states, x='state_name', y='sorghum_production',
+                         title="Top 7 Sorghum Producing States",
+                         color='state_name', # Color by state for distinction
+                         color_discrete_sequence=px.colors.qualitative.Pastel)
+    fig_sorghum.update_layout(xaxis_title="State Name", yaxis_title="Sorghum Production (1000 tons)")
+    return fig_sorghum
+
+# 11. Groundnut Production — Top 7 States (Seaborn Bar Plot)
+def render_groundnut_states(groundnut_top_states):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=groundnut_top_states.values, y=groundnut_top_states.index, palette='Purples_r')
+    plt.title("Top 7 Groundnut Producing States")
+    plt.xlabel("Groundnut Production (1000 tons)")
+    plt.ylabel("State Name")
+    plt.tight_layout()
+    return fig
+
+# 12. Soybean Production vs Yield Efficiency (Plotly Scatter Plot)
+def render_soybean_yield_vs_production(top_5_soybean_states):
+    import plotly.express as px
+    return px.scatter(top_5_soybean_states, x='soybean_yield', y='soybean_production',
+                      size='soybean_production', # Size of marker based on production
+                      hover_name='state_name', # Show state name on hover
+                      title="Top 5 Soybean States — Yield vs Production",
+                      labels={'soybean_yield': 'Soybean Yield (Kg per ha)',
+                              'soybean_production': 'Soybean Production (1000 tons)'},
+                      color='state_name', # Color points by state
+                      color_discrete_sequence=px.colors.qualitative.Set2)
+
+# 13. Area Cultivated vs Production (Rice, Wheat, Maize) — Seaborn Scatter Plot
+def render_area_vs_production(area_production):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.scatterplot(x='rice_area', y='rice_production', data=area_production, label='Rice', alpha=0.6, color='blue')
+    sns.scatterplot(x='wheat_area', y='wheat_production', data=area_production, label='Wheat', alpha=0.6, color='red')
+    sns.scatterplot(x='maize_area', y='maize_production', data=area_production, label='Maize', alpha=0.6, color='green')
+    plt.title("Area vs Production — Rice, Wheat, Maize")
+    plt.xlabel("Area (1000 ha)")
+    plt.ylabel("Production (1000 tons)")
+    plt.legend()
+    plt.tight_layout()
+    return fig
+
+# 14. Top 10 Districts by Rice Yield (Seaborn Bar Plot)
+def render_rice_yield_districts(top_rice_yield_districts):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.barplot(x=top_rice_yield_districts.values, y=top_rice_yield_districts.index, palette="YlGnBu_r")
+    plt.title("Top 10 Districts by Rice Yield")
+    plt.xlabel("Rice Yield (Kg per ha)")
+    plt.ylabel("District Name")
+    plt.tight_layout()
+    return fig
+
+# Chart name -> render function. The names are also the output file names.
+chart_renderers = {
+    '01_rice_states': render_rice_states,
+    '02_wheat_states': render_wheat_states,
+    '02_wheat_share_pie': render_wheat_share_pie,
+    '03_oilseed_states': render_oilseed_states,
+    '04_sunflower_states': render_sunflower_states,
+    '05_sugarcane_trend': render_sugarcane_trend,
+    '06_rice_wheat_trend': render_rice_wheat_trend,
+    '07_wb_rice_districts': render_wb_rice_districts,
+    '08_up_wheat_years': render_up_wheat_years,
+    '09_fingermillet_trend': render_fingermillet_trend,
+    '10_sorghum_states': render_sorghum_states,
+    '11_groundnut_states': render_groundnut_states,
+    '12_soybean_yield_vs_production': render_soybean_yield_vs_production,
+    '13_area_vs_production': render_area_vs_production,
+    '14_rice_yield_districts': render_rice_yield_districts
+}
+
+
+# 📌 Interactive Rendering
+def show_charts(chart_data):
+    """Renders each chart and shows it, blocking until the window is closed (original behaviour)."""
+    import matplotlib.pyplot as plt
+    apply_plot_style()
+    for name, data in chart_data.items():
+        fig = chart_renderers[name](data)
+        if hasattr(fig, 'savefig'):
+            plt.show()
+        else:
+            fig.show()
+
+
+# 📌 Headless Rendering
+# Bump when a chart function's output changes (title, colours, layout), so the
+# charts recorded in the manifest are drawn again.
+chart_renderer_version = 1
+
+def renderer_fingerprint(plotly_format):
+    """Returns what decides a chart file besides its data: the renderer and plotting library versions and the Plotly format."""
+    versions = []
+    for package in ("matplotlib", "seaborn", "plotly"):
+        try:
+            versions.append(f"{package}={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f"{package}=none")
+    return ";".join([f"renderer={chart_renderer_version}", f"plotly_format={plotly_format}"] + versions)
+
+def fingerprint_chart_data(data, renderer=""):
+    """Returns a stable hash of a chart's input Series/DataFrame and its renderer fingerprint."""
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.sha256(renderer.encode("utf-8") + hashed.tobytes()).hexdigest()
+
+def render_chart_to_file(name, data, output_dir, plotly_format="html"):
+    """Renders one chart with the Agg backend and writes it to output_dir; returns the file path."""
+    import matplotlib
+    matplotlib.use("Agg") # No display needed, and nothing blocks
+    import matplotlib.pyplot as plt
+    apply_plot_style()
+    fig = chart_renderers[name](data)
+    if hasattr(fig, 'savefig'):
+        output_path = os.path.join(output_dir, f"{name}.png")
+        fig.savefig(output_path, dpi=100)
+        plt.close(fig)
+    elif plotly_format == "html":
+        output_path = os.path.join(output_dir, f"{name}.html")
+        fig.write_html(output_path, include_plotlyjs="cdn")
+    else:
+        # Static Plotly export needs the optional 'kaleido' package.
+        output_path = os.path.join(output_dir, f"{name}.{plotly_format}")
+        fig.write_image(output_path)
+    return output_path
+
+def render_charts_to_dir(chart_data, output_dir, workers=None, plotly_format="html"):
+    """Writes every chart to output_dir, skipping charts whose data, renderer and file are unchanged since the last run."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "chart_manifest.json")
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+
+    renderer = renderer_fingerprint(plotly_format)
+    fingerprints = {name: fingerprint_chart_data(data, renderer) for name, data in chart_data.items()}
+    # A chart is drawn again when its fingerprint changed or its file was deleted.
+    stale = [name for name in chart_data
+             if manifest.get(name, {}).get('fingerprint') != fingerprints[name]
+             or not os.path.isfile(manifest[name].get('path', ''))]
+    skipped = len(chart_data) - len(stale)
+
+    # Workers are spawned, not forked: the pipeline calls this while its RSS sampler
+    # thread (and any database driver threads) are running, and a forked child
+    # inherits locks those threads may hold. Spawn imports the main script again in
+    # every worker, which is safe now that its pipeline only runs from its command line.
+    if stale and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            paths = list(executor.map(render_chart_to_file, stale, [chart_data[name] for name in stale],
+                                      [output_dir] * len(stale), [plotly_format] * len(stale)))
+    else:
+        paths = [render_chart_to_file(name, chart_data[name], output_dir, plotly_format) for name in stale]
+
+    for name, path in zip(stale, paths):
+        manifest[name] = {'fingerprint': fingerprints[name], 'path': path}
+    with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return stale, skipped
@@ -0,0 +1,71 @@
+# Step Checkpoints for the Agri-India Pipeline
+
+# The CLI steps of Project2_Agri_India.py (load, sync-masters, ingest, report)
+# record their progress in one small JSON file, so each step can run in its own
+# process and an ingest that crashed part-way resumes from its last committed
+# batch instead of sending every row again. The checkpoint belongs to one input:
+# it stores the CSV's size and modification time and the Stage 5.5 settings, and
+# a checkpoint written for any other input is ignored (and replaced on the next
+# update), since its row offsets would point into a different cleaned frame.
+# The cleaned frame itself is checkpointed by the cleaned cache of Stage 3.
+
+# 📌 Stage 1: Import Required Libraries
+import json
+import os
+import threading
+import time
+
+# 📌 Stage 2: Pipeline Checkpoint
+def describe_source(source_path, settings):
+    """Returns the identity a checkpoint is recorded against: the CSV's size and mtime and the validation settings."""
+    source_stat = os.stat(source_path)
+    return {
+        'path': os.path.abspath(source_path),
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'settings': settings
+    }
+
+class PipelineCheckpoint:
+    """The progress of each pipeline step for one input, written atomically after every update."""
+
+    def __init__(self, path, source, enabled=True):
+        self.path = path if enabled else None
+        self.source = source
+        self.steps = {}
+        self.lock = threading.Lock() # The parallel loader records partitions from several threads
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as checkpoint_file:
+                stored = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return # Unreadable: started afresh and overwritten on the next update
+        if stored.get('source') == source:
+            self.steps = stored.get('steps', {})
+
+    def step(self, name):
+        """Returns a copy of the recorded progress of a step ({} if it has none)."""
+        with self.lock:
+            return dict(self.steps.get(name, {}))
+
+    def update(self, name, **fields):
+        """Merges fields into a step's progress and writes the checkpoint."""
+        with self.lock:
+            progress = self.steps.setdefault(name, {})
+            progress.update(fields, updated_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+            self.write()
+
+    def reset(self, name, **fields):
+        """Replaces a step's progress with fields (a fresh start of that step)."""
+        with self.lock:
+            self.steps[name] = {}
+        self.update(name, **fields)
+
+    def write(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as checkpoint_file:
+            json.dump({'source': self.source, 'steps': self.steps}, checkpoint_file, indent=2)
+        os.replace(f"{self.path}.tmp", self.path) # A crash mid-write leaves the previous checkpoint intact
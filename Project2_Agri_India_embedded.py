@@ -0,0 +1,339 @@
+# Embedded Database Backend for the Agri-India Loader
+
+# This module lets Project2_Agri_India.py run against an embedded DuckDB or SQLite
+# database file instead of a MySQL server. connect_embedded() returns a connection
+# that offers the part of the mysql.connector API the script uses (cursor(),
+# execute()/executemany() with '%s' placeholders, fetchall(), commit(), rollback(),
+# is_connected(), close()) and raises mysql.connector.Error, so the loader's error
+# handling is unchanged. translate_mysql_sql() is the dialect shim: the 11
+# analytical queries are plain SQL and pass through untouched, and only the
+# MySQL-only syntax the loader sends is rewritten.
+
+# 📌 Stage 1: Import Required Libraries
+# duckdb is imported only when the DuckDB backend is used.
+import re
+import sqlite3
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+EMBEDDED_DIALECTS = ("duckdb", "sqlite")
+
+# 📌 Stage 2: Schema From the SQL Script
+# The embedded schema is built from the CREATE TABLE / CREATE VIEW statements of
+# Stage 2 in Project2_Agri_India.sql, so there is one schema definition for all
+# backends. Statements are made idempotent (IF NOT EXISTS) rather than preceded
+# by the script's DROPs, so data in an existing database file is kept between runs.
+# Foreign keys are left out: DuckDB cannot update or delete rows that a foreign
+# key points at, and the loader already inserts master rows before their users.
+def read_schema_statements(sql_path):
+    """Returns the CREATE TABLE and CREATE VIEW statements of the SQL script's schema stage."""
+    with open(sql_path, encoding='utf-8') as sql_file:
+        script = sql_file.read()
+    script = script.split("📌 Stage 3", 1)[0]
+    script = "\n".join(line for line in script.splitlines() if not line.lstrip().startswith("--"))
+    return [statement.strip() for statement in script.split(";")
+            if re.match(r"\s*CREATE\s+(TABLE|VIEW)\b", statement, re.IGNORECASE)]
+
+def read_primary_keys(statements):
+    """Returns {table: 'key columns'} for the tables created by the schema statements."""
+    primary_keys = {}
+    for statement in statements:
+        table = re.match(r"CREATE\s+TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)", statement, re.IGNORECASE)
+        if not table:
+            continue
+        composite_key = re.search(r"PRIMARY KEY\s*\(([^)]*)\)", statement, re.IGNORECASE)
+        column_key = re.search(r"^\s*(\w+)\s+\w+(?:\(\d+\))?[^,\n]*\bPRIMARY KEY\b", statement,
+                               re.IGNORECASE | re.MULTILINE)
+        if composite_key:
+            primary_keys[table.group(1)] = composite_key.group(1).strip()
+        elif column_key:
+            primary_keys[table.group(1)] = column_key.group(1)
+    return primary_keys
+
+def read_secondary_indexes(statements, table_name):
+    """Returns {index_name: 'columns'} for the KEY lines of one table's CREATE TABLE statement."""
+    for statement in statements:
+        table = re.match(r"CREATE\s+TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)", statement, re.IGNORECASE)
+        if table and table.group(1) == table_name:
+            return dict(re.findall(r"^\s*KEY\s+(\w+)\s*\(([^)]*)\)", statement, re.IGNORECASE | re.MULTILINE))
+    return {}
+
+# 📌 Stage 3: MySQL Dialect Shim
+# Rewrites, per statement:
+#   %s placeholders                         -> ?
+#   INSERT IGNORE                           -> INSERT OR IGNORE
+#   ON DUPLICATE KEY UPDATE c=VALUES(c)     -> ON CONFLICT (primary key) DO UPDATE SET c=excluded.c
+#   BIGINT UNSIGNED                         -> UBIGINT (DuckDB) / TEXT (SQLite has no unsigned 64-bit integers)
+#   CREATE TABLE / VIEW                     -> ... IF NOT EXISTS
+#   AUTO_INCREMENT PRIMARY KEY              -> a sequence default (DuckDB) / AUTOINCREMENT (SQLite)
+#   KEY name (columns) inside CREATE TABLE  -> a separate CREATE INDEX
+#   DROP INDEX name ON table                -> DROP INDEX IF EXISTS name
+#   EXPLAIN                                 -> EXPLAIN QUERY PLAN (SQLite)
+# One MySQL statement can become several, so a list is returned.
+def translate_mysql_sql(sql, dialect, primary_keys):
+    """Rewrites one MySQL statement into a list of statements for an embedded dialect."""
+    sql = sql.replace("%s", "?")
+    sql = re.sub(r"\bINSERT\s+IGNORE\s+INTO\b", "INSERT OR IGNORE INTO", sql, flags=re.IGNORECASE)
+    upsert = re.search(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", sql, re.IGNORECASE | re.DOTALL)
+    if upsert:
+        table = re.search(r"\bINSERT\s+INTO\s+(\w+)", sql, re.IGNORECASE).group(1)
+        assignments = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", upsert.group(1), flags=re.IGNORECASE)
+        sql = (f"{sql[:upsert.start()]}ON CONFLICT ({primary_keys[table]}) DO UPDATE SET{assignments}")
+    sql = re.sub(r"\bDROP\s+INDEX\s+(\w+)\s+ON\s+\w+", r"DROP INDEX IF EXISTS \1", sql, flags=re.IGNORECASE)
+    if dialect == "sqlite":
+        sql = re.sub(r"^\s*EXPLAIN\b", "EXPLAIN QUERY PLAN", sql, count=1, flags=re.IGNORECASE)
+    sql = re.sub(r"\bBIGINT\s+UNSIGNED\b", "UBIGINT" if dialect == "duckdb" else "TEXT", sql, flags=re.IGNORECASE)
+
+    create_table = re.match(r"\s*CREATE\s+TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)\s*\(", sql, re.IGNORECASE)
+    if re.match(r"\s*CREATE\s+VIEW\s+(?!IF NOT EXISTS)", sql, re.IGNORECASE):
+        sql = re.sub(r"CREATE\s+VIEW\s+", "CREATE VIEW IF NOT EXISTS ", sql, count=1, flags=re.IGNORECASE)
+    if not create_table:
+        return [sql]
+
+    table = create_table.group(1)
+    statements = []
+    sql = re.sub(r"CREATE\s+TABLE\s+(?:IF NOT EXISTS\s+)?", "CREATE TABLE IF NOT EXISTS ", sql,
+                 count=1, flags=re.IGNORECASE)
+    auto_increment = re.search(r"\b(\w+)\s+INT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", sql, re.IGNORECASE)
+    if auto_increment and dialect == "duckdb":
+        sequence = f"{table}_{auto_increment.group(1)}_seq"
+        statements.append(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+        sql = sql.replace(auto_increment.group(0),
+                          f"{auto_increment.group(1)} INTEGER PRIMARY KEY DEFAULT nextval('{sequence}')")
+    elif auto_increment:
+        sql = sql.replace(auto_increment.group(0), f"{auto_increment.group(1)} INTEGER PRIMARY KEY AUTOINCREMENT")
+    index_statements = [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+        for name, columns in re.findall(r"^\s*KEY\s+(\w+)\s*\(([^)]*)\)\s*,?\s*$", sql, re.IGNORECASE | re.MULTILINE)]
+    sql = re.sub(r"^\s*(KEY\s+\w+|FOREIGN\s+KEY)\s*\(.*$\n?", "", sql, flags=re.IGNORECASE | re.MULTILINE)
+    sql = re.sub(r",\s*\)\s*$", "\n)", sql.rstrip())
+    return statements + [sql] + index_statements
+
+# 📌 Stage 4: Connection and Cursor Wrappers
+# Like mysql.connector (autocommit off), the first statement after a commit or
+# rollback opens a transaction that lasts until the next commit() or rollback().
+# All cursors of a connection share it, as they do in MySQL.
+# A failed statement undoes only its own changes, as in MySQL, and the transaction
+# stays open. SQLite runs each statement under a savepoint. DuckDB aborts the whole
+# transaction on any error and has no savepoints, so the connection keeps a journal
+# of the transaction's statements: after a failure it rolls back and replays them.
+class EmbeddedConnection:
+    """A DuckDB or SQLite connection behind the mysql.connector calls used by the loader."""
+
+    def __init__(self, dialect, raw_connection, engine_error, primary_keys):
+        self.dialect = dialect
+        self.raw = raw_connection
+        self.engine_error = engine_error
+        self.primary_keys = primary_keys
+        self.in_transaction = False
+        self.journal = [] # DuckDB: the statements of the open transaction, for replay
+        self.connected = True
+
+    def cursor(self):
+        return EmbeddedCursor(self)
+
+    def begin(self):
+        if not self.in_transaction:
+            self.raw.execute("BEGIN TRANSACTION")
+            self.in_transaction = True
+            self.journal = []
+
+    def commit(self):
+        if self.in_transaction:
+            self.journal = []
+            try:
+                self.run(lambda: self.raw.execute("COMMIT"))
+            finally:
+                self.in_transaction = False
+
+    def rollback(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.journal = []
+            self.run(lambda: self.raw.execute("ROLLBACK"))
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self):
+        if self.connected:
+            self.rollback()
+            self.raw.close()
+            self.connected = False
+
+    def run(self, operation):
+        """Runs a database call, re-raising engine errors as mysql.connector.Error."""
+        try:
+            return operation()
+        except self.engine_error as err:
+            raise mysql.connector.Error(msg=str(err)) from err
+
+    def statement(self, operation):
+        """Runs one statement in the open transaction; if it fails, only its own changes are undone."""
+        self.begin()
+        if self.dialect == "sqlite":
+            self.raw.execute("SAVEPOINT agri_statement")
+            try:
+                result = operation()
+            except self.engine_error as err:
+                self.raw.execute("ROLLBACK TO agri_statement")
+                self.raw.execute("RELEASE agri_statement")
+                raise mysql.connector.Error(msg=str(err)) from err
+            self.raw.execute("RELEASE agri_statement")
+            return result
+        try:
+            result = operation()
+        except self.engine_error as err:
+            self.replay_transaction()
+            raise mysql.connector.Error(msg=str(err)) from err
+        self.journal.append(operation)
+        return result
+
+    def replay_transaction(self):
+        """Rolls back DuckDB's aborted transaction and reruns the statements that had succeeded in it."""
+        journal = self.journal
+        self.rollback()
+        self.begin()
+        try:
+            for operation in journal:
+                operation()
+        except self.engine_error as err:
+            self.rollback()
+            raise mysql.connector.Error(
+                msg=f"The open transaction was rolled back (replaying it after a failed statement failed: {err})") from err
+        self.journal = journal
+
+    def load_frame(self, table, frame, replace=False):
+        """Inserts a frame's rows (INSERT OR IGNORE), or replaces the table's rows, in the open transaction."""
+        columns = ", ".join(frame.columns)
+        if replace:
+            self.statement(lambda: self.raw.execute(f"DELETE FROM {table}"))
+        if self.dialect == "duckdb":
+            # DuckDB scans the DataFrame's column buffers directly: no per-row Python work.
+            self.statement(lambda: self.insert_registered_frame(
+                f"INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM agri_load_frame",
+                "agri_load_frame", frame))
+        else:
+            rows = [sqlite_parameters(row) for row in frame.itertuples(index=False, name=None)]
+            self.statement(lambda: self.raw.executemany(
+                f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({', '.join(['?'] * len(frame.columns))})", rows))
+        return len(frame)
+
+    def insert_registered_frame(self, sql, view_name, frame):
+        """Runs a DuckDB statement that reads a DataFrame registered as view_name."""
+        self.raw.register(view_name, frame)
+        try:
+            return self.raw.execute(sql)
+        finally:
+            self.raw.unregister(view_name)
+
+def sqlite_parameters(row):
+    """Converts NumPy scalars to Python values and unsigned 64-bit integers to text for SQLite."""
+    values = []
+    for value in row:
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, int) and value > 0x7FFFFFFFFFFFFFFF:
+            value = str(value)
+        values.append(value)
+    return values
+
+# An executemany() of 'INSERT ... VALUES (?, ...)' plus an optional conflict clause.
+insert_values_pattern = re.compile(
+    r"^\s*(INSERT\s+(?:OR\s+IGNORE\s+)?INTO\s+\w+\s*\(([^)]*)\))\s*VALUES\s*\([?,\s]*\)(.*)$",
+    re.IGNORECASE | re.DOTALL)
+
+class EmbeddedCursor:
+    """A cursor over an EmbeddedConnection; statements are translated before they run."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.rowcount = -1
+        self.description = None
+
+    def execute(self, sql, params=None):
+        connection = self.connection
+        statements = translate_mysql_sql(sql, connection.dialect, connection.primary_keys)
+        for statement in statements[:-1]:
+            connection.statement(lambda statement=statement: connection.raw.execute(statement))
+        if connection.dialect == "sqlite" and params is not None:
+            params = sqlite_parameters(params)
+        if params is None:
+            result = connection.statement(lambda: connection.raw.execute(statements[-1]))
+        else:
+            params = list(params)
+            result = connection.statement(lambda: connection.raw.execute(statements[-1], params))
+        self.description = result.description if self.returns_rows(result) else None
+        self.rows = connection.run(result.fetchall) if self.description else []
+        self.rowcount = len(self.rows) if self.rows else getattr(result, 'rowcount', -1)
+
+    def executemany(self, sql, seq_of_params):
+        connection = self.connection
+        rows = list(seq_of_params)
+        self.rows = []
+        self.description = None
+        self.rowcount = len(rows)
+        if not rows:
+            return
+        statement = translate_mysql_sql(sql, connection.dialect, connection.primary_keys)[-1]
+        insert = insert_values_pattern.match(statement)
+        if connection.dialect == "duckdb" and insert:
+            # DuckDB runs an executemany() row by row; an INSERT of the same rows as
+            # one DataFrame scan is a single vectorized statement instead.
+            insert_head, columns, conflict_clause = insert.groups()
+            batch = pd.DataFrame(rows, columns=[col.strip() for col in columns.split(",")])
+            connection.statement(lambda: connection.insert_registered_frame(
+                f"{insert_head} SELECT * FROM agri_batch {conflict_clause}", "agri_batch", batch))
+        elif connection.dialect == "sqlite":
+            parameters = [sqlite_parameters(row) for row in rows]
+            connection.statement(lambda: connection.raw.executemany(statement, parameters))
+        else:
+            parameters = [list(row) for row in rows]
+            connection.statement(lambda: connection.raw.executemany(statement, parameters))
+
+    def returns_rows(self, result):
+        description = getattr(result, 'description', None)
+        return description is not None and len(description) > 0
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        self.rows = []
+
+# 📌 Stage 5: Connect
+def connect_embedded(dialect, db_path, sql_path):
+    """Opens (creating if needed) an embedded DuckDB or SQLite database with the SQL script's schema."""
+    if dialect not in EMBEDDED_DIALECTS:
+        raise mysql.connector.Error(msg=f"Unknown embedded backend '{dialect}' (expected one of {EMBEDDED_DIALECTS}).")
+    if dialect == "duckdb":
+        try:
+            import duckdb
+        except ImportError as err:
+            raise mysql.connector.Error(msg=f"The DuckDB backend needs the 'duckdb' package: {err}") from err
+        raw_connection, engine_error = duckdb.connect(db_path), duckdb.Error
+    else:
+        # isolation_level=None leaves transactions to EmbeddedConnection. The pipelined
+        # ingest hands the connection to its writer thread (one thread at a time uses it).
+        raw_connection, engine_error = (sqlite3.connect(db_path, isolation_level=None, check_same_thread=False),
+                                        sqlite3.Error)
+
+    try:
+        schema_statements = read_schema_statements(sql_path)
+    except OSError as err:
+        raw_connection.close()
+        raise mysql.connector.Error(msg=f"Cannot read the schema from the SQL script: {err}") from err
+    connection = EmbeddedConnection(dialect, raw_connection, engine_error, read_primary_keys(schema_statements))
+    cursor = connection.cursor()
+    for statement in schema_statements:
+        cursor.execute(statement)
+    # The row the loader increments, as inserted by Stage 3 of the SQL script.
+    cursor.execute("INSERT IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    connection.commit()
+    return connection
@@ -0,0 +1,208 @@
+# Pipelined Ingest for the Agri-India Pipeline
+
+# run_ingest_pipeline() overlaps the three parts of a streamed Stage 8 load of
+# Project2_Agri_India.py instead of running them one after another:
+#   parse      pulls cleaned chunks from the source (CSV parsing, Stages 4-5.5)
+#   transform  turns each chunk into write items (e.g. batches of insert tuples)
+#   write      one or more writer threads send the items to the database
+# The stages are joined by bounded queues, so a stage that runs ahead blocks on
+# a full queue (backpressure) instead of buffering the whole file, and the wall
+# time approaches that of the slowest stage rather than the sum of all three.
+# Threads are enough: pandas' CSV parser, mysql.connector's network I/O and the
+# embedded engines release the GIL while they work. Each stage counts the items
+# and rows it handled, its busy time and the time it was blocked on its input
+# and output queues, and each queue samples its depth at every put.
+
+# 📌 Stage 1: Import Required Libraries
+import queue
+import threading
+import time
+
+# 📌 Stage 2: Stage Counters and Bounded Queues
+class StageStats:
+    """The counters of one pipeline stage (summed over its threads)."""
+
+    def __init__(self, name, threads=1):
+        self.name = name
+        self.threads = threads
+        self.items = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+        self.blocked_in_seconds = 0.0 # Waiting for input: the stage before is slower
+        self.blocked_out_seconds = 0.0 # Waiting on a full output queue: backpressure
+        self.lock = threading.Lock()
+
+    def add(self, **counters):
+        with self.lock:
+            for counter, value in counters.items():
+                setattr(self, counter, getattr(self, counter) + value)
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'threads': self.threads,
+            'items': self.items,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy_seconds, 6),
+            'blocked_in_seconds': round(self.blocked_in_seconds, 6),
+            'blocked_out_seconds': round(self.blocked_out_seconds, 6)
+        }
+
+class PipelineAborted(Exception):
+    """Raised in the stages still running after another stage failed."""
+
+class BoundedQueue:
+    """A queue.Queue that times blocked puts and gets, samples its depth and gives up once the pipeline aborts."""
+
+    def __init__(self, name, maxsize, abort):
+        self.name = name
+        self.maxsize = maxsize
+        self.queue = queue.Queue(maxsize)
+        self.abort = abort
+        self.puts = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.lock = threading.Lock()
+
+    def put(self, item, stats):
+        started = time.perf_counter()
+        while True:
+            if self.abort.is_set():
+                raise PipelineAborted()
+            try:
+                self.queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        stats.add(blocked_out_seconds=time.perf_counter() - started)
+        depth = self.queue.qsize()
+        with self.lock:
+            self.puts += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def get(self, stats):
+        started = time.perf_counter()
+        while True:
+            if self.abort.is_set():
+                raise PipelineAborted()
+            try:
+                item = self.queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                pass
+        stats.add(blocked_in_seconds=time.perf_counter() - started)
+        return item
+
+    def as_dict(self):
+        return {
+            'queue': self.name,
+            'maxsize': self.maxsize,
+            'puts': self.puts,
+            'mean_depth': round(self.depth_total / self.puts, 3) if self.puts else 0.0,
+            'max_depth': self.max_depth
+        }
+
+# 📌 Stage 3: Pipeline Runner
+# The parse stage runs in the calling thread; transform and the writers run in
+# their own threads. The first exception in any stage aborts the others and is
+# re-raised here once every thread has stopped.
+# source yields chunks, transform(chunk) returns a list of write items and
+# write(item, writer) writes one and returns its row count. open_writer(index)
+# and close_writer(writer) set up and tear down each writer thread's resources
+# (e.g. its database connection).
+end_of_stream = object()
+
+def run_ingest_pipeline(source, transform, write, writers=1, queue_size=4, open_writer=None, close_writer=None):
+    """Runs parse -> transform -> write over bounded queues; returns the stage, queue and wall-time figures."""
+    abort = threading.Event()
+    errors = []
+    parse_stats, transform_stats = StageStats("parse"), StageStats("transform")
+    write_stats = StageStats("write", writers)
+    chunk_queue = BoundedQueue("chunks", queue_size, abort)
+    # Room for a few chunks' worth of write items per writer.
+    item_queue = BoundedQueue("write items", queue_size * max(writers, 1) * 4, abort)
+
+    def run_stage(body):
+        try:
+            body()
+        except PipelineAborted:
+            pass
+        except BaseException as err:
+            errors.append(err)
+            abort.set()
+
+    def transform_stage():
+        while True:
+            chunk = chunk_queue.get(transform_stats)
+            if chunk is end_of_stream:
+                break
+            started = time.perf_counter()
+            items = transform(chunk)
+            transform_stats.add(items=1, rows=len(chunk), busy_seconds=time.perf_counter() - started)
+            for item in items:
+                item_queue.put(item, transform_stats)
+        for _ in range(writers):
+            item_queue.put(end_of_stream, transform_stats)
+
+    def write_stage(index):
+        writer = open_writer(index) if open_writer is not None else None
+        try:
+            while True:
+                item = item_queue.get(write_stats)
+                if item is end_of_stream:
+                    break
+                started = time.perf_counter()
+                rows = write(item, writer)
+                write_stats.add(items=1, rows=rows or 0, busy_seconds=time.perf_counter() - started)
+        finally:
+            if close_writer is not None:
+                close_writer(writer)
+
+    def parse_stage():
+        chunks = iter(source)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, end_of_stream)
+            if chunk is end_of_stream:
+                break
+            parse_stats.add(items=1, rows=len(chunk), busy_seconds=time.perf_counter() - started)
+            chunk_queue.put(chunk, parse_stats)
+        chunk_queue.put(end_of_stream, parse_stats)
+
+    pipeline_started = time.perf_counter()
+    threads = [threading.Thread(target=run_stage, args=(transform_stage,), name="ingest-transform")]
+    threads += [threading.Thread(target=run_stage, args=(lambda index=index: write_stage(index),),
+                                 name=f"ingest-writer-{index}") for index in range(writers)]
+    for thread in threads:
+        thread.start()
+    try:
+        run_stage(parse_stage)
+        for thread in threads:
+            thread.join()
+    except BaseException:
+        abort.set() # e.g. Ctrl+C while waiting: the stage threads stop at their next queue operation
+        raise
+    if errors:
+        raise errors[0]
+    return {
+        'wall_seconds': round(time.perf_counter() - pipeline_started, 6),
+        'stages': [stats.as_dict() for stats in (parse_stats, transform_stats, write_stats)],
+        'queues': [chunk_queue.as_dict(), item_queue.as_dict()]
+    }
+
+def report_ingest_pipeline(figures):
+    """Prints the per-stage throughput, blocked times and queue depths of a pipelined load."""
+    print(f"{'Stage':<10} {'Threads':>7} {'Items':>6} {'Rows':>9} {'Busy (s)':>9} {'Rows/s busy':>12} "
+          f"{'Blocked in (s)':>14} {'Blocked out (s)':>15}")
+    for stage in figures['stages']:
+        # Busy time of several writers is summed, so their rate is per writer thread.
+        rows_per_sec = stage['rows'] / stage['busy_seconds'] if stage['busy_seconds'] > 0 else 0.0
+        print(f"{stage['stage']:<10} {stage['threads']:>7} {stage['items']:>6} {stage['rows']:>9} "
+              f"{stage['busy_seconds']:>9.2f} {rows_per_sec:>12,.0f} "
+              f"{stage['blocked_in_seconds']:>14.2f} {stage['blocked_out_seconds']:>15.2f}")
+    for queue_figures in figures['queues']:
+        print(f"ℹ️ Queue '{queue_figures['queue']}': mean depth {queue_figures['mean_depth']:.1f}, "
+              f"max {queue_figures['max_depth']} of {queue_figures['maxsize']}.")
+    busy_total = sum(stage['busy_seconds'] for stage in figures['stages'])
+    print(f"ℹ️ Pipelined load: {figures['wall_seconds']:.2f} s wall for {busy_total:.2f} s of stage work.")
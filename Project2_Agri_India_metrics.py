@@ -0,0 +1,303 @@
+# Per-Stage Instrumentation for the Agri-India Pipeline
+
+# PipelineMetrics.stage() is a context manager that records, for one stage of
+# Project2_Agri_India.py, its wall time, CPU time, the tracemalloc peak of Python
+# allocations (NumPy and pandas buffers included, when TRACE_MEMORY is on), the
+# peak RSS while the stage ran and the change of RSS from its start to its end,
+# the rows it took in and gave out, and the statements it sent to the database.
+# Each stage is appended to a JSON-lines log as soon as it ends, so a nightly load
+# that dies half-way still shows where its time went. Errors are counted per
+# category, and only the first few of each are printed and kept as samples.
+# write_prometheus() writes the run's figures in the Prometheus text format, for
+# node_exporter's textfile collector.
+
+# 📌 Stage 1: Import Required Libraries
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+try:
+    import resource # Unix only; peak RSS is left out elsewhere
+except ImportError:
+    resource = None
+
+RSS_SAMPLE_SECONDS = 0.05 # How often the RSS is sampled while a stage runs
+
+# 📌 Stage 2: Stage Records
+class StageRecord:
+    """The figures of one instrumented stage; the stage body sets rows_in and rows_out."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.status = "ok"
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_traced_bytes = None
+        self.peak_rss_bytes = None
+        self.rss_delta_bytes = None
+        self.db_round_trips = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'status': self.status,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'peak_traced_bytes': self.peak_traced_bytes,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'rss_delta_bytes': self.rss_delta_bytes,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'db_round_trips': self.db_round_trips,
+            'errors': self.errors
+        }
+
+def max_rss_bytes():
+    """Returns the peak resident set size of the process so far, or None where it is not available."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024 # Linux reports KiB, macOS bytes
+
+def current_rss_bytes():
+    """Returns the current resident set size of the process, or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+class RssSampler:
+    """Samples the current RSS on a background thread while one stage runs and keeps the largest sample."""
+
+    def __init__(self, interval=None):
+        self.interval = RSS_SAMPLE_SECONDS if interval is None else interval
+        self.peak_bytes = current_rss_bytes()
+        self.stopped = threading.Event()
+        self.thread = None
+        if self.peak_bytes is not None:
+            self.thread = threading.Thread(target=self.sample, name="rss-sampler", daemon=True)
+            self.thread.start()
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes() or 0)
+
+    def stop(self):
+        """Stops sampling; returns the stage's peak RSS (None where the RSS cannot be read)."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes() or 0)
+        return self.peak_bytes
+
+# 📌 Stage 3: Pipeline Metrics
+class PipelineMetrics:
+    """Collects stage records, database round trips and sampled errors for one pipeline run."""
+
+    def __init__(self, log_path=None, trace_memory=True, error_sample_size=5, enabled=True):
+        self.enabled = enabled
+        self.log_path = log_path if enabled else None
+        self.trace_memory = enabled and trace_memory
+        self.error_sample_size = error_sample_size
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.records = []
+        self.round_trips = 0
+        self.errors = {} # category -> {'count': n, 'samples': [first messages]}
+        self.lock = threading.Lock() # The parallel loader counts from several threads
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        """Times the with block as one stage (stages are not nested)."""
+        record = StageRecord(name, rows_in)
+        if not self.enabled:
+            yield record
+            return
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        rss_started, max_rss_started = current_rss_bytes(), max_rss_bytes()
+        rss_sampler = RssSampler()
+        round_trips, errors = self.round_trips, self.error_count()
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException:
+            record.status = "failed"
+            raise
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_started
+            record.cpu_seconds = time.process_time() - cpu_started
+            if self.trace_memory:
+                record.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            record.peak_rss_bytes = rss_sampler.stop()
+            max_rss_ended = max_rss_bytes()
+            if max_rss_started is not None and max_rss_ended > max_rss_started:
+                # The process reached a new peak during this stage; ru_maxrss measured
+                # it exactly, where the sampler may have missed a short spike.
+                record.peak_rss_bytes = max(record.peak_rss_bytes or 0, max_rss_ended)
+            rss_ended = current_rss_bytes()
+            if rss_started is not None and rss_ended is not None:
+                record.rss_delta_bytes = rss_ended - rss_started
+            record.db_round_trips = self.round_trips - round_trips
+            record.errors = self.error_count() - errors
+            self.records.append(record)
+            self.write_log_line({'event': 'stage', **record.as_dict()})
+
+    def count_round_trip(self, count=1):
+        with self.lock:
+            self.round_trips += count
+
+    def instrument_connection(self, connection):
+        """Wraps a database connection so the statements sent through it are counted."""
+        return InstrumentedConnection(connection, self) if self.enabled else connection
+
+    def record_error(self, category, message):
+        """Counts an error; only the first error_sample_size of a category are printed and kept."""
+        with self.lock:
+            entry = self.errors.setdefault(category, {'count': 0, 'samples': []})
+            entry['count'] += 1
+            count = entry['count']
+            if count <= self.error_sample_size:
+                entry['samples'].append(str(message))
+        if count <= self.error_sample_size:
+            print(f"❌ {message}")
+        elif count == self.error_sample_size + 1:
+            print(f"⚠️ Further '{category}' errors are counted but not printed.")
+
+    def error_count(self, category=None):
+        if category is not None:
+            return self.errors.get(category, {}).get('count', 0)
+        return sum(entry['count'] for entry in self.errors.values())
+
+    def write_log_line(self, event):
+        """Appends one JSON line (with the run id and a timestamp) to the log."""
+        if self.log_path is None:
+            return
+        line = {'run_id': self.run_id, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), **event}
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as log_file:
+            log_file.write(json.dumps(line) + "\n")
+
+    def finish(self, prometheus_path=None):
+        """Logs the error summaries and the run totals, prints the stage table and writes the Prometheus file."""
+        if not self.enabled:
+            return
+        for category, entry in self.errors.items():
+            self.write_log_line({'event': 'errors', 'category': category, **entry})
+        run_seconds = time.perf_counter() - self.started
+        self.write_log_line({'event': 'run', 'wall_seconds': round(run_seconds, 6), 'stages': len(self.records),
+                             'db_round_trips': self.round_trips, 'errors': self.error_count()})
+
+        # The tracemalloc column is only shown when TRACE_MEMORY filled it in.
+        traced = any(record.peak_traced_bytes is not None for record in self.records)
+        print(f"\n{'Stage':<22} {'Wall (s)':>9} {'CPU (s)':>8} {'RSS MB':>8} {'RSS +MB':>8}"
+              + (f" {'Py MB':>8}" if traced else "") + f" {'Rows in':>9} {'Rows out':>9} {'DB trips':>9}")
+        for record in self.records:
+            print(f"{record.name:<22} {record.wall_seconds:>9.2f} {record.cpu_seconds:>8.2f} "
+                  f"{megabytes(record.peak_rss_bytes):>8} {megabytes(record.rss_delta_bytes, signed=True):>8}"
+                  + (f" {megabytes(record.peak_traced_bytes):>8}" if traced else "") +
+                  f" {record.rows_in if record.rows_in is not None else '-':>9}"
+                  f" {record.rows_out if record.rows_out is not None else '-':>9} {record.db_round_trips:>9}")
+        print("ℹ️ RSS MB: peak RSS while the stage ran; RSS +MB: RSS change from its start to its end"
+              + ("; Py MB: tracemalloc peak." if traced else "."))
+        print(f"ℹ️ Run {self.run_id}: {run_seconds:.2f} s, {self.round_trips} DB round trips, "
+              f"{self.error_count()} errors" + (f"; metrics appended to {self.log_path}." if self.log_path else "."))
+        if prometheus_path is not None:
+            self.write_prometheus(prometheus_path)
+
+    def write_prometheus(self, path):
+        """Writes the run's stage figures and error counts as Prometheus gauges (atomically, for textfile collectors)."""
+        metrics = [
+            ('agri_stage_wall_seconds', "Wall-clock time of each pipeline stage in the last run.", 'wall_seconds'),
+            ('agri_stage_cpu_seconds', "CPU time of each pipeline stage in the last run.", 'cpu_seconds'),
+            ('agri_stage_peak_traced_bytes', "tracemalloc peak during each pipeline stage.", 'peak_traced_bytes'),
+            ('agri_stage_peak_rss_bytes', "Peak RSS of the process while each pipeline stage ran.", 'peak_rss_bytes'),
+            ('agri_stage_rss_delta_bytes', "RSS change from the start to the end of each pipeline stage.", 'rss_delta_bytes'),
+            ('agri_stage_rows_in', "Rows each pipeline stage took in.", 'rows_in'),
+            ('agri_stage_rows_out', "Rows each pipeline stage gave out.", 'rows_out'),
+            ('agri_stage_db_round_trips', "Statements each pipeline stage sent to the database.", 'db_round_trips')
+        ]
+        lines = []
+        for metric, help_text, attribute in metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for record in self.records:
+                value = getattr(record, attribute)
+                if value is not None:
+                    lines.append(f'{metric}{{stage="{prometheus_label(record.name)}"}} {value}')
+        lines += ["# HELP agri_errors Errors counted in the last run, by category.", "# TYPE agri_errors gauge"]
+        for category, entry in self.errors.items():
+            lines.append(f'agri_errors{{category="{prometheus_label(category)}"}} {entry["count"]}')
+        lines += ["# HELP agri_run_finished_timestamp_seconds Unix time at which the last run finished.",
+                  "# TYPE agri_run_finished_timestamp_seconds gauge",
+                  f"agri_run_finished_timestamp_seconds {time.time():.3f}"]
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as prometheus_file:
+            prometheus_file.write("\n".join(lines) + "\n")
+        os.replace(f"{path}.tmp", path) # The collector never reads a half-written file
+        print(f"ℹ️ Prometheus metrics written to {path}.")
+
+def megabytes(value, signed=False):
+    """Formats a byte count as MB for the stage table ('-' when it was not recorded)."""
+    if value is None:
+        return "-"
+    return f"{value / 1e6:+.1f}" if signed else f"{value / 1e6:.1f}"
+
+def prometheus_label(value):
+    """Escapes a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# 📌 Stage 4: Round-Trip Counting Connection
+# Every execute(), executemany(), commit() and rollback() counts as one round trip
+# (mysql.connector sends an INSERT ... VALUES executemany() as one statement).
+# Everything else is passed through to the wrapped connection or cursor.
+class InstrumentedConnection:
+    """A connection wrapper that counts the statements sent through it."""
+
+    def __init__(self, connection, metrics):
+        self.connection = connection
+        self.metrics = metrics
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.connection.cursor(*args, **kwargs), self.metrics)
+
+    def commit(self):
+        self.metrics.count_round_trip()
+        return self.connection.commit()
+
+    def rollback(self):
+        self.metrics.count_round_trip()
+        return self.connection.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+class InstrumentedCursor:
+    """A cursor wrapper that counts execute() and executemany() calls."""
+
+    def __init__(self, cursor, metrics):
+        self.cursor = cursor
+        self.metrics = metrics
+
+    def execute(self, *args, **kwargs):
+        self.metrics.count_round_trip()
+        return self.cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.metrics.count_round_trip()
+        return self.cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
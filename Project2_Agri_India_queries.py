@@ -0,0 +1,252 @@
+# Named Analytical Queries With a Result Cache
+
+# This module runs the 11 Stage 4 analytical queries of Project2_Agri_India.sql
+# by name, with optional parameters (crop, year range, year, state, limit), and
+# keeps their results in an in-memory LRU cache with a time-to-live. A cache key
+# is the rendered SQL, its bind parameters and the database's data version: the
+# loader bumps the single row of the 'data_version' table after each Stage 8
+# commit, so a reload makes all older entries unreachable and repeat requests only
+# hit the database once per version. The version itself is read again only every
+# few seconds, or at once after a bump by this process, not on every request.
+
+# 📌 Stage 1: Import Required Libraries
+import re
+import time
+from collections import OrderedDict
+import pandas as pd
+
+# 📌 Stage 2: Query Templates
+# Each template is the SQL script's query with its crop, years and limit replaced
+# by {placeholders}; the defaults give the script's query (with the crop-named
+# column aliases spelled after the crop, e.g. total_oilseeds_area).
+# {crop} is checked against the loaded measure columns and the numbers are cast
+# to int before they are formatted in, so only the state name is a bind parameter.
+# Queries 2 and 3 compare the {end_year} value with the {start_year} value (true
+# start-to-end growth; entities missing either year are left out).
+# {state_and} / {state_where} add "ap.state_code = <state of that name>"; the
+# state-level queries join state_master on the state_code copied into each
+# agri_production row rather than going through district_master.
+named_queries = {
+    "1. Year-wise rice production": ("""
+        SELECT year, SUM({crop}_production) AS total_{crop}_production
+        FROM agri_production
+        GROUP BY year
+        ORDER BY year""", {'crop': 'rice'}),
+    "2. Top wheat yield increase districts": ("""
+        SELECT dm.dist_name,
+               (MAX(CASE WHEN ap.year = {end_year} THEN ap.{crop}_yield END) - MAX(CASE WHEN ap.year = {start_year} THEN ap.{crop}_yield END)) AS yield_increase
+        FROM agri_production ap
+        JOIN district_master dm ON ap.dist_code = dm.dist_code
+        WHERE ap.year IN ({start_year}, {end_year}){state_and}
+        GROUP BY dm.dist_name
+        HAVING yield_increase IS NOT NULL
+        ORDER BY yield_increase DESC
+        LIMIT {limit}""", {'crop': 'wheat', 'start_year': 2015, 'end_year': 2020, 'limit': 5, 'state': None}),
+    "3. Oilseed growth by state": ("""
+        SELECT sm.state_name,
+               (SUM(CASE WHEN ap.year = {end_year} THEN ap.{crop}_production END) - SUM(CASE WHEN ap.year = {start_year} THEN ap.{crop}_production END)) AS growth
+        FROM agri_production ap
+        JOIN state_master sm ON ap.state_code = sm.state_code
+        WHERE ap.year IN ({start_year}, {end_year}){state_and}
+        GROUP BY sm.state_name
+        HAVING growth IS NOT NULL
+        ORDER BY growth DESC
+        LIMIT {limit}""", {'crop': 'oilseeds', 'start_year': 2015, 'end_year': 2020, 'limit': 5, 'state': None}),
+    "4. Year and state-wise rice production": ("""
+        SELECT ap.year, sm.state_name, SUM(ap.{crop}_production) AS total_{crop}_production
+        FROM agri_production ap
+        JOIN state_master sm ON ap.state_code = sm.state_code{state_where}
+        GROUP BY ap.year, sm.state_name
+        ORDER BY ap.year, total_{crop}_production DESC""", {'crop': 'rice', 'state': None}),
+    "5. District rice/wheat/maize area vs production": ("""
+        SELECT dm.dist_name,
+               SUM(ap.rice_area) AS rice_area, SUM(ap.rice_production) AS rice_prod,
+               SUM(ap.wheat_area) AS wheat_area, SUM(ap.wheat_production) AS wheat_prod,
+               SUM(ap.maize_area) AS maize_area, SUM(ap.maize_production) AS maize_prod
+        FROM agri_production ap
+        JOIN district_master dm ON ap.dist_code = dm.dist_code{state_where}
+        GROUP BY dm.dist_name
+        ORDER BY rice_prod DESC""", {'state': None}),
+    "6. Yearly cotton production by state": ("""
+        SELECT ap.year, sm.state_name, SUM(ap.{crop}_production) AS {crop}_prod
+        FROM agri_production ap
+        JOIN state_master sm ON ap.state_code = sm.state_code{state_where}
+        GROUP BY ap.year, sm.state_name
+        ORDER BY ap.year, {crop}_prod DESC
+        LIMIT {limit}""", {'crop': 'cotton', 'limit': 5, 'state': None}),
+    "7. Top groundnut districts (2020)": ("""
+        SELECT dm.dist_name, ap.{crop}_production
+        FROM agri_production ap
+        JOIN district_master dm ON ap.dist_code = dm.dist_code
+        WHERE ap.year = {year}{state_and}
+        ORDER BY ap.{crop}_production DESC
+        LIMIT {limit}""", {'crop': 'groundnut', 'year': 2020, 'limit': 5, 'state': None}),
+    "8. Average maize yield by year": ("""
+        SELECT year, AVG({crop}_yield) AS avg_{crop}_yield
+        FROM agri_production
+        GROUP BY year
+        ORDER BY year""", {'crop': 'maize'}),
+    "9. Oilseed area by state": ("""
+        SELECT sm.state_name, SUM(ap.{crop}_area) AS total_{crop}_area
+        FROM agri_production ap
+        JOIN state_master sm ON ap.state_code = sm.state_code{state_where}
+        GROUP BY sm.state_name
+        ORDER BY total_{crop}_area DESC""", {'crop': 'oilseeds', 'state': None}),
+    "10. Top rice yield districts": ("""
+        SELECT dm.dist_name, MAX(ap.{crop}_yield) AS max_{crop}_yield
+        FROM agri_production ap
+        JOIN district_master dm ON ap.dist_code = dm.dist_code{state_where}
+        GROUP BY dm.dist_name
+        ORDER BY max_{crop}_yield DESC
+        LIMIT {limit}""", {'crop': 'rice', 'limit': 10, 'state': None}),
+    "11. Maize yield growth by state (2010-2020)": ("""
+        SELECT sm.state_name,
+               SUM(CASE WHEN ap.year={start_year} THEN ap.{crop}_yield ELSE 0 END) AS {crop}_yield_{start_year},
+               SUM(CASE WHEN ap.year={end_year} THEN ap.{crop}_yield ELSE 0 END) AS {crop}_yield_{end_year},
+               (SUM(CASE WHEN ap.year={end_year} THEN ap.{crop}_yield ELSE 0 END) - SUM(CASE WHEN ap.year={start_year} THEN ap.{crop}_yield ELSE 0 END)) AS yield_growth
+        FROM agri_production ap
+        JOIN state_master sm ON ap.state_code = sm.state_code
+        WHERE ap.year BETWEEN {start_year} AND {end_year}{state_and}
+        GROUP BY sm.state_name
+        ORDER BY yield_growth DESC""", {'crop': 'maize', 'start_year': 2010, 'end_year': 2020, 'state': None})
+}
+
+state_condition = "ap.state_code = (SELECT state_code FROM state_master WHERE state_name = %s)"
+
+def render_named_query(name, measure_columns, **params):
+    """Returns (sql, bind parameters) for a named query with its defaults overridden by params."""
+    if name not in named_queries:
+        raise KeyError(f"Unknown analytical query '{name}'.")
+    template, defaults = named_queries[name]
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValueError(f"Query '{name}' does not take {sorted(unknown)}; it takes {sorted(defaults)}.")
+    values = {**defaults, **params}
+
+    crop = values.get('crop')
+    for measure in set(re.findall(r"\{crop\}_(area|production|yield)", template)):
+        if f"{crop}_{measure}" not in measure_columns:
+            raise ValueError(f"Query '{name}' needs a '{crop}_{measure}' column, which agri_production does not have.")
+    for key in ('start_year', 'end_year', 'year', 'limit'):
+        if key in values:
+            values[key] = int(values[key])
+
+    state = values.pop('state', None)
+    values['state_and'] = f"\n          AND {state_condition}" if state is not None else ""
+    values['state_where'] = f"\n        WHERE {state_condition}" if state is not None else ""
+    return template.format(**values), ((state,) if state is not None else ())
+
+# 📌 Stage 3: LRU/TTL Result Cache
+class QueryResultCache:
+    """An LRU cache of query results whose entries also expire after ttl_seconds."""
+
+    def __init__(self, max_entries=128, ttl_seconds=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = OrderedDict() # key -> (stored_at, result), least recently used first
+        self.metrics = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        """Returns the cached result for key, or None on a miss."""
+        entry = self.entries.get(key)
+        if entry is not None and self.clock() - entry[0] > self.ttl_seconds:
+            del self.entries[key]
+            self.metrics['expired'] += 1
+            entry = None
+        if entry is None:
+            self.metrics['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.metrics['hits'] += 1
+        return entry[1]
+
+    def put(self, key, result):
+        """Stores a result, evicting the least recently used entries beyond max_entries."""
+        self.entries[key] = (self.clock(), result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.metrics['evictions'] += 1
+
+    def invalidate(self):
+        """Drops every entry."""
+        self.entries.clear()
+        self.metrics['invalidations'] += 1
+
+    def stats(self):
+        """Returns the hit/miss counters, the hit ratio and the number of entries held."""
+        lookups = self.metrics['hits'] + self.metrics['misses']
+        return {**self.metrics, 'entries': len(self.entries),
+                'hit_ratio': self.metrics['hits'] / lookups if lookups else 0.0}
+
+# 📌 Stage 4: Data Version
+# 'data_version' (defined and seeded by the SQL script, the upgrade script, or the
+# embedded backends' schema setup) holds one row that the loader bumps after each
+# Stage 8 commit with a single UPDATE.
+# local_version_bumps counts the bumps made by this process, so a query layer in
+# the same process notices a load without reading the table.
+local_version_bumps = 0
+
+def read_data_version(cursor):
+    """Returns the current data version (0 before the first load)."""
+    cursor.execute("SELECT version FROM data_version WHERE id = 1")
+    row = cursor.fetchone()
+    cursor.fetchall() # Clears the result set
+    return int(row[0]) if row else 0
+
+def bump_data_version(conn, cursor):
+    """Increments the data version after a load has been committed and returns it."""
+    global local_version_bumps
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    if cursor.rowcount == 0:
+        raise LookupError("The data_version row is missing; run Project2_Agri_India_upgrade.sql to add it.")
+    conn.commit()
+    local_version_bumps += 1
+    return read_data_version(cursor)
+
+# 📌 Stage 5: Query Layer
+class AnalyticalQueryLayer:
+    """Runs the named analytical queries through a QueryResultCache keyed by SQL, bind parameters and data version."""
+
+    def __init__(self, conn, measure_columns, cache=None, version_check_seconds=5.0, clock=time.monotonic):
+        self.conn = conn
+        self.measure_columns = set(measure_columns)
+        self.cache = cache if cache is not None else QueryResultCache()
+        self.version_check_seconds = version_check_seconds
+        self.clock = clock
+        self.data_version = None
+        self.version_checked_at = None
+        self.version_bumps_seen = None
+
+    def current_data_version(self, cursor):
+        """Returns the data version, reading it again only every version_check_seconds or after a local bump."""
+        now = self.clock()
+        if (self.version_checked_at is None or self.version_bumps_seen != local_version_bumps
+                or now - self.version_checked_at >= self.version_check_seconds):
+            version = read_data_version(cursor)
+            self.version_checked_at, self.version_bumps_seen = now, local_version_bumps
+            if version != self.data_version:
+                if self.data_version is not None:
+                    self.cache.invalidate() # A new version drops the old entries
+                self.data_version = version
+        return self.data_version
+
+    def run(self, name, **params):
+        """Returns a named query's result as a DataFrame, from the cache when the data has not changed."""
+        sql, bind_params = render_named_query(name, self.measure_columns, **params)
+        cursor = self.conn.cursor()
+        try:
+            # The rendered SQL already holds the defaults and the cast numbers, so
+            # crop='rice' and no crop, or limit=5 and limit='5', share one entry.
+            key = (sql, tuple(bind_params), self.current_data_version(cursor))
+            result = self.cache.get(key)
+            if result is None:
+                cursor.execute(sql, bind_params)
+                rows = cursor.fetchall()
+                result = pd.DataFrame(rows, columns=[column[0] for column in cursor.description])
+                self.cache.put(key, result)
+        finally:
+            cursor.close()
+        # A copy, so callers cannot change the cached frame.
+        return result.copy()
@@ -0,0 +1,73 @@
+-- Agri-India Database Upgrade: Denormalized state_code, Covering Indexes and Year Partitioning
+
+-- This script brings an existing 'Project2_Agri_India' database up to the
+-- agri_production definition of Project2_Agri_India.sql without reloading it:
+-- it adds the copied 'state_code' column and the year-leading covering indexes.
+-- Stage 3 optionally RANGE partitions the table by year, and Stage 4 adds the
+-- tables the Python loader has needed since.
+-- Embedded DuckDB/SQLite files built before this change are not upgraded in
+-- place; delete the file and the Python script recreates and reloads it.
+
+-- 📌 Stage 0: Select the Database
+USE Project2_Agri_India;
+
+-- 📌 Stage 1: Denormalize state_code Into agri_production
+-- The state-level analytical queries join state_master on this column instead of
+-- going through district_master. The Python loader fills it from then on.
+ALTER TABLE agri_production ADD COLUMN state_code INT AFTER year;
+
+UPDATE agri_production ap
+JOIN district_master dm ON ap.dist_code = dm.dist_code
+SET ap.state_code = dm.state_code;
+
+-- 📌 Stage 2: Year-Leading Covering Indexes
+-- Same indexes as the agri_production definition in Project2_Agri_India.sql.
+-- One ALTER TABLE builds them all in a single pass over the table.
+ALTER TABLE agri_production
+    ADD INDEX idx_agri_year_state_rice (year, state_code, rice_production, rice_yield),
+    ADD INDEX idx_agri_year_wheat (year, wheat_yield),
+    ADD INDEX idx_agri_year_state_oilseeds (year, state_code, oilseeds_production, oilseeds_area),
+    ADD INDEX idx_agri_year_state_cotton (year, state_code, cotton_production),
+    ADD INDEX idx_agri_year_groundnut (year, groundnut_production),
+    ADD INDEX idx_agri_year_state_maize (year, state_code, maize_yield);
+
+-- 📌 Stage 3: RANGE Partitioning by Year (Optional)
+-- Splits agri_production into one partition per decade, so the 'year BETWEEN'
+-- and 'year =' queries only read the partitions they need (see the 'partitions'
+-- column of EXPLAIN). Every unique key must include the partitioning column,
+-- which the (dist_code, year) primary key does. Partitioned InnoDB tables cannot
+-- have foreign keys, so the district foreign key is dropped first: the loader
+-- inserts district_master rows before their agri_production rows anyway.
+-- Uncomment to apply, and set AGRI_PRODUCTION_PARTITIONED = True in
+-- Project2_Agri_India.py so its "load_data" swap does not add the key back.
+-- Look up the foreign key's name with:
+--   SHOW CREATE TABLE agri_production;
+
+-- ALTER TABLE agri_production DROP FOREIGN KEY agri_production_ibfk_1;
+-- ALTER TABLE agri_production
+-- PARTITION BY RANGE (year) (
+--     PARTITION p1960s VALUES LESS THAN (1970),
+--     PARTITION p1970s VALUES LESS THAN (1980),
+--     PARTITION p1980s VALUES LESS THAN (1990),
+--     PARTITION p1990s VALUES LESS THAN (2000),
+--     PARTITION p2000s VALUES LESS THAN (2010),
+--     PARTITION p2010s VALUES LESS THAN (2020),
+--     PARTITION p2020s VALUES LESS THAN (2030),
+--     PARTITION p_future VALUES LESS THAN MAXVALUE
+-- );
+
+-- 📌 Stage 4: Tables Added Since
+-- Same definitions as in Project2_Agri_India.sql. The loader only increments the
+-- data_version row, so it is inserted here as by that script's Stage 3.
+CREATE TABLE IF NOT EXISTS data_version (
+    id INT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+INSERT IGNORE INTO data_version (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS agri_production_manifest (
+    dist_code INT,
+    year INT,
+    row_hash BIGINT UNSIGNED NOT NULL,
+    PRIMARY KEY (dist_code, year)
+);
@@ -0,0 +1,80 @@
+# Shared Fixtures for the Agri-India Pipeline Tests
+
+# The tests run the pipeline module against an embedded SQLite database in a
+# temporary directory (no MySQL server needed), on district-years drawn from the
+# benchmark suite's synthetic ICRISAT generator.
+
+# 📌 Stage 1: Import Required Libraries
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Project2_Agri_India as agri_pipeline
+import Project2_Agri_India_benchmark as agri_benchmark
+
+# 📌 Stage 2: Fixtures
+TEST_DISTRICTS = 40
+
+@pytest.fixture
+def agri(tmp_path, monkeypatch):
+    """The pipeline module, with its database, checkpoint and output paths in tmp_path."""
+    settings = {
+        'DB_BACKEND': 'sqlite',
+        'EMBEDDED_DB_PATH': str(tmp_path / "agri.sqlite"),
+        'INGEST_ENGINE': 'batched',
+        'INSERT_BATCH_SIZE': 1000,
+        'CSV_CHUNK_SIZE': None,
+        'PARALLEL_WORKERS': 1,
+        'PIPELINED_INGEST': False,
+        'LOAD_LONG_FORMAT': False,
+        'USE_CLEANED_CACHE': False,
+        'ANALYSIS_ONLY': False,
+        'HEADLESS_CHARTS': True,
+        'CHART_OUTPUT_DIR': str(tmp_path / "charts"),
+        'ROLLUP_CACHE_DIR': str(tmp_path / "rollup_cache"),
+        'QUARANTINE_PATH': str(tmp_path / "quarantine" / "quarantine.csv"),
+        'PIPELINE_CHECKPOINT_PATH': str(tmp_path / "checkpoints" / "checkpoint.json"),
+        'METRICS_LOG_PATH': str(tmp_path / "metrics" / "metrics.jsonl"),
+        'METRICS_PROMETHEUS_PATH': None,
+        'RUN_LAYOUT_BENCHMARK': False,
+        'RUN_ANALYTICAL_QUERIES': False,
+        'RUN_INDEX_BENCHMARK': False
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(agri_pipeline, name, value)
+    return agri_pipeline
+
+@pytest.fixture
+def raw_frame(agri):
+    """TEST_DISTRICTS districts x 52 years of synthetic CSV rows, with the CSV headers and dtypes."""
+    frame = agri_benchmark.generate_icrisat_frame(seed=0)
+    frame = frame.head(TEST_DISTRICTS * len(agri_benchmark.ICRISAT_YEARS))
+    return frame.astype({header: agri.csv_column_dtypes[header] for header in frame.columns})
+
+@pytest.fixture
+def csv_path(raw_frame, tmp_path):
+    """The raw frame written as an ICRISAT CSV file."""
+    path = tmp_path / "icrisat.csv"
+    raw_frame.to_csv(path, index=False, float_format='%.2f')
+    return str(path)
+
+@pytest.fixture
+def prepared_frame(agri, raw_frame):
+    """The raw frame renamed and reordered (Stages 4-5), before the data quality rules."""
+    return agri.prepare_agri_chunk(raw_frame).reset_index(drop=True)
+
+@pytest.fixture
+def cleaned_frame(agri, prepared_frame):
+    """The prepared frame after the Stage 5.5 rules ('-1' sentinels replaced with NaN)."""
+    return agri.validate_agri_chunk(prepared_frame, agri.new_validation_state())
+
+@pytest.fixture
+def db(agri, cleaned_frame):
+    """A connection and cursor to the test database, with the master tables synced; yields (conn, cursor, master_ids)."""
+    conn = agri.connect_mysql()
+    cursor = conn.cursor()
+    master_ids = agri.sync_master_data(conn, cursor, cleaned_frame)
+    yield conn, cursor, master_ids
+    cursor.close()
+    conn.close()
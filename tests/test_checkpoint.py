@@ -0,0 +1,84 @@
+# Tests for Resuming an Interrupted Ingest From Its Checkpoint
+
+# 📌 Stage 1: Import Required Libraries
+import json
+import pytest
+import Project2_Agri_India_metrics as agri_metrics
+
+# 📌 Stage 2: Helpers
+class SimulatedCrash(Exception):
+    """Stands in for the process dying mid-ingest."""
+
+def crash_on_insert(monkeypatch, crash_at):
+    """Makes the crash_at-th agri_production executemany() raise SimulatedCrash; returns the counters (crash_at None stops it)."""
+    executemany = agri_metrics.InstrumentedCursor.executemany
+    calls = {'inserts': 0, 'crash_at': crash_at}
+
+    def crashing_executemany(self, sql, *args, **kwargs):
+        if "INTO agri_production (" in sql:
+            calls['inserts'] += 1
+            if calls['inserts'] == calls['crash_at']:
+                raise SimulatedCrash()
+        return executemany(self, sql, *args, **kwargs)
+
+    monkeypatch.setattr(agri_metrics.InstrumentedCursor, 'executemany', crashing_executemany)
+    return calls
+
+def ingest_progress(agri):
+    """Returns the ingest step's progress as written to the checkpoint file."""
+    with open(agri.PIPELINE_CHECKPOINT_PATH, encoding='utf-8') as checkpoint_file:
+        return json.load(checkpoint_file)['steps']['ingest']
+
+def loaded_rows(agri):
+    """Returns the number of rows in agri_production, read through a new connection."""
+    conn = agri.connect_mysql()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM agri_production")
+    (rows,) = cursor.fetchone()
+    conn.close()
+    return rows
+
+# 📌 Stage 3: Resume Tests
+def test_streamed_ingest_resumes_after_the_last_committed_chunk(agri, csv_path, cleaned_frame, monkeypatch):
+    """A crash in chunk 3 leaves chunks 1-2 checkpointed; the rerun loads only chunks 3 and 4."""
+    monkeypatch.setattr(agri, 'file_path', csv_path)
+    monkeypatch.setattr(agri, 'CSV_CHUNK_SIZE', len(cleaned_frame) // 4)
+    calls = crash_on_insert(monkeypatch, crash_at=3)
+    with pytest.raises(SimulatedCrash):
+        agri.run_pipeline("ingest")
+    progress = ingest_progress(agri)
+    assert progress['chunks_committed'] == 2 and not progress['completed']
+
+    calls.update(inserts=0, crash_at=None)
+    agri.run_pipeline("ingest")
+    assert calls['inserts'] == 2
+    assert ingest_progress(agri)['completed']
+    assert loaded_rows(agri) == len(cleaned_frame)
+
+def test_batched_ingest_resumes_after_the_last_committed_batch(agri, csv_path, cleaned_frame, monkeypatch):
+    """A crash in batch 3 leaves 2 batches checkpointed; the rerun sends only the remaining rows."""
+    batch_size = 500
+    monkeypatch.setattr(agri, 'file_path', csv_path)
+    monkeypatch.setattr(agri, 'INSERT_BATCH_SIZE', batch_size)
+    calls = crash_on_insert(monkeypatch, crash_at=3)
+    with pytest.raises(SimulatedCrash):
+        agri.run_pipeline("ingest")
+    assert ingest_progress(agri)['rows_committed'] == 2 * batch_size
+
+    calls.update(inserts=0, crash_at=None)
+    agri.run_pipeline("ingest")
+    remaining_batches = -(-(len(cleaned_frame) - 2 * batch_size) // batch_size)
+    assert calls['inserts'] == remaining_batches
+    assert loaded_rows(agri) == len(cleaned_frame)
+
+def test_restart_ignores_the_checkpoint(agri, csv_path, cleaned_frame, monkeypatch):
+    """With resume=False (the --restart flag) every row is sent again."""
+    monkeypatch.setattr(agri, 'file_path', csv_path)
+    calls = crash_on_insert(monkeypatch, crash_at=2)
+    with pytest.raises(SimulatedCrash):
+        agri.run_pipeline("ingest")
+
+    calls.update(inserts=0, crash_at=None)
+    agri.run_pipeline("ingest", resume=False)
+    assert calls['inserts'] == -(-len(cleaned_frame) // agri.INSERT_BATCH_SIZE)
+    assert loaded_rows(agri) == len(cleaned_frame)
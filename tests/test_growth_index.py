@@ -0,0 +1,83 @@
+# Tests for the Stage 9.5 Growth Index Against pandas Oracles
+
+# 📌 Stage 1: Import Required Libraries
+import numpy as np
+import pandas as pd
+import pytest
+import Project2_Agri_India_analytics as agri_analytics
+
+# 📌 Stage 2: Fixtures
+@pytest.fixture
+def district_years():
+    """Random district-years with continuous values (no ties) and some missing ones."""
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame([(f"State {state}", f"District {district}", year)
+                          for state in range(4) for district in range(15) for year in range(2000, 2021)
+                          if rng.random() > 0.1],
+                         columns=['state_name', 'dist_name', 'year'])
+    for column in ('rice_production', 'wheat_yield'):
+        values = rng.uniform(1, 1000, len(frame))
+        values[rng.random(len(frame)) < 0.1] = np.nan
+        frame[column] = values
+    return frame
+
+@pytest.fixture
+def index(district_years):
+    """The district growth index of the random district-years."""
+    return agri_analytics.GrowthIndex(district_years, 'dist_name', ['rice_production', 'wheat_yield'], parent='state_name')
+
+def assert_same_ranking(result, oracle):
+    """Compares a top() result with a pandas oracle Series indexed by (state_name, dist_name)."""
+    np.testing.assert_allclose(result.to_numpy(), oracle.to_numpy())
+    assert list(result.index) == list(oracle.index.get_level_values('dist_name'))
+
+# 📌 Stage 3: top() Against nlargest
+@pytest.mark.parametrize('by, reducer', [('total', 'sum'), ('max', 'max')])
+@pytest.mark.parametrize('years', [(None, None), (2005, 2012), (2020, 2020)])
+def test_top_matches_groupby_nlargest(index, district_years, by, reducer, years):
+    """top() by total or max over a year range gives the groupby's nlargest."""
+    start_year, end_year = years
+    rows = district_years[district_years['year'].between(start_year or 0, end_year or 9999)]
+    grouped = rows.groupby(['state_name', 'dist_name'])['rice_production']
+    oracle = grouped.sum(min_count=1) if reducer == 'sum' else grouped.max()
+    for k in (1, 10, 1000):
+        assert_same_ranking(index.top('rice_production', k, by=by, start_year=start_year, end_year=end_year),
+                            oracle.dropna().nlargest(k))
+
+def test_top_within_a_parent_matches_a_filtered_nlargest(index, district_years):
+    """top(within=state) ranks only that state's districts."""
+    rows = district_years[district_years['state_name'] == "State 2"]
+    oracle = rows.groupby(['state_name', 'dist_name'])['rice_production'].sum(min_count=1).dropna().nlargest(5)
+    assert_same_ranking(index.top('rice_production', 5, within="State 2"), oracle)
+    # The same query shape again is answered from the cached order.
+    assert_same_ranking(index.top('rice_production', 5, within="State 2"), oracle)
+    assert len(index.rankings) == 1
+
+def test_top_growth_matches_end_minus_start_year(index, district_years):
+    """top(by='growth') ranks the end-year value minus the start-year value, leaving out entities missing either."""
+    values = district_years.set_index(['state_name', 'dist_name', 'year'])['wheat_yield'].unstack('year')
+    oracle = (values[2020] - values[2015]).dropna().nlargest(5)
+    assert_same_ranking(index.top('wheat_yield', 5, by='growth', start_year=2015, end_year=2020), oracle)
+
+def test_top_years_matches_the_entity_series(index, district_years):
+    """top_years() gives one entity's largest years, largest first."""
+    rows = district_years[(district_years['state_name'] == "State 1") & (district_years['dist_name'] == "District 3")]
+    oracle = rows.set_index('year')['rice_production'].dropna().nlargest(4)
+    result = index.top_years('rice_production', "District 3", 4, parent="State 1")
+    np.testing.assert_allclose(result.to_numpy(), oracle.to_numpy())
+    assert list(result.index) == list(oracle.index)
+
+def test_profile_ranks_and_yoy_growth(index, district_years):
+    """profile() gives the rank among the year's entities (0 when missing) and the YoY growth."""
+    values = district_years.set_index(['state_name', 'dist_name', 'year'])['rice_production'].unstack('year')
+    profile = index.profile('rice_production', "District 3", parent="State 1")
+    series = values.loc[("State 1", "District 3")]
+    ranks = values.rank(ascending=False, method='first').loc[("State 1", "District 3")].fillna(0)
+    np.testing.assert_array_equal(profile['rank'].to_numpy(), ranks.reindex(profile.index).to_numpy())
+    growth = series / series.shift(1) - 1
+    np.testing.assert_allclose(profile['yoy_growth'].to_numpy(), growth.reindex(profile.index).to_numpy())
+
+def test_unknown_metric_is_rejected(index):
+    """top() names the metrics it supports."""
+    with pytest.raises(ValueError):
+        index.top('rice_production', 5, by='median')
@@ -0,0 +1,84 @@
+# Tests for the Stage 8 Ingest Engines
+
+# 📌 Stage 1: Import Required Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+# 📌 Stage 2: Helpers
+def read_table(cursor, sql):
+    """Returns a query's rows as a DataFrame."""
+    cursor.execute(sql)
+    rows = cursor.fetchall()
+    return pd.DataFrame(rows, columns=[column[0] for column in cursor.description])
+
+def crops_per_row(agri):
+    """Returns the number of crop_production rows each agri_production row melts into."""
+    return len({col.rsplit('_', 1)[0] for col in agri.long_format_source_columns})
+
+# 📌 Stage 3: Row Counts and NULL Handling
+@pytest.mark.parametrize('engine', ['row', 'batched', 'load_data', 'incremental'])
+def test_engine_loads_every_row_with_missing_values_as_null(agri, db, cleaned_frame, monkeypatch, engine):
+    """Every engine loads all rows and stores exactly the frame's missing values as NULL."""
+    monkeypatch.setattr(agri, 'INGEST_ENGINE', engine)
+    conn, cursor, _ = db
+    assert agri.insert_agri_production_serial(conn, cursor, cleaned_frame) == (len(cleaned_frame), 0)
+
+    stored = read_table(cursor, "SELECT * FROM agri_production ORDER BY dist_code, year")
+    expected = cleaned_frame.sort_values(['dist_code', 'year']).reset_index(drop=True)
+    assert len(stored) == len(expected)
+    missing = expected[agri.agri_measure_columns].isna().to_numpy()
+    assert missing.any()
+    np.testing.assert_array_equal(stored[agri.agri_measure_columns].isna().to_numpy(), missing)
+    np.testing.assert_allclose(stored[agri.agri_measure_columns].to_numpy(dtype=float),
+                               expected[agri.agri_measure_columns].to_numpy(dtype=float), rtol=1e-6)
+
+def test_long_format_stores_missing_values_as_null(agri, db, cleaned_frame):
+    """crop_production holds one row per crop and district-year, with NULL for the missing figures."""
+    conn, cursor, master_ids = db
+    agri.insert_agri_production_serial(conn, cursor, cleaned_frame)
+    agri.insert_crop_production(conn, cursor, cleaned_frame, master_ids['crops'])
+
+    keys = ['dist_code', 'year', 'crop_id']
+    stored = read_table(cursor, "SELECT * FROM crop_production ORDER BY dist_code, year, crop_id")
+    expected = agri.melt_agri_production(cleaned_frame, master_ids['crops']).sort_values(keys)
+    assert len(stored) == len(cleaned_frame) * crops_per_row(agri) == len(expected)
+    missing = expected[['area', 'production', 'yield']].isna().to_numpy()
+    assert missing[:, 2].any()
+    np.testing.assert_array_equal(stored[['area', 'production', 'yield']].isna().to_numpy(), missing)
+
+# 📌 Stage 4: Incremental Sync
+def test_incremental_sync_skips_unchanged_rows(agri, db, cleaned_frame):
+    """A second sync of the same frame sends nothing; changed rows, including a new NULL, are sent again."""
+    conn, cursor, _ = db
+    assert agri.sync_agri_production_incremental(conn, cursor, cleaned_frame) == (len(cleaned_frame), 0)
+    assert agri.sync_agri_production_incremental(conn, cursor, cleaned_frame) == (0, 0)
+
+    changed = cleaned_frame.copy()
+    first, second = changed.index[0], changed.index[1]
+    changed.loc[first, 'rice_yield'] = np.nan
+    changed.loc[second, 'wheat_area'] = 12345.0
+    assert agri.sync_agri_production_incremental(conn, cursor, changed) == (2, 0)
+    assert agri.sync_agri_production_incremental(conn, cursor, changed) == (0, 0)
+
+    cursor.execute("SELECT rice_yield FROM agri_production WHERE dist_code = %s AND year = %s",
+                   (int(changed.loc[first, 'dist_code']), int(changed.loc[first, 'year'])))
+    assert cursor.fetchall() == [(None,)]
+
+def test_incremental_sync_writes_long_format_rows_of_changed_keys_only(agri, db, cleaned_frame, monkeypatch):
+    """With LOAD_LONG_FORMAT, the incremental engine writes crop rows only for the district-years it syncs."""
+    monkeypatch.setattr(agri, 'LOAD_LONG_FORMAT', True)
+    monkeypatch.setattr(agri, 'INGEST_ENGINE', 'incremental')
+    conn, cursor, _ = db
+    assert not agri.long_format_after_load()
+    agri.sync_agri_production_incremental(conn, cursor, cleaned_frame)
+    cursor.execute("SELECT COUNT(*) FROM crop_production")
+    assert cursor.fetchall() == [(len(cleaned_frame) * crops_per_row(agri),)]
+
+    cursor.execute("DELETE FROM crop_production")
+    conn.commit()
+    changed = cleaned_frame.copy()
+    changed.loc[changed.index[0], 'rice_area'] = 12345.0
+    assert agri.sync_agri_production_incremental(conn, cursor, changed) == (1, 0)
+    cursor.execute("SELECT COUNT(*) FROM crop_production")
+    assert cursor.fetchall() == [(crops_per_row(agri),)]
@@ -0,0 +1,66 @@
+# Tests for the Analytical Query Layer and Its Result Cache
+
+# 📌 Stage 1: Import Required Libraries
+import Project2_Agri_India_queries as agri_queries
+
+# 📌 Stage 2: Cache Invalidation on a Data Version Bump
+class FakeClock:
+    """A monotonic clock the test moves forward by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def load_rows(agri, db, frame):
+    """Loads a frame into agri_production and bumps the data version, as Stage 8 does."""
+    conn, cursor, _ = db
+    agri.insert_agri_production_serial(conn, cursor, frame)
+    return agri_queries.bump_data_version(conn, cursor)
+
+def test_data_version_bump_is_an_update_of_the_seeded_row(agri, db):
+    """The embedded schema seeds version 0, and each bump adds one."""
+    conn, cursor, _ = db
+    assert agri_queries.read_data_version(cursor) == 0
+    assert agri_queries.bump_data_version(conn, cursor) == 1
+    assert agri_queries.bump_data_version(conn, cursor) == 2
+
+def test_cached_results_are_served_until_the_data_version_changes(agri, db, cleaned_frame):
+    """Repeat queries hit the cache; a bump by this process makes the next one read the new data."""
+    conn, cursor, _ = db
+    first_half, second_half = cleaned_frame.iloc[:len(cleaned_frame) // 2], cleaned_frame.iloc[len(cleaned_frame) // 2:]
+    load_rows(agri, db, first_half)
+    layer = agri_queries.AnalyticalQueryLayer(conn, agri.agri_measure_columns, clock=FakeClock())
+    name = "1. Year-wise rice production"
+
+    before = layer.run(name)
+    assert layer.run(name).equals(before)
+    assert layer.cache.stats()['hits'] == 1
+
+    load_rows(agri, db, second_half)
+    after = layer.run(name)
+    assert layer.cache.stats()['misses'] == 2
+    assert layer.cache.stats()['invalidations'] == 1
+    expected = cleaned_frame.groupby('year')['rice_production'].sum().to_numpy()
+    assert abs(after['total_rice_production'].to_numpy() - expected).max() < 1e-3 * expected.max()
+    assert not after.equals(before)
+
+def test_a_bump_by_another_process_is_seen_after_the_check_interval(agri, db, cleaned_frame):
+    """A version bumped behind the layer's back is read again once version_check_seconds have passed."""
+    conn, cursor, _ = db
+    load_rows(agri, db, cleaned_frame)
+    clock = FakeClock()
+    layer = agri_queries.AnalyticalQueryLayer(conn, agri.agri_measure_columns, version_check_seconds=5.0, clock=clock)
+    name = "1. Year-wise rice production"
+    layer.run(name)
+
+    # Another process: a direct UPDATE, not counted in this process's local_version_bumps.
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    conn.commit()
+    layer.run(name)
+    assert layer.cache.stats()['hits'] == 1
+    clock.now += 5.0
+    layer.run(name)
+    assert layer.cache.stats()['invalidations'] == 1
+    assert layer.data_version == agri_queries.read_data_version(cursor)
@@ -0,0 +1,57 @@
+# Tests for the Stage 5.5 Data Quality Rules
+
+# 📌 Stage 1: Import Required Libraries
+import os
+import numpy as np
+import pandas as pd
+
+# 📌 Stage 2: Quarantine Reasons
+def test_rows_breaking_a_rule_are_quarantined_with_their_reasons(agri, prepared_frame):
+    """Each rule quarantines its row with its reason; '-1' sentinels become NaN and the row passes."""
+    frame = prepared_frame.head(12).copy()
+    column = frame.columns.get_loc
+    frame.iloc[0, column('rice_area')] = -5
+    frame.iloc[1, column('wheat_yield')] = agri.MAX_YIELD_KG_PER_HA + 1
+    frame.iloc[2, [column('rice_area'), column('rice_yield'), column('rice_production')]] = [10, 2000, 60]
+    frame.iloc[3, column('year')] = agri.VALID_YEAR_RANGE[0] - 1
+    frame.iloc[5, column('year')] = frame.iloc[4, column('year')]
+    frame.iloc[6, column('state_code')] = frame.iloc[6, column('state_code')] + 1
+    frame.iloc[7, column('state_name')] = "Atlantis"
+    frame.iloc[8, column('maize_area')] = -1
+    expected_reasons = {
+        0: "negative rice_area",
+        1: f"wheat_yield above {agri.MAX_YIELD_KG_PER_HA} kg/ha",
+        2: "rice_production != area x yield / 1000",
+        3: "year out of range",
+        5: "duplicate (dist_code, year)",
+        6: "district listed under another state",
+        7: "state_code listed under another state_name"
+    }
+
+    state = agri.new_validation_state()
+    passing = agri.validate_agri_chunk(frame, state)
+
+    assert len(passing) == len(frame) - len(expected_reasons)
+    assert state['rows_quarantined'] == len(expected_reasons)
+    assert np.isnan(passing.loc[frame.index[8], 'maize_area'])
+    assert state['sentinels_replaced'] >= 1
+    quarantined = pd.read_csv(agri.QUARANTINE_PATH)
+    assert len(quarantined) == len(expected_reasons)
+    for reasons, expected in zip(quarantined['quarantine_reason'], expected_reasons.values()):
+        assert expected in reasons.split("; ")
+    for expected in expected_reasons.values():
+        assert state['reason_counts'][expected] >= 1
+
+def test_later_chunks_are_checked_against_earlier_ones(agri, prepared_frame):
+    """A (dist_code, year) or district seen in an earlier chunk is quarantined in a later one."""
+    state = agri.new_validation_state()
+    first_chunk, second_chunk = prepared_frame.iloc[:52], prepared_frame.iloc[52:104].copy()
+    agri.validate_agri_chunk(first_chunk, state)
+    assert not os.path.exists(agri.QUARANTINE_PATH)
+
+    second_chunk.iloc[0, second_chunk.columns.get_loc('dist_code')] = first_chunk['dist_code'].iloc[0]
+    second_chunk.iloc[0, second_chunk.columns.get_loc('year')] = first_chunk['year'].iloc[0]
+    passing = agri.validate_agri_chunk(second_chunk, state)
+    assert len(passing) == len(second_chunk) - 1
+    reasons = pd.read_csv(agri.QUARANTINE_PATH)['quarantine_reason'].iloc[0].split("; ")
+    assert "duplicate (dist_code, year)" in reasons